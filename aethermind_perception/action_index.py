@@ -0,0 +1,125 @@
+# action_index.py
+import numpy as np
+
+class TimeIndex:
+    """
+    Records sorted by timestamp, with the timestamps in a float64 array so any [t0, t1)
+    window is two binary searches (np.searchsorted) instead of a scan of every record.
+    Records with equal timestamps keep their input order.
+    """
+    def __init__(self, records, ts):
+        ts = np.asarray(ts, dtype=np.float64)
+        order = np.argsort(ts, kind="stable")
+        if np.any(order != np.arange(len(order))):
+            records = [records[i] for i in order]
+            ts = ts[order]
+        self.records = records if hasattr(records, "__getitem__") else list(records)
+        self.ts = ts
+
+    @classmethod
+    def from_records(cls, records, key="t", offset=0.0):
+        # ts of every record is record[key] + offset
+        return cls(records, [r[key] + offset for r in records])
+
+    def __len__(self):
+        return len(self.records)
+
+    def span(self, t0: float, t1: float):
+        """
+        Index range [i0, i1) of the records with t0 <= ts < t1.
+        """
+        return int(np.searchsorted(self.ts, t0, "left")), int(np.searchsorted(self.ts, t1, "left"))
+
+    def spans(self, t0, t1):
+        """
+        span() for arrays of window bounds at once.
+        """
+        return np.searchsorted(self.ts, t0, "left"), np.searchsorted(self.ts, t1, "left")
+
+    def window(self, t0: float, t1: float):
+        """
+        The records with t0 <= ts < t1, in time order.
+        """
+        i0, i1 = self.span(t0, t1)
+        return self.records[i0:i1]
+
+class ActionIndex(TimeIndex):
+    """
+    TimeIndex over action records ({"time"/"ts", "keys", "mouse"}) plus the fields the
+    summaries need as columns, aligned with `ts`:
+      left, right, middle   mouse button held (bool)
+      n_keys                number of keys down (int32)
+      mouse_x, mouse_y      cursor position (float64, NaN when missing)
+    """
+    def __init__(self, records, ts):
+        super().__init__(records, ts)
+        n = len(self.records)
+        # derived from the dicts here; action_ingest builds them straight from its columns
+        self.left = np.zeros(n, bool)
+        self.right = np.zeros(n, bool)
+        self.middle = np.zeros(n, bool)
+        self.n_keys = np.zeros(n, np.int32)
+        self.mouse_x = np.full(n, np.nan)
+        self.mouse_y = np.full(n, np.nan)
+        for i, a in enumerate(self.records):
+            mouse = a.get("mouse") or {}
+            buttons = mouse.get("buttons") or {}
+            self.left[i] = bool(buttons.get("left"))
+            self.right[i] = bool(buttons.get("right"))
+            self.middle[i] = bool(buttons.get("middle"))
+            self.n_keys[i] = len(a.get("keys") or ())
+            pos = mouse.get("position")
+            if pos:
+                self.mouse_x[i], self.mouse_y[i] = pos[0], pos[1]
+
+    @classmethod
+    def from_records(cls, records, key="time", offset=0.0):
+        return super().from_records(records, key=key, offset=offset)
+
+    @classmethod
+    def from_columns(cls, records, ts, left, right, middle, n_keys, mouse_x, mouse_y):
+        """
+        Index over records already sorted by ts, with the columns supplied (no per-record pass).
+        """
+        self = cls.__new__(cls)
+        TimeIndex.__init__(self, records, ts)
+        self.left, self.right, self.middle, self.n_keys = left, right, middle, n_keys
+        self.mouse_x, self.mouse_y = mouse_x, mouse_y
+        return self
+
+def _window_sums(values, i0, i1):
+    # values[i0[k]:i1[k]].sum() for every k in one np.add.reduceat; empty windows give 0
+    padded = np.append(values, values.dtype.type(0))  # reduceat needs every index < len
+    idx = np.minimum(np.stack([i0, i1], axis=1).ravel(), len(values))
+    sums = np.add.reduceat(padded, idx)[::2]
+    return np.where(i1 > i0, sums, 0)
+
+ACTION_FEATURES = ("left_clicks", "right_clicks", "key_presses", "mouse_dist", "mouse_dx", "mouse_dy")
+
+def action_features(index, t0, t1):
+    """
+    Action summary for every window [t0[k], t1[k]) at once, as a dict of arrays:
+      left_clicks, right_clicks  actions with the button held
+      key_presses                keys down, summed over the actions
+      mouse_dist                 path length between consecutive actions in the window
+      mouse_dx, mouse_dy         net cursor movement over the same steps
+    Windows may overlap or be empty; actions without a position contribute no movement.
+    """
+    i0, i1 = index.spans(np.atleast_1d(t0), np.atleast_1d(t1))
+    i1 = np.maximum(i0, i1)
+    # only the stretch of the log the windows cover is touched
+    lo, hi = (int(i0.min()), int(i1.max())) if len(i0) else (0, 0)
+    i0, i1 = i0 - lo, i1 - lo
+    cols = slice(lo, hi)
+    dx = np.nan_to_num(np.diff(index.mouse_x[cols]))
+    dy = np.nan_to_num(np.diff(index.mouse_y[cols]))
+    # step j goes from action j to j+1, so a window's steps are [i0, i1 - 1)
+    s1 = np.maximum(i0, i1 - 1)
+    return {
+        "left_clicks": _window_sums(index.left[cols].astype(np.int64), i0, i1),
+        "right_clicks": _window_sums(index.right[cols].astype(np.int64), i0, i1),
+        "key_presses": _window_sums(index.n_keys[cols].astype(np.int64), i0, i1),
+        "mouse_dist": _window_sums(np.hypot(dx, dy), i0, s1),
+        "mouse_dx": _window_sums(dx, i0, s1),
+        "mouse_dy": _window_sums(dy, i0, s1),
+    }
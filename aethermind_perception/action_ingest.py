@@ -0,0 +1,343 @@
+# action_ingest.py
+"""
+actions.jsonl parsed once into typed NumPy columns, with a `<log>.cols.npz` sidecar so
+later stages and reruns skip the JSON entirely.
+
+Columns (one row per action, sorted by time, ties in file order):
+  time, time_int      float64 epoch seconds, and whether the log wrote it as an integer
+  key_start, key_code keys of row i are key_vocab[key_code[key_start[i]:key_start[i+1]]]
+  pos, scroll         (n, 2) float64, with pos_int/scroll_int marking the integer values
+  buttons, button_set bitmasks over BUTTONS: held / present in the record
+  has_keys, has_mouse, has_pos, has_buttons, has_scroll   which fields the record had
+  layout, layout_vocab     the row's key order (record, mouse, buttons) as a JSON vocab entry
+  extra_rows, extra_json   rows with fields outside that schema, and those fields as JSON
+  skipped_lines       log lines dropped: not JSON, not an object, or no numeric "time"
+  coerced_lines       log lines kept with fields fixed up (see parse_actions)
+Rows come back as the same dicts json.loads gave, key order and int/float types
+included (see ActionRecords), apart from the coerced fields.
+"""
+import json
+import os
+import threading
+from pathlib import Path
+import numpy as np
+from action_index import ActionIndex
+
+try:
+    import orjson
+    loads = orjson.loads
+    DECODER = "orjson"
+    DECODE_ERRORS = (ValueError,)
+except ImportError:
+    try:
+        import msgspec
+        loads = msgspec.json.decode
+        DECODER = "msgspec"
+        DECODE_ERRORS = (ValueError, msgspec.DecodeError)
+    except ImportError:
+        loads = json.loads
+        DECODER = "json"
+        DECODE_ERRORS = (ValueError,)
+
+BUTTONS = ("left", "right", "middle")
+_NUMBER = (int, float)
+
+def read_jsonl(path):
+    """
+    Every non-empty line of a JSONL file, decoded with the fastest available decoder
+    (orjson, msgspec, else the standard library).
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    return [loads(line) for line in data.splitlines() if line.strip()]
+
+def read_jsonl_lines(path):
+    """
+    (line number, record) for every non-empty line of a JSONL file; lines that don't
+    decode come back as (line number, None) instead of failing the whole file.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    out = []
+    for no, line in enumerate(data.splitlines(), 1):
+        if line.strip():
+            try:
+                out.append((no, loads(line)))
+            except DECODE_ERRORS:
+                out.append((no, None))
+    return out
+
+def _is_number(v):
+    return isinstance(v, _NUMBER) and not isinstance(v, bool)
+
+def _is_pair(value):
+    return isinstance(value, (list, tuple)) and len(value) == 2 and all(map(_is_number, value))
+
+def _pair_columns(values):
+    # the values as float64, and which of them were ints so they come back as ints
+    return (np.array(values, dtype=np.float64).reshape(len(values), 2),
+            np.array([[isinstance(v, int) for v in pair] for pair in values], dtype=bool).reshape(len(values), 2))
+
+def parse_actions(records, lines=None):
+    """
+    Decoded action records into the column dict described in the module docstring.
+    `lines` are the records' line numbers in the log (default 1, 2, ...).
+
+    A record without a numeric "time" (or not an object at all) is skipped. Other fields
+    are coerced rather than rejected: a single key string becomes a one-key list and
+    non-string keys are dropped, buttons count as held when truthy, and a mouse, position,
+    scroll or buttons value of the wrong shape is dropped (a missing position is NaN in
+    the ActionIndex). Skipped and coerced line numbers are kept in the columns.
+    """
+    lines = range(1, len(records) + 1) if lines is None else lines
+    kept, times, skipped = [], [], []
+    for r, line in zip(records, lines):
+        t = r.get("time") if isinstance(r, dict) else None
+        if _is_number(t):
+            kept.append((r, line))
+            times.append(t)
+        else:
+            skipped.append(line)
+    order = np.argsort(np.asarray(times, dtype=np.float64), kind="stable")
+    n = len(kept)
+    vocab, layouts = {}, {}
+    layout = np.zeros(n, np.int32)
+    key_start, key_code = [0], []
+    pos, scroll = [[0, 0]] * n, [[0, 0]] * n
+    buttons = np.zeros(n, np.uint8)
+    button_set = np.zeros(n, np.uint8)
+    flags = {k: np.zeros(n, bool) for k in ("has_keys", "has_mouse", "has_pos", "has_buttons", "has_scroll")}
+    extra_rows, extra_json, coerced = [], [], []
+    for row, i in enumerate(order):
+        r, line = kept[i]
+        fixed = False
+        top, mouse_keys, button_keys = list(r), None, None
+        more = {k: v for k, v in r.items() if k not in ("time", "keys", "mouse")}
+        if "keys" in r:
+            keys = r["keys"]
+            if isinstance(keys, str):
+                keys, fixed = [keys], True
+            elif isinstance(keys, list):
+                if not all(isinstance(k, str) for k in keys):
+                    keys, fixed = [k for k in keys if isinstance(k, str)], True
+            else:
+                keys, fixed = [], True
+            flags["has_keys"][row] = True
+            key_code.extend(vocab.setdefault(k, len(vocab)) for k in keys)
+        key_start.append(len(key_code))
+        mouse = r.get("mouse")
+        if "mouse" in r and not isinstance(mouse, dict):
+            fixed = True
+            top.remove("mouse")
+        elif "mouse" in r:
+            flags["has_mouse"][row] = True
+            mouse_keys = list(mouse)
+            if "position" in mouse:
+                if _is_pair(mouse["position"]):
+                    pos[row] = mouse["position"]
+                    flags["has_pos"][row] = True
+                else:
+                    fixed = True
+                    mouse_keys.remove("position")
+            if "scroll" in mouse:
+                if _is_pair(mouse["scroll"]):
+                    scroll[row] = mouse["scroll"]
+                    flags["has_scroll"][row] = True
+                else:
+                    fixed = True
+                    mouse_keys.remove("scroll")
+            btns = mouse.get("buttons")
+            if "buttons" in mouse and not isinstance(btns, dict):
+                fixed = True
+                mouse_keys.remove("buttons")
+            elif "buttons" in mouse:
+                flags["has_buttons"][row] = True
+                button_keys = list(btns)
+                for bit, name in enumerate(BUTTONS):
+                    if name in btns:
+                        fixed = fixed or not isinstance(btns[name], bool)
+                        button_set[row] |= 1 << bit
+                        buttons[row] |= int(bool(btns[name])) << bit
+                other = {k: v for k, v in btns.items() if k not in BUTTONS}
+                if other:
+                    more["\0buttons"] = other
+            other = {k: v for k, v in mouse.items() if k not in ("position", "buttons", "scroll")}
+            if other:
+                more["\0mouse"] = other
+        if more:
+            extra_rows.append(row)
+            extra_json.append(json.dumps(more))
+        if fixed:
+            coerced.append(line)
+        layout[row] = layouts.setdefault(json.dumps([top, mouse_keys, button_keys]), len(layouts))
+    pos, pos_int = _pair_columns(pos)
+    scroll, scroll_int = _pair_columns(scroll)
+    return {
+        "time": np.asarray(times, dtype=np.float64)[order],
+        "time_int": np.array([isinstance(t, int) for t in times], dtype=bool)[order],
+        "key_start": np.asarray(key_start, dtype=np.int64),
+        "key_code": np.asarray(key_code, dtype=np.int32),
+        "key_vocab": np.array(list(vocab), dtype=str) if vocab else np.zeros(0, dtype="U1"),
+        "pos": pos,
+        "pos_int": pos_int,
+        "scroll": scroll,
+        "scroll_int": scroll_int,
+        "buttons": buttons,
+        "button_set": button_set,
+        **flags,
+        "layout": layout,
+        "layout_vocab": np.array(list(layouts), dtype=str) if layouts else np.zeros(0, dtype="U1"),
+        "extra_rows": np.asarray(extra_rows, dtype=np.int64),
+        "extra_json": np.array(extra_json, dtype=str) if extra_json else np.zeros(0, dtype="U1"),
+        "skipped_lines": np.asarray(skipped, dtype=np.int64),
+        "coerced_lines": np.asarray(sorted(coerced), dtype=np.int64),
+    }
+
+class ActionRecords:
+    """
+    Read-only sequence of action dicts over the columns; rows are rebuilt only when
+    indexed, so a window of a million-row log costs only its own rows.
+    """
+    def __init__(self, cols):
+        self.cols = cols
+        self._vocab = cols["key_vocab"].tolist()
+        self._plain = {k: cols[k] for k in ("has_keys", "has_mouse", "has_pos", "has_buttons", "has_scroll")}
+        self._extra = dict(zip(cols["extra_rows"].tolist(), cols["extra_json"].tolist()))
+        self._layouts = [json.loads(v) for v in cols["layout_vocab"].tolist()]
+
+    def __len__(self):
+        return len(self.cols["time"])
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._row(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._row(i)
+
+    def __iter__(self):
+        return (self._row(j) for j in range(len(self)))
+
+    def _row(self, i):
+        c, f = self.cols, self._plain
+        more = json.loads(self._extra[i]) if i in self._extra else {}
+        top, mouse_keys, button_keys = self._layouts[int(c["layout"][i])]
+        r = {}
+        for k in top:
+            if k == "time":
+                t = float(c["time"][i])
+                r["time"] = int(t) if c["time_int"][i] else t
+            elif k == "keys":
+                codes = c["key_code"][c["key_start"][i]:c["key_start"][i + 1]].tolist()
+                r["keys"] = [self._vocab[code] for code in codes]
+            elif k == "mouse":
+                r["mouse"] = self._mouse(i, mouse_keys, button_keys, more)
+            else:
+                r[k] = more[k]
+        return r
+
+    def _mouse(self, i, mouse_keys, button_keys, more):
+        c = self.cols
+        other = more.get("\0mouse", {})
+        mouse = {}
+        for k in mouse_keys:
+            if k == "position":
+                mouse[k] = _pair(c["pos"][i], c["pos_int"][i])
+            elif k == "scroll":
+                mouse[k] = _pair(c["scroll"][i], c["scroll_int"][i])
+            elif k == "buttons":
+                held, present = int(c["buttons"][i]), int(c["button_set"][i])
+                named = {name: bool(held >> bit & 1) for bit, name in enumerate(BUTTONS) if present >> bit & 1}
+                named.update(more.get("\0buttons", {}))
+                mouse[k] = {name: named[name] for name in button_keys}
+            else:
+                mouse[k] = other[k]
+        return mouse
+
+def _pair(values, is_int):
+    return [int(v) if as_int else v for v, as_int in zip(values.tolist(), is_int.tolist())]
+
+def _cache_path(path):
+    return Path(f"{path}.cols.npz")
+
+# bumped when the columns change, so older sidecars are parsed again
+COLUMNS_VERSION = 2
+
+def _stamp(path):
+    st = os.stat(path)
+    return np.array([st.st_size, st.st_mtime_ns, COLUMNS_VERSION], dtype=np.int64)
+
+# one column set per log per process, on top of the on-disk cache; the lock keeps
+# concurrent pipeline stages from parsing (and writing the cache) twice
+_LOADED = {}
+_LOCK = threading.Lock()
+
+def load_action_columns(path, cache=True):
+    """
+    Columns for an actions.jsonl: from memory, from `<log>.cols.npz` if it matches the
+    log's size/mtime, or parsed now (and cached).
+    """
+    with _LOCK:
+        return _load_action_columns(str(path), cache)
+
+def _load_action_columns(path, cache):
+    stamp = _stamp(path)
+    key = str(Path(path).resolve())
+    hit = _LOADED.get(key)
+    if hit is not None and np.array_equal(hit[0], stamp):
+        return hit[1]
+    cols = None
+    npz = _cache_path(path)
+    if cache and npz.exists():
+        try:
+            with np.load(npz) as z:
+                if np.array_equal(z["stamp"], stamp):
+                    cols = {k: z[k] for k in z.files if k != "stamp"}
+        except (OSError, KeyError, ValueError):
+            cols = None
+    if cols is None:
+        numbered = read_jsonl_lines(path)
+        cols = parse_actions([r for _, r in numbered], [no for no, _ in numbered])
+        if cache:
+            try:
+                tmp = npz.with_name(npz.name + ".tmp")
+                with open(tmp, "wb") as f:
+                    np.savez(f, stamp=stamp, **cols)
+                os.replace(tmp, npz)
+            except OSError:
+                pass  # read-only session folder: keep it in memory only
+    _report(path, cols)
+    _LOADED[key] = (stamp, cols)
+    return cols
+
+def _lines(numbers, limit=10):
+    shown = ", ".join(map(str, numbers[:limit]))
+    return shown + (f", ... ({len(numbers) - limit} more)" if len(numbers) > limit else "")
+
+def _report(path, cols):
+    # once per log per process; caches written before these columns existed have neither
+    skipped = cols.get("skipped_lines", np.zeros(0, np.int64)).tolist()
+    coerced = cols.get("coerced_lines", np.zeros(0, np.int64)).tolist()
+    if skipped:
+        print(f"[WARN] {path}: skipped {len(skipped)} unusable action line(s): {_lines(skipped)}")
+    if coerced:
+        print(f"[WARN] {path}: coerced fields on {len(coerced)} action line(s): {_lines(coerced)}")
+
+def load_action_index(path, video_start_ts: float = None, cache=True) -> ActionIndex:
+    """
+    ActionIndex over an actions.jsonl. Records are the raw action dicts (with "time");
+    ts is the absolute time, computed as (time - video_start_ts) + video_start_ts the
+    way the chunker always has, so window edges match exactly.
+    """
+    cols = load_action_columns(path, cache=cache)
+    ts = cols["time"] if video_start_ts is None else (cols["time"] - video_start_ts) + video_start_ts
+    held = cols["buttons"]
+    pos = cols["pos"].astype(np.float64)
+    pos[~cols["has_pos"]] = np.nan
+    return ActionIndex.from_columns(
+        ActionRecords(cols), ts,
+        left=(held & 1).astype(bool), right=(held & 2).astype(bool), middle=(held & 4).astype(bool),
+        n_keys=np.diff(cols["key_start"]).astype(np.int32), mouse_x=pos[:, 0], mouse_y=pos[:, 1],
+    )
@@ -3,15 +3,30 @@ from event_seed_emitter import emit_event_seed
 from input_semantics_mapper import process_actions
 from sync_and_health import capture_sync_metrics, capture_health_metrics
 from dynamics_computation import compute_optical_flow, compute_audio_rms
+from metrics import timer
 
-def process_event(session_id, video_frames, audio_path, raw_actions, video_path, resolution=(1920,1080)):
-    semantic_actions = process_actions(raw_actions, resolution=resolution)
+def process_event(session_id, video_frames, audio_path, raw_actions, video_path, resolution=(1920,1080),
+                  audio_samples=None, audio_sr=None, audio_dyn=None, flow_engine=None, health=None,
+                  game_profile="default", duration_s=2.0):
+    # actions that are already semantic (e.g. mapped by the chunker) are passed through
+    semantic_actions = process_actions(raw_actions, resolution=resolution, profile=game_profile)
     sync_metrics = capture_sync_metrics()
-    health_metrics = capture_health_metrics(resolution=resolution)
-    video_dyn = compute_optical_flow(video_frames, frame_idx_start=0)
-    audio_dyn = compute_audio_rms(audio_path)
-    return emit_event_seed(
-        session_id=session_id, video_path=video_path, audio_path=audio_path,
-        actions=semantic_actions, sync=sync_metrics, video_dyn=video_dyn,
-        audio_dyn=audio_dyn, system=health_metrics
-    )
+    # health may come measured by the caller (fps, dropped frames, codec)
+    health_metrics = health if health is not None else capture_health_metrics(resolution=resolution)
+    with timer("flow"):
+        video_dyn = compute_optical_flow(video_frames, frame_idx_start=0, engine=flow_engine)
+    # audio_dyn may come precomputed (e.g. sliced from the session envelope)
+    if audio_dyn is not None:
+        pass
+    elif audio_samples is None:
+        with timer("rms"):
+            audio_dyn = compute_audio_rms(audio_path)
+    else:
+        with timer("rms"):
+            audio_dyn = compute_audio_rms(audio_path, samples=audio_samples, sr=audio_sr)
+    with timer("seed_emit"):
+        return emit_event_seed(
+            session_id=session_id, video_path=video_path, audio_path=audio_path,
+            actions=semantic_actions, sync=sync_metrics, video_dyn=video_dyn,
+            audio_dyn=audio_dyn, system=health_metrics, duration_s=duration_s
+        )
@@ -0,0 +1,164 @@
+# audio_envelope.py
+import os
+import threading
+from pathlib import Path
+import numpy as np
+
+class AudioEnvelope:
+    """
+    Whole-session audio statistics from one vectorized pass over a SessionAudio.
+
+    The file is cut into blocks of `hop` samples; for every block we keep the sum and the
+    sum of squares over all channels (as running totals, so any window is two lookups)
+    and a centred RMS frame per block boundary. PCM up to 16 bits is summed in int16
+    units with int64 totals, which is exact; other formats are summed as float64 in [-1, 1].
+
+    rms frames have frame_length = 2 * hop and are centred on multiples of hop with zero
+    padding at the ends, i.e. what librosa.feature.rms(frame_length=2048, hop_length=1024)
+    gives over the whole session.
+    """
+
+    def __init__(self, audio, hop, c1, c2, rms):
+        self.audio = audio
+        self.hop = int(hop)
+        self.sr = audio.sr
+        self.channels = audio.channels
+        self.exact = not audio.is_float and audio.bits <= 16
+        self.scale = 32768.0 if self.exact else 1.0  # sample units per 1.0 full scale
+        self.c1, self.c2, self.rms = c1, c2, rms
+
+    @classmethod
+    def compute(cls, audio, hop=1024, blocks_per_pass=4096):
+        """
+        Build the envelope, reading the mapped file blocks_per_pass blocks at a time.
+        """
+        n = audio.n_frames
+        nb = -(-n // hop)
+        exact = not audio.is_float and audio.bits <= 16
+        dtype = np.int64 if exact else np.float64
+        s1 = np.zeros(nb, dtype=dtype)
+        s2 = np.zeros(nb, dtype=dtype)
+        m2 = np.zeros(nb, dtype=np.float64)
+        for b0 in range(0, nb, blocks_per_pass):
+            b1 = min(nb, b0 + blocks_per_pass)
+            a0, a1 = b0 * hop, min(n, b1 * hop)
+            x = audio.pcm16(a0, a1).astype(np.int64) if exact else audio.float_samples(a0, a1)
+            pad = (b1 - b0) * hop - len(x)
+            if pad:
+                x = np.concatenate([x, np.zeros((pad, audio.channels), dtype=x.dtype)])
+            x = x.reshape(b1 - b0, hop, audio.channels)
+            s1[b0:b1] = x.sum(axis=(1, 2))
+            s2[b0:b1] = (x * x).sum(axis=(1, 2))
+            mono = x.sum(axis=2)  # channel sum; divided by channels below
+            m2[b0:b1] = (mono * mono).sum(axis=1)
+        c1 = np.concatenate([np.zeros(1, dtype=dtype), np.cumsum(s1)])
+        c2 = np.concatenate([np.zeros(1, dtype=dtype), np.cumsum(s2)])
+        # frame j is centred on sample j*hop and spans blocks j-1 and j
+        m2 = m2 / float(audio.channels) ** 2 / (32768.0 ** 2 if exact else 1.0)
+        padded = np.concatenate([[0.0], m2, [0.0]])
+        rms = np.sqrt((padded[:-1] + padded[1:]) / (2 * hop)).astype(np.float32)[: n // hop + 1]
+        return cls(audio, hop, c1, c2, rms)
+
+    def sums(self, a0: int, a1: int):
+        """
+        (value count, sum, sum of squares) over samples [a0, a1), all channels.
+        Whole blocks come from the running totals; at most two partial blocks are read.
+        """
+        hop = self.hop
+        if a1 <= a0:
+            return 0, 0, 0
+        b0, b1 = -(-a0 // hop), a1 // hop
+        if b0 >= b1:
+            head_end = a1
+            t1, t2 = 0, 0
+        else:
+            head_end = b0 * hop
+            t1 = self.c1[b1] - self.c1[b0]
+            t2 = self.c2[b1] - self.c2[b0]
+        for lo, hi in ((a0, head_end), (max(b1 * hop, head_end), a1)):
+            if hi > lo:
+                x = self._raw(lo, hi)
+                t1 = t1 + x.sum()
+                t2 = t2 + (x * x).sum()
+        if self.exact:
+            t1, t2 = int(t1), int(t2)
+        return (a1 - a0) * self.channels, t1, t2
+
+    def _raw(self, a0, a1):
+        if self.exact:
+            return self.audio.pcm16(a0, a1).astype(np.int64)
+        return self.audio.float_samples(a0, a1)
+
+    def energy(self, a0: int, a1: int) -> float:
+        """
+        RMS over [a0, a1) in int16 units, the value compute_audio_energy gives for a chunk .wav.
+        """
+        n, _, t2 = self.sums(a0, a1)
+        return float(np.sqrt(t2 / n) * (32768.0 / self.scale)) if n else 0.0
+
+    def mean_std(self, a0: int, a1: int):
+        """
+        Mean and (population) std of [a0, a1) in [-1, 1] units, as embed_audio computes them.
+        """
+        n, t1, t2 = self.sums(a0, a1)
+        if not n:
+            return 0.0, 0.0
+        if self.exact:
+            var = (n * t2 - t1 * t1) / (n * n * self.scale ** 2)  # exact integer numerator
+        else:
+            var = t2 / n - (t1 / n) ** 2
+        return float(t1 / n / self.scale), float(np.sqrt(max(var, 0.0)))
+
+    def rms_frames(self, a0: int, a1: int) -> np.ndarray:
+        """
+        Session rms frames whose centres fall in [a0, a1); a view, nothing is recomputed.
+        """
+        return self.rms[-(-a0 // self.hop): -(-a1 // self.hop)]
+
+def _cache_path(audio, hop):
+    return Path(f"{audio.path}.rms{hop}.npz")
+
+def _stamp(path):
+    st = os.stat(path)
+    return np.array([st.st_size, st.st_mtime_ns], dtype=np.int64)
+
+# one envelope per (file, hop) per process, on top of the on-disk cache; the lock keeps
+# concurrent pipeline stages from computing (and writing the cache) twice
+_ENVELOPES = {}
+_LOCK = threading.Lock()
+
+def load_envelope(audio, hop=1024, cache=True):
+    """
+    Envelope for a SessionAudio, from memory, from `<wav>.rms<hop>.npz` next to the
+    session audio if it matches the file's size/mtime, or computed (and cached) now.
+    """
+    with _LOCK:
+        return _load_envelope(audio, hop, cache)
+
+def _load_envelope(audio, hop, cache):
+    key = (audio.path, hop)
+    env = _ENVELOPES.get(key)
+    if env is not None and env.audio is audio:
+        return env
+    path = _cache_path(audio, hop)
+    stamp = _stamp(audio.path)
+    env = None
+    if cache and path.exists():
+        try:
+            with np.load(path) as z:
+                if np.array_equal(z["stamp"], stamp):
+                    env = AudioEnvelope(audio, hop, z["c1"], z["c2"], z["rms"])
+        except (OSError, KeyError, ValueError):
+            env = None
+    if env is None:
+        env = AudioEnvelope.compute(audio, hop)
+        if cache:
+            try:
+                tmp = path.with_name(path.name + ".tmp")
+                with open(tmp, "wb") as f:
+                    np.savez(f, stamp=stamp, c1=env.c1, c2=env.c2, rms=env.rms)
+                os.replace(tmp, path)
+            except OSError:
+                pass  # read-only session folder: keep it in memory only
+    _ENVELOPES[key] = env
+    return env
@@ -0,0 +1,211 @@
+# batch_runner.py
+"""
+Run the session pipeline over a directory of session folders.
+
+Every session runs in its own child process (session_pipeline.run_session with the
+same outputs and stage cache as session_runner.py), `workers` at a time, largest
+recording first. Each child can be capped: virtual address space (max_memory_mb),
+CPU time (max_cpu_s) and wall time (timeout_s, enforced by the parent). A session that
+fails, runs out of its limits or crashes is recorded and the rest of the batch goes on.
+
+Per-session status goes to <out>/.batch/<session>.json as each one finishes, and the
+batch summary to <out>/batch_summary.json. A rerun skips the sessions already done,
+and with retry_failed also retries the failed ones.
+
+    python batch_runner.py path/to/sessions [--out DIR] [--workers N] [--timeout_s S]
+"""
+import argparse
+import json
+import os
+import signal
+import time
+import traceback
+from multiprocessing import get_context
+from multiprocessing.connection import wait
+from pathlib import Path
+from session_pipeline import DEFAULT_OUTPUTS, run_session
+from stage_cache import CACHE_DIRNAME
+
+STATE_DIRNAME = ".batch"
+SUMMARY = "batch_summary.json"
+
+try:
+    import resource
+except ImportError:  # not on Windows
+    resource = None
+
+def find_sessions(root):
+    """
+    Session folders directly under root: the ones with a session.json, an .mp4 and a .wav.
+    """
+    found = []
+    for folder in sorted(Path(root).iterdir()):
+        if not folder.is_dir() or folder.name.startswith("."):
+            continue
+        if ((folder / "session.json").exists() and any(folder.glob("*.mp4"))
+                and any(folder.glob("*.wav"))):
+            found.append(folder)
+    return found
+
+def _write_json(path, data):
+    tmp = Path(f"{path}.tmp")
+    tmp.write_text(json.dumps(data, indent=2))
+    os.replace(tmp, path)
+
+def _apply_limits(max_memory_mb, max_cpu_s):
+    if resource is None:
+        return
+    if max_memory_mb:
+        size = int(max_memory_mb) * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (size, size))
+    if max_cpu_s:
+        # SIGXCPU at the soft limit, SIGKILL a second later
+        resource.setrlimit(resource.RLIMIT_CPU, (int(max_cpu_s), int(max_cpu_s) + 1))
+
+def _run_one(job):
+    # child process: one session under its limits, result written to the state file
+    t = time.perf_counter()
+    result = {"session": job["session"], "folder": job["folder"], "out_dir": job["out_dir"]}
+    try:
+        _apply_limits(job["max_memory_mb"], job["max_cpu_s"])
+        import cv2
+        cv2.setNumThreads(1)  # the batch pool supplies the parallelism
+        results, timings = run_session(job["folder"], job["out_dir"], outputs=job["outputs"],
+                                       max_workers=job["stage_workers"], cache_dir=job["cache_dir"])
+        events = results.get("events") or []
+        result.update(status="ok", timings=timings, chunks=len(events),
+                      events=sum(1 for e in events if e.get("is_event")))
+    except BaseException as exc:
+        result.update(status="failed", error=repr(exc), traceback=traceback.format_exc())
+    result["seconds"] = time.perf_counter() - t
+    _write_json(job["state_path"], result)
+
+def _crashed(job, proc, seconds, reason):
+    status = "timeout" if reason == "timeout" else "failed"
+    if reason:
+        error = reason
+    elif proc.exitcode < 0:  # RLIMIT_CPU ends in SIGXCPU/SIGKILL, the OOM killer in SIGKILL
+        error = f"killed by {signal.Signals(-proc.exitcode).name}"
+    else:
+        error = f"process exited with code {proc.exitcode}"
+    return {"session": job["session"], "folder": job["folder"], "out_dir": job["out_dir"],
+            "status": status, "error": error, "exit_code": proc.exitcode, "seconds": seconds}
+
+def run_batch(root, out=None, workers=None, max_memory_mb=None, max_cpu_s=None, timeout_s=None,
+              retry_failed=False, outputs=DEFAULT_OUTPUTS, stage_workers=1, cache=True):
+    """
+    Run every session under root (see find_sessions) and return the batch summary.
+    Outputs go to <out>/<session>, or into each session folder when out is None, with
+    the stage cache at <that folder>/.stage_cache unless cache=False. workers defaults
+    to the number of cores; stage_workers is run_session's max_workers per session.
+    """
+    root = Path(root)
+    out_root = Path(out) if out is not None else root
+    state_dir = out_root / STATE_DIRNAME
+    state_dir.mkdir(parents=True, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    sessions = find_sessions(root)
+    records, todo = {}, []
+    for folder in sessions:
+        state_path = state_dir / f"{folder.name}.json"
+        if state_path.exists():
+            previous = json.loads(state_path.read_text())
+            if previous["status"] == "ok" or not retry_failed:
+                records[folder.name] = {**previous, "resumed": True}
+                continue
+        out_dir = out_root / folder.name if out is not None else folder
+        todo.append({
+            "session": folder.name, "folder": str(folder), "out_dir": str(out_dir),
+            "state_path": str(state_path), "outputs": list(outputs), "stage_workers": stage_workers,
+            "cache_dir": str(out_dir / CACHE_DIRNAME) if cache else None,
+            "max_memory_mb": max_memory_mb, "max_cpu_s": max_cpu_s,
+        })
+    # longest first, so a big recording doesn't start last and hold up the end of the batch
+    todo.sort(key=lambda j: -sum(p.stat().st_size for p in Path(j["folder"]).glob("*.mp4")))
+    print(f"[batch] {len(sessions)} sessions, {len(records)} already done, {len(todo)} to run on {workers} workers")
+
+    t0 = time.perf_counter()
+    ctx = get_context()
+    running = {}  # sentinel -> (job, process, start)
+
+    def finish(job, proc, started, reason=None):
+        proc.join()
+        state_path = Path(job["state_path"])
+        if reason is None and proc.exitcode == 0 and state_path.exists():
+            record = json.loads(state_path.read_text())
+        else:  # killed by a limit or the timeout before it could report
+            record = _crashed(job, proc, time.perf_counter() - started, reason)
+            _write_json(state_path, record)
+        records[job["session"]] = record
+        print(f"[batch] {job['session']}: {record['status']} in {record['seconds']:.1f} s"
+              + (f", {record['chunks']} chunks" if record["status"] == "ok" else f" ({record['error']})"))
+        _write_json(out_root / SUMMARY, _summary(sessions, records, time.perf_counter() - t0))
+
+    pending = list(todo)
+    try:
+        _schedule(pending, running, workers, timeout_s, ctx, finish)
+    finally:
+        for _, proc, _ in running.values():  # interrupted: stop the sessions still running
+            proc.kill()
+            proc.join()
+
+    summary = _summary(sessions, records, time.perf_counter() - t0)
+    _write_json(out_root / SUMMARY, summary)
+    return summary
+
+def _schedule(pending, running, workers, timeout_s, ctx, finish):
+    # keep `workers` sessions running until pending is empty, killing any past timeout_s
+    while pending or running:
+        while pending and len(running) < workers:
+            job = pending.pop(0)
+            Path(job["state_path"]).unlink(missing_ok=True)
+            proc = ctx.Process(target=_run_one, args=(job,), name=f"session-{job['session']}")
+            proc.start()
+            running[proc.sentinel] = (job, proc, time.perf_counter())
+        now = time.perf_counter()
+        wait_for = None
+        if timeout_s:
+            wait_for = max(0.0, min(started + timeout_s - now for _, _, started in running.values()))
+        for sentinel in wait(list(running), timeout=wait_for):
+            job, proc, started = running.pop(sentinel)
+            finish(job, proc, started)
+        if timeout_s:
+            now = time.perf_counter()
+            for sentinel, (job, proc, started) in list(running.items()):
+                if now - started >= timeout_s:
+                    proc.kill()
+                    del running[sentinel]
+                    finish(job, proc, started, reason="timeout")
+
+def _summary(sessions, records, seconds):
+    done = [records[f.name] for f in sessions if f.name in records]
+    return {
+        "sessions": len(sessions),
+        "ok": sum(1 for r in done if r["status"] == "ok"),
+        "failed": sum(1 for r in done if r["status"] != "ok"),
+        "pending": len(sessions) - len(done),
+        "wall_seconds": seconds,
+        "chunks": sum(r.get("chunks", 0) for r in done),
+        "results": done,
+    }
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Run the session pipeline over a directory of sessions")
+    parser.add_argument("root", help="Folder whose subfolders are sessions")
+    parser.add_argument("--out", default=None, help="Output root (default: write into each session folder)")
+    parser.add_argument("--workers", type=int, default=None, help="Sessions run at the same time (default: cores)")
+    parser.add_argument("--max_memory_mb", type=int, default=None, help="Address-space limit per session")
+    parser.add_argument("--max_cpu_s", type=int, default=None, help="CPU-time limit per session")
+    parser.add_argument("--timeout_s", type=float, default=None, help="Wall-time limit per session")
+    parser.add_argument("--retry_failed", action="store_true", help="Rerun sessions that failed last time")
+    parser.add_argument("--no_cache", action="store_true", help="Don't use the per-session stage cache")
+    args = parser.parse_args(argv)
+    summary = run_batch(args.root, args.out, workers=args.workers, max_memory_mb=args.max_memory_mb,
+                        max_cpu_s=args.max_cpu_s, timeout_s=args.timeout_s,
+                        retry_failed=args.retry_failed, cache=not args.no_cache)
+    print(f"[batch] {summary['ok']} ok, {summary['failed']} failed, {summary['pending']} pending, "
+          f"{summary['chunks']} chunks in {summary['wall_seconds']:.1f} s")
+
+if __name__ == "__main__":
+    cli()
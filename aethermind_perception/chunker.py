@@ -1,43 +1,42 @@
+import datetime
 import json
+import os
+import re
 import subprocess
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_all_start_methods, get_context
 from pathlib import Path
-from moviepy import VideoFileClip
-import cv2
 from aethermind_pipeline import process_event
-from input_semantics_mapper import process_actions
+from input_semantics_mapper import PROFILES, load_profile, process_actions
 from sync_and_health import capture_health_metrics
+from video_stream import FrameClock, MotionMeter, iter_video_windows, probe_video, read_frames_sequential, video_codec
+from session_audio import open_session_audio
+from audio_envelope import load_envelope
+from dynamics_computation import rms_from_envelope, get_flow_engine, FLOW_METHODS
+from event_detector import compute_audio_energy
+from action_ingest import load_action_index, read_jsonl
+from stage_cache import CACHE_DIRNAME, StageCache, code_version, link_input
+from metrics import PROFILERS, Metrics, count, current, profiled, timer, use_metrics
+from event_seed_emitter import EventSeed, make_event_uid
+from seed_sink import FSYNC_POLICIES, SEED_FORMATS, SeedSink, dump_seeds, read_seeds
+from segmentation import DEFAULTS as SEGMENT_DEFAULTS, adaptive_chunk_bounds
 
 # python3 chunker.py --folder 
 ACTION_LOG = "aethermind-input/data/SESSION_NAME/actions.jsonl"
 
-def read_video_frames_sparse(path: str, max_frames: int = 12):
+def read_video_frames_sparse(path: str, max_frames: int = 12, target_size=None, meter=None, clock=None):
     """
     Read up to max_frames, spaced across the clip. Returns (frames, (width,height), fps).
     Frames are BGR uint8 for OpenCV-based flow.
+    Decodes forward once and only retrieves the chosen frames instead of seeking to each
+    one (see video_stream.read_frames_sequential); target_size=(w, h) downscales on read.
+    A video_stream.MotionMeter passed as `meter` measures the clip's motion in the same pass,
+    and a video_stream.FrameClock passed as `clock` counts its dropped frames.
     """
-    cap = cv2.VideoCapture(path)
-    if not cap.isOpened():
-        return [], (1920, 1080), 30  # sensible defaults
-    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or 0
-    fps = cap.get(cv2.CAP_PROP_FPS) or 30
-    w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 1920)
-    h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 1080)
-
-    if total <= 0:
-        cap.release()
-        return [], (w, h), fps
-
-    # pick indices roughly evenly spaced
-    take = min(max_frames, total)
-    idxs = [int(i * (total - 1) / max(1, take - 1)) for i in range(take)]
-    frames = []
-    for i in idxs:
-        cap.set(cv2.CAP_PROP_POS_FRAMES, i)
-        ok, frame = cap.read()
-        if ok and frame is not None:
-            frames.append(frame)
-    cap.release()
-    return frames, (w, h), fps
+    return read_frames_sequential(path, max_frames=max_frames, target_size=target_size, meter=meter,
+                                  clock=clock)
 
 def load_actions(action_log_path: str, video_start_ts: float = None):
     """
@@ -45,32 +44,44 @@ def load_actions(action_log_path: str, video_start_ts: float = None):
     relative to the start of the video.
     If video_start_ts is provided, subtract it (in seconds). 
     """
-    actions = []
-    with open(action_log_path, "r") as f:
-        for line in f:
-            raw = json.loads(line)
-            # raw["time"] is epoch seconds with fraction
-            ts = raw["time"]
-            if video_start_ts is not None:
-                ts = ts - video_start_ts
-            entry = {
-                "ts": ts,
-                "keys": raw.get("keys", []),
-                "mouse": raw.get("mouse", {}),
-            }
-            actions.append(entry)
-    return actions
-
-def split_media_ffmpeg(input_path: Path, start: float, end: float, out_path: Path, is_video: bool):
+    return [parse_action(raw, video_start_ts) for raw in read_jsonl(action_log_path)]
+
+def parse_action(raw, video_start_ts: float = None):
+    """
+    One actions.jsonl record as an action entry with ts relative to video_start_ts.
+    """
+    # raw["time"] is epoch seconds with fraction
+    ts = raw["time"]
+    if video_start_ts is not None:
+        ts = ts - video_start_ts
+    return {
+        "ts": ts,
+        "keys": raw.get("keys", []),
+        "mouse": raw.get("mouse", {}),
+    }
+
+def split_media_ffmpeg(input_path: Path, start: float, end: float, out_path: Path, is_video: bool,
+                       seek_input: bool = False):
     """
     Use ffmpeg to slice video or audio.
+    With seek_input=True, -ss goes before -i so ffmpeg jumps straight to the nearest
+    keyframe instead of demuxing from the start; combined with stream copy this gives
+    keyframe-aligned video chunks without a re-encode.
     """
-    cmd = [
-        "ffmpeg", "-y",
-        "-i", str(input_path),
-        "-ss", str(start),
-        "-to", str(end),
-    ]
+    if seek_input:
+        cmd = [
+            "ffmpeg", "-y",
+            "-ss", str(start),
+            "-i", str(input_path),
+            "-t", str(end - start),
+        ]
+    else:
+        cmd = [
+            "ffmpeg", "-y",
+            "-i", str(input_path),
+            "-ss", str(start),
+            "-to", str(end),
+        ]
     if is_video:
         cmd += ["-c", "copy", "-an", str(out_path)]
     else:
@@ -100,125 +111,608 @@ def deduplicate_actions(actions):
             last_state = action_state(action)
     return deduped
 
+def chunk_bounds(abs_start: float, abs_end: float, chunk_duration: float):
+    """
+    Fixed-length [start, end) windows covering [abs_start, abs_end); the last one may be short.
+    """
+    bounds = []
+    cur_start = abs_start
+    while cur_start < abs_end:
+        cur_end = min(cur_start + chunk_duration, abs_end)
+        bounds.append((cur_start, cur_end))
+        cur_start = cur_end
+    return bounds
+
+def window_actions_for(index, cur_start, cur_end, video_start_ts):
+    """
+    Actions (relative ts) that fall within the absolute window [cur_start, cur_end).
+    `index` is an action_index.ActionIndex over the raw actions' absolute timestamps
+    (action_ingest.load_action_index), so this is a binary search rather than a scan of
+    the whole log, and only the window's actions are ever turned into dicts.
+    """
+    return [parse_action(raw, video_start_ts) for raw in index.window(cur_start, cur_end)]
+
+def build_chunk(cur_start, cur_end, window_actions, video_start_ts, session_id, frames, resolution, fps,
+                vid_out, aud_out, audio_dyn=None, raw_motion=None, raw_energy=None, flow_engine=None,
+                on_seed=None, dropped_frames=0, codec="h264", game_profile="default"):
+    """
+    Bundle the in-window actions, emit the EventSeed for one chunk and return its chunk record.
+    `frames` are the sparse BGR frames for the window, however they were decoded.
+    `audio_dyn` is the chunk's precomputed RMS dict, so the seed stage doesn't have to
+    read aud_out back; `flow_engine` picks the optical flow estimator (default Farneback).
+    raw_motion/raw_energy are the event detector's metrics, measured while chunking.
+    `dropped_frames` and `codec` (measured by the caller) go into the seed's system health.
+    `on_seed`, if given, is called with the emitted seed. `game_profile` picks the key and
+    button tables for the semantic actions (input_semantics_mapper.PROFILES, or a .json file).
+    """
+    w, h = resolution
+
+    window_actions = deduplicate_actions(window_actions)
+
+    # Ensure action ts are absolute (your existing logic)
+    if video_start_ts is not None:
+        for action in window_actions:
+            action["ts"] = action["ts"] + video_start_ts
+
+    # Pack health metrics (the pipeline will also compute dynamics; this adds provenance)
+    health = capture_health_metrics(fps=int(fps), dropped_frames=dropped_frames, focused=True, resolution=(w, h),
+                                    codec=codec, crf=None)
+
+    # Let the pipeline convert raw actions → semantic actions (includes mouse_norm)
+    semantic_actions = process_actions(window_actions, resolution=(w, h), profile=game_profile)
+
+    # Call the pipeline: this computes video_dyn (flow) + audio_dyn (RMS) and emits a seed
+    seed = process_event(
+        session_id=session_id,
+        video_frames=frames,                 # sparse frames are fine for flow stats
+        audio_path=str(aud_out),
+        raw_actions=semantic_actions,        # already semantic, so process_event doesn't map them again
+        video_path=str(vid_out),
+        resolution=(w, h),
+        audio_dyn=audio_dyn,
+        flow_engine=flow_engine,
+        health=health,
+        game_profile=game_profile,
+        duration_s=cur_end - cur_start,  # adaptive chunks aren't all chunk_duration long
+    )
+
+    # persisted by the caller (e.g. a seed_sink.SeedSink passed as on_seed)
+    if on_seed is not None:
+        on_seed(seed)
+    print(f"[DEBUG] Emitted EventSeed → {seed['event_uid']}")
+
+    # --- keep your existing chunk record for downstream tools ---
+    return {
+        "start": cur_start,
+        "end": cur_end,
+        "video_path": str(vid_out),
+        "audio_path": str(aud_out),
+        "valence": "unknown",
+        "source": "perception",
+        "annotations": {},
+        "raw_motion": raw_motion,
+        "raw_energy": raw_energy,
+        "event_score": None,
+        "is_event": False,
+        "actions": window_actions
+    }
+
+# one VideoFileClip per process for mode="encode", so pool workers open the source only once
+_CLIPS = {}
+
+def _open_clip(video_path):
+    clip = _CLIPS.get(video_path)
+    if clip is None:
+        from moviepy import VideoFileClip  # ~0.5 s to import, and only encode mode uses it
+        clip = _CLIPS[video_path] = VideoFileClip(video_path)
+    return clip
+
+def _close_clips():
+    for clip in _CLIPS.values():
+        clip.close()
+    _CLIPS.clear()
+
+def _init_worker():
+    # each worker is single-threaded for OpenCV; the pool supplies the parallelism
+    import cv2
+    cv2.setNumThreads(1)
+
+def chunk_job(idx, bounds, rel_bounds, video_path, audio_path, out_dir, video_start_ts, actions, window=None,
+              motion=None, dropped_frames=None, codec="unknown", mode="stream", write_chunks="copy",
+              audio_backend="slice", write_audio=True, frame_size=None, flow=None, game_profile="default",
+              keep_seed=False, profile=None):
+    """
+    The job process_chunk runs for chunk `idx`: absolute and video-relative bounds, the
+    inputs and output folder, the window's actions and, in stream mode, its decoded
+    window (frames, (w, h), fps) with the motion and dropped frames measured on it.
+    """
+    return {
+        "idx": idx,
+        "bounds": bounds,
+        "rel_bounds": rel_bounds,
+        "video_path": str(video_path),
+        "audio_path": str(audio_path),
+        "out_dir": str(out_dir),
+        # the output session folder's name (e.g. "session_20250805_162657")
+        "session_id": Path(out_dir).name,
+        "video_start_ts": video_start_ts,
+        "mode": mode,
+        "write_chunks": write_chunks,
+        "audio_backend": audio_backend,
+        "write_audio": write_audio,
+        "frame_size": frame_size,
+        "flow": flow,
+        "actions": actions,
+        "window": window,
+        "motion": motion,
+        "dropped_frames": dropped_frames,
+        "codec": codec,
+        "game_profile": game_profile,
+        "keep_seed": keep_seed,
+        "profile": profile,
+    }
+
+def process_chunk(job):
+    """
+    Run everything for one chunk: write its media, build the EventSeed and the chunk record.
+    Never raises: returns {"ok": True, "chunk": ...} (plus "seed" with job["keep_seed"]) or {"ok": False, "failure": ...} so one
+    bad chunk is reported instead of taking down the whole session. Either way "metrics"
+    holds the chunk's timers (metrics.Metrics.to_dict), collected on this thread so they
+    can come back from a pool worker. With job["profile"] = (path, profiler) the chunk is
+    profiled into path.
+    """
+    local, seeds = Metrics(), []
+    on_seed = seeds.append if job.get("keep_seed") else None
+    with use_metrics(local, thread_only=True):
+        try:
+            if job.get("profile"):
+                with profiled(*job["profile"]):
+                    chunk = _process_chunk(job, on_seed)
+            else:
+                chunk = _process_chunk(job, on_seed)
+            result = {"ok": True, "chunk": chunk}
+            if seeds:
+                result["seed"] = seeds[0]
+        except Exception as exc:
+            result = {"ok": False, "failure": _failure_report(job, exc)}
+    result["metrics"] = local.to_dict()
+    return result
+
+def _process_chunk(job, on_seed=None):
+    out_dir = Path(job["out_dir"])
+    base = f"chunk_{job['idx']:04d}"
+    vid_out = out_dir / f"{base}.mp4"
+    aud_out = out_dir / f"{base}.wav"
+    rel_start, rel_end = job["rel_bounds"]
+    cur_start, cur_end = job["bounds"]
+
+    # 1) video chunk (no audio) + frames for the seed
+    if job["mode"] == "encode":
+        with timer("encode"):
+            _open_clip(job["video_path"]).subclipped(rel_start, rel_end).write_videofile(
+                str(vid_out), codec="libx264", audio=False, logger=None
+            )
+        # Read sparse frames + get resolution/fps for health metrics & mouse normalization;
+        # the same pass measures the chunk's motion and dropped frames
+        meter, clock = MotionMeter(), FrameClock()
+        with timer("decode"):
+            frames, (w, h), fps = read_video_frames_sparse(str(vid_out), max_frames=12,
+                                                           target_size=job["frame_size"], meter=meter,
+                                                           clock=clock)
+        count("frames_decoded", clock.frames)
+        count("dropped_frames", clock.dropped)
+        raw_motion, dropped = meter.value, clock.dropped
+    else:
+        frames, (w, h), fps = job["window"]
+        raw_motion, dropped = job["motion"], job["dropped_frames"]
+        if job["write_chunks"] == "copy":
+            with timer("ffmpeg_split"):
+                split_media_ffmpeg(Path(job["video_path"]), rel_start, rel_end, vid_out, is_video=True, seek_input=True)
+
+    # 2) extract audio chunk
+    audio_dyn, raw_energy = None, None
+    if job["audio_backend"] == "slice":
+        # the session wav is mapped once per process and shared with the later stages;
+        # RMS frames and energy are slices of the session envelope
+        session_audio = open_session_audio(job["audio_path"], start_ts=job["video_start_ts"] or 0.0)
+        envelope = load_envelope(session_audio)
+        a0, a1 = session_audio.chunk_range(cur_start, cur_end)
+        if job["write_audio"]:
+            with timer("audio_slice"):
+                session_audio.write_wav(aud_out, rel_start, rel_end)
+        with timer("rms"):
+            audio_dyn = rms_from_envelope(envelope, a0, a1)
+            raw_energy = envelope.energy(a0, a1)
+    else:
+        with timer("ffmpeg_split"):
+            split_media_ffmpeg(Path(job["audio_path"]), rel_start, rel_end, aud_out, is_video=False)
+        with timer("rms"):
+            raw_energy = compute_audio_energy(aud_out)
+
+    # 3) actions, EventSeed and chunk record
+    return build_chunk(
+        cur_start, cur_end, job["actions"], job["video_start_ts"], job["session_id"],
+        frames, (w, h), fps, vid_out, aud_out, audio_dyn=audio_dyn,
+        raw_motion=raw_motion, raw_energy=raw_energy,
+        flow_engine=get_flow_engine(**job["flow"]) if job["flow"] else None,
+        dropped_frames=dropped, codec=job["codec"], on_seed=on_seed, game_profile=job["game_profile"],
+    )
+
+def _failure_report(job, exc):
+    return {
+        "chunk_index": job["idx"],
+        "start": job["bounds"][0],
+        "end": job["bounds"][1],
+        "worker_pid": os.getpid(),
+        "error": repr(exc),
+        "traceback": traceback.format_exc(),
+    }
+
+def _run_pool(jobs, workers, max_pending=None):
+    """
+    Yield process_chunk results in job order from a process pool.
+    At most max_pending jobs (default 2 per worker) are in flight, so in stream mode the
+    decoder never runs far ahead of the workers.
+    Workers are started by a fork server (spawned where there is none), not forked from
+    this process: its decoder threads, and in session_pipeline the vectors stage's, may
+    hold locks (FFmpeg's, the metrics and envelope caches') that a forked child would
+    inherit locked.
+    """
+    max_pending = max_pending or 2 * workers
+    pending = deque()
+    context = get_context("forkserver" if "forkserver" in get_all_start_methods() else "spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+        def collect():
+            job, fut = pending.popleft()
+            try:
+                return fut.result()
+            except Exception as exc:  # worker process died
+                return {"ok": False, "failure": _failure_report(job, exc)}
+        for job in jobs:
+            pending.append((job, pool.submit(process_chunk, job)))
+            if len(pending) >= max_pending:
+                yield collect()
+        while pending:
+            yield collect()
+
+# this might need to be adjusted as there's an issue with absolute time between
+# session.json and the actions.jsonl timestamps
+SESSION_CLOCK_OFFSET = 14400  # +4 h, UTC/local mismatch of session.json start_time
+
+def find_session_inputs(folder, video=None, audio=None, actions=None):
+    """
+    The session files in `folder` (explicit paths win): the .mp4, the .wav, actions.jsonl
+    and session.json, plus session.json's start_time ("2025-08-01_20-12-27", read as UTC)
+    (or already epoch seconds) in "start_ts"; None if missing. SESSION_CLOCK_OFFSET is
+    not applied.
+    """
+    folder = Path(folder)
+    files = list(folder.iterdir())
+    found = {
+        "video": video or next((str(f) for f in files if f.suffix.lower() == ".mp4"), None),
+        "audio": audio or next((str(f) for f in files if f.suffix.lower() == ".wav"), None),
+        "actions": actions or next((str(f) for f in files if f.name.endswith("actions.jsonl")), None),
+        "session_json_path": next((f for f in files if f.name == "session.json"), None),
+        "session_json": None,
+        "start_ts": None,
+    }
+    if found["session_json_path"]:
+        with open(found["session_json_path"], "r") as sjf:
+            found["session_json"] = json.load(sjf)
+        # Parse start_time string to epoch seconds
+        start_time_str = found["session_json"].get("start_time")
+        if isinstance(start_time_str, (int, float)):
+            found["start_ts"] = start_time_str
+        elif start_time_str:
+            # Example: "2025-08-01_20-12-27"
+            dt_match = re.match(r"(\d{4})-(\d{2})-(\d{2})_(\d{2})-(\d{2})-(\d{2})", start_time_str)
+            if dt_match:
+                dt_obj = datetime.datetime(*(int(g) for g in dt_match.groups()))
+                found["start_ts"] = int(dt_obj.replace(tzinfo=datetime.timezone.utc).timestamp())
+    return found
+
+def build_session_manifest(session_json, chunks, video, audio, video_start_ts):
+    """
+    The session.json event_detector reads: the recorder's session.json fields plus the chunks.
+    """
+    manifest = dict(session_json or {})
+    manifest["chunks"] = chunks
+    # session-wide media so later stages can read windows from it instead of per-chunk files
+    manifest["media"] = {"video": video, "audio": audio, "video_start_ts": video_start_ts}
+    return manifest
+
 def chunk_video_audio_with_actions(
     video_path: str,
     audio_path: str,
     action_log_path: str = ACTION_LOG,
     chunk_duration: float = 2.0,
     output_dir: str = "chunks",
-    video_start_ts: float = None
+    video_start_ts: float = None,
+    mode: str = "stream",
+    write_chunks: str = "copy",
+    workers: int = 1,
+    audio_backend: str = "slice",
+    write_audio: bool = True,
+    frame_size=None,
+    flow=None,
+    on_failure=None,
+    profile_chunk=None,
+    profiler="cprofile",
+    seeds=None,
+    game_profile="default",
+    segmentation=None,
 ):
     """
     Splits video/audio into synchronized chunks and bundles in-window actions.
     Returns list of chunk dicts with actions.
-    """
-    out_dir = Path(output_dir)
-    out_dir.mkdir(parents=True, exist_ok=True)
 
-    # load and normalize action timestamps
-    actions = load_actions(action_log_path, video_start_ts)
-    print(f"[DEBUG] Loaded {len(actions)} actions from {action_log_path}")
-    if actions:
-        print(f"[DEBUG] First 5 action timestamps: {[a['ts'] for a in actions[:5]]}")
-        print(f"[DEBUG] Last 5 action timestamps: {[a['ts'] for a in actions[-5:]]}")
+    mode="stream" decodes the source video once and hands each window's frames to the
+    seed stage in memory. write_chunks controls the per-chunk .mp4 files in that mode:
+    "copy" stream-copies them (keyframe-aligned, no re-encode), "none" skips them and
+    video_path is then only a logical name for the chunk.
+    mode="encode" is the original path: every chunk is re-encoded with libx264 and
+    read back from disk.
 
-    video = VideoFileClip(str(video_path))
-    total_dur = video.duration
+    workers > 1 fans the chunks out over a process pool; chunk indices and the returned
+    list are the same as with workers=1. Chunks that fail are left out of the list and
+    written to chunk_failures.json in the output folder (and passed to on_failure).
 
+    audio_backend="slice" maps the session .wav once (see session_audio.open_session_audio)
+    and writes every chunk's PCM16 samples from memory, identical to what ffmpeg cuts;
+    each chunk's RMS frames and raw_energy are slices of the cached session envelope
+    (audio_envelope.load_envelope). audio_backend="ffmpeg" runs one ffmpeg process per
+    chunk and librosa per chunk instead. With write_audio=False (slice only) the chunk
+    .wav files are skipped altogether.
 
-    chunks = []
-    idx = 0
-    # If video_start_ts is provided, chunk times are absolute epoch seconds
-    if video_start_ts is not None:
-        abs_start = video_start_ts
-    else:
-        abs_start = 0.0
-    abs_end = abs_start + total_dur
-    cur_start = abs_start
-    while cur_start < abs_end:
-        cur_end = min(cur_start + chunk_duration, abs_end)
-        base = f"chunk_{idx:04d}"
-        vid_out = out_dir / f"{base}.mp4"
-        aud_out = out_dir / f"{base}.wav"
-
-        # 1) write video chunk (no audio)
-        rel_start = cur_start - abs_start
-        rel_end = cur_end - abs_start
-        video.subclipped(rel_start, rel_end).write_videofile(
-            str(vid_out), codec="libx264", audio=False, logger=None
-        )
-
-        # 2) extract audio chunk
-        split_media_ffmpeg(Path(audio_path), rel_start, rel_end, aud_out, is_video=False)
+    frame_size=(w, h) downscales the sampled frames on read, before flow; chunk records
+    and mouse normalization keep the source resolution.
 
-        # 3) collect actions within [cur_start, cur_end)
-        window_actions = [
-            a for a in actions
-            if cur_start <= (a["ts"] + video_start_ts) < cur_end
-        ]
+    flow is an optional dict of dynamics_computation.FlowEngine settings (method, scale,
+    roi) for the seeds' video_dyn; None keeps full-resolution Farneback.
 
-        window_actions = deduplicate_actions(window_actions)
+    Every chunk record carries raw_motion (mean grey-level frame difference, measured on
+    the decoded window) and raw_energy, so event_detector.detect_events only has to score.
 
-        # Ensure action ts are absolute (your existing logic)
-        if video_start_ts is not None:
-            for action in window_actions:
-                action["ts"] = action["ts"] + video_start_ts
+    Timers and counters go to the active metrics.Metrics (see metrics.use_metrics), and
+    the seeds' system health carries each window's measured dropped frames and the
+    source codec. profile_chunk=N profiles chunk N's processing with `profiler` into
+    profile_chunk_NNNN.prof (.html for pyinstrument) in the output folder.
 
-        # --- NEW: build EventSeed for this chunk ---
-        # Derive a session_id from the output session folder name (e.g., "session_20250805_162657")
-        session_id = out_dir.name
+    seeds, if given, is called with every chunk's EventSeed in chunk order, from this
+    process also when workers > 1; pass a seed_sink.SeedSink to persist them.
 
-        # Read sparse frames + get resolution/fps for health metrics & mouse normalization
-        frames, (w, h), fps = read_video_frames_sparse(str(vid_out), max_frames=12)
+    game_profile maps the seeds' raw keys and mouse buttons to semantic actions: a name
+    in input_semantics_mapper.PROFILES, a .json file with the same tables, or a dict.
 
-        # Pack health metrics (the pipeline will also compute dynamics; this adds provenance)
-        health = capture_health_metrics(fps=int(fps), dropped_frames=0, focused=True, resolution=(w, h), codec="h264", crf=None)
-
-        # Let the pipeline convert raw actions → semantic actions (includes mouse_norm)
-        semantic_actions = process_actions(window_actions, resolution=(w, h))
+    segmentation is an optional dict of segmentation.DEFAULTS settings (min_duration,
+    max_duration, step, thresholds) that switches to activity-driven chunks: idle spans
+    are merged into chunks of up to max_duration and active ones cut at chunk_duration
+    (see segmentation.py). None keeps fixed chunk_duration windows.
+    """
+    if profiler not in PROFILERS:
+        raise ValueError(f"unknown profiler: {profiler}")
+    if mode not in ("stream", "encode"):
+        raise ValueError(f"unknown chunking mode: {mode}")
+    if write_chunks not in ("copy", "none"):
+        raise ValueError(f"unknown write_chunks option: {write_chunks}")
+    if audio_backend not in ("ffmpeg", "slice"):
+        raise ValueError(f"unknown audio backend: {audio_backend}")
+    if not write_audio and audio_backend != "slice":
+        raise ValueError("write_audio=False needs audio_backend='slice'")
 
-        # Call the pipeline: this computes video_dyn (flow) + audio_dyn (RMS) and emits a seed
-        seed = process_event(
-            session_id=session_id,
-            video_frames=frames,                 # sparse frames are fine for flow stats
-            audio_path=str(aud_out),
-            raw_actions=semantic_actions,        # already semantic-ized is fine; pipeline tolerates this
-            video_path=str(vid_out),
-            resolution=(w, h),
-        )
+    out_dir = Path(output_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
 
-        # Persist seeds incrementally (jsonl), and/or collect them for the session manifest
-        # seeds_path = out_dir / "seeds.jsonl"
-        # with open(seeds_path, "a") as sf:
-            # sf.write(json.dumps(seed) + "\n")
-
-        print(f"[DEBUG] Emitted EventSeed → {seed['event_uid']}")
-
-        # --- keep your existing chunk record for downstream tools ---
-        chunks.append({
-            "start": cur_start,
-            "end": cur_end,
-            "video_path": str(vid_out),
-            "audio_path": str(aud_out),
-            "valence": "unknown",
-            "source": "perception",
-            "annotations": {},
-            "raw_motion": None,
-            "raw_energy": None,
-            "event_score": None,
-            "is_event": False,
-            "actions": window_actions
-        })
+    # load the actions once (parsed columns are cached next to the log), sorted on
+    # absolute time; every chunk's actions are then a binary search away
+    action_index = load_action_index(action_log_path, video_start_ts)
+    print(f"[DEBUG] Loaded {len(action_index)} actions from {action_log_path}")
+    if len(action_index):
+        print(f"[DEBUG] First 5 action timestamps: {[parse_action(a, video_start_ts)['ts'] for a in action_index.records[:5]]}")
+        print(f"[DEBUG] Last 5 action timestamps: {[parse_action(a, video_start_ts)['ts'] for a in action_index.records[-5:]]}")
+
+    if mode == "encode":
+        total_dur = _open_clip(str(video_path)).duration
+        if workers > 1:
+            _close_clips()  # don't hand the open ffmpeg reader to forked workers
+    else:
+        total, fps, _ = probe_video(str(video_path))
+        total_dur = total / fps
+    codec = video_codec(str(video_path)) or "unknown"
 
-        cur_start = cur_end
-        idx += 1
+    # If video_start_ts is provided, chunk times are absolute epoch seconds
+    if video_start_ts is not None:
+        abs_start = video_start_ts
+    else:
+        abs_start = 0.0
+    abs_end = abs_start + total_dur
+    if segmentation is None:
+        bounds = chunk_bounds(abs_start, abs_end, chunk_duration)
+    else:
+        with timer("segment"):
+            bounds, active = adaptive_chunk_bounds(
+                str(video_path), open_session_audio(str(audio_path), start_ts=video_start_ts or 0.0),
+                action_index, abs_start, abs_end, chunk_duration, **segmentation)
+        print(f"[INFO] Adaptive segmentation: {len(bounds)} chunks instead of "
+              f"{len(chunk_bounds(abs_start, abs_end, chunk_duration))}, {active.mean():.0%} of the session active")
+    rel_bounds = [(s - abs_start, e - abs_start) for s, e in bounds]
+
+    if audio_backend == "slice":
+        # one pass over the session audio, before any workers fork so they inherit it
+        load_envelope(open_session_audio(str(audio_path), start_ts=video_start_ts or 0.0))
+
+    if mode == "stream":
+        # the meter and the clock see every decoded frame of the window, not just the sampled ones
+        meter, clock = MotionMeter(), FrameClock()
+        windows = iter_video_windows(str(video_path), rel_bounds, max_frames=12,
+                                     target_size=frame_size, meter=meter, clock=clock)
+    else:
+        windows = None
+
+    def window():
+        if windows is None:
+            return None, None, None
+        with timer("decode"):
+            frames = next(windows)
+        count("frames_decoded", clock.frames)
+        count("dropped_frames", clock.dropped)
+        return frames, meter.value, clock.dropped
+
+    def jobs():
+        for idx, (b, rb) in enumerate(zip(bounds, rel_bounds)):
+            frames, motion, dropped = window()
+            yield chunk_job(
+                idx, b, rb, video_path, audio_path, out_dir, video_start_ts,
+                window_actions_for(action_index, b[0], b[1], video_start_ts),
+                window=frames, motion=motion, dropped_frames=dropped, codec=codec, mode=mode,
+                write_chunks=write_chunks, audio_backend=audio_backend, write_audio=write_audio,
+                frame_size=frame_size, flow=flow, game_profile=game_profile, keep_seed=seeds is not None,
+                profile=((out_dir / f"profile_chunk_{idx:04d}.{'prof' if profiler == 'cprofile' else 'html'}", profiler)
+                         if idx == profile_chunk else None),
+            )
+
+    if workers > 1:
+        results = _run_pool(jobs(), workers)
+    else:
+        results = (process_chunk(job) for job in jobs())
+
+    chunks, failures = [], []
+    metrics = current()
+    for res in results:
+        metrics.merge(res.get("metrics", {}))
+        if res["ok"]:
+            chunks.append(res["chunk"])
+            metrics.count("chunks")
+            if seeds is not None:
+                seeds(res["seed"])
+        else:
+            failures.append(res["failure"])
+            metrics.count("chunk_failures")
+            if on_failure is not None:
+                on_failure(res["failure"])
+            print(f"[WARN] Chunk {res['failure']['chunk_index']} failed: {res['failure']['error']}")
+
+    _close_clips()
+    if failures:
+        failures_path = out_dir / "chunk_failures.json"
+        with open(failures_path, "w") as ff:
+            json.dump(failures, ff, indent=2)
+        print(f"[WARN] {len(failures)} chunk(s) failed → {failures_path}")
+    return chunks
 
-    video.close()
+_CACHED_SEEDS = "seeds.jsonl"
+
+def _rebase_seed(seed, out_dir):
+    # a cached seed as if it had been emitted into out_dir
+    seed["video_path"] = str(out_dir / Path(seed["video_path"]).name)
+    seed["audio_path"] = str(out_dir / Path(seed["audio_path"]).name)
+    seed["session_id"] = out_dir.name
+    seed["event_uid"] = make_event_uid(out_dir.name, seed["video_path"], seed["start"], seed["end"])
+    return seed
+
+def _cut_chunk_media(chunk, video_path, audio_path, video_start_ts, mode="stream", write_chunks="copy",
+                     audio_backend="slice", write_audio=True, **_):
+    # the chunk's .mp4/.wav as the chunker writes them, without decoding for the seed
+    rel_start, rel_end = chunk["start"] - (video_start_ts or 0.0), chunk["end"] - (video_start_ts or 0.0)
+    vid_out, aud_out = Path(chunk["video_path"]), Path(chunk["audio_path"])
+    if mode == "encode":
+        with timer("encode"):
+            _open_clip(str(video_path)).subclipped(rel_start, rel_end).write_videofile(
+                str(vid_out), codec="libx264", audio=False, logger=None
+            )
+    elif write_chunks == "copy":
+        with timer("ffmpeg_split"):
+            split_media_ffmpeg(Path(video_path), rel_start, rel_end, vid_out, is_video=True, seek_input=True)
+    if audio_backend != "slice":
+        with timer("ffmpeg_split"):
+            split_media_ffmpeg(Path(audio_path), rel_start, rel_end, aud_out, is_video=False)
+    elif write_audio:
+        with timer("audio_slice"):
+            open_session_audio(str(audio_path), start_ts=video_start_ts or 0.0).write_wav(aud_out, rel_start, rel_end)
+
+def chunk_with_cache(cache, video_path, audio_path, action_log_path=ACTION_LOG, chunk_duration=2.0,
+                     output_dir="chunks", video_start_ts=None, seeds=None, cache_media=False, **options):
+    """
+    chunk_video_audio_with_actions through a stage_cache.StageCache (None runs it
+    uncached). The key covers the video/audio/action contents, chunk_duration,
+    video_start_ts, the options except `workers`, and the chunking code. On a hit the
+    chunk records are rebased onto output_dir and the stored seeds replayed into `seeds`
+    (rebased the same way); no video is decoded. Entries keep the records and seeds only,
+    and a hit cuts the chunk .mp4/.wav files from the inputs again (stream copy and wav
+    slices by default). With cache_media=True the media files are stored as well and
+    cloned back instead; that is a full copy on filesystems without reflinks.
+    Sessions with failed chunks are not stored.
+    """
+    def run(on_failure=None, seeds=seeds):
+        return chunk_video_audio_with_actions(video_path, audio_path, action_log_path, chunk_duration,
+                                              output_dir, video_start_ts, on_failure=on_failure,
+                                              seeds=seeds, **options)
+    if cache is None:
+        return run()
+    out_dir = Path(output_dir)
+    # none of these change the chunks
+    params = {k: v for k, v in options.items() if k not in ("workers", "profile_chunk", "profiler")}
+    params.update(chunk_duration=chunk_duration, video_start_ts=video_start_ts)
+    # the profile's tables rather than its name or path, so editing them invalidates the chunks
+    params["game_profile"] = load_profile(params.get("game_profile", "default"))
+    key = cache.key("chunks", [video_path, audio_path, action_log_path], params,
+                    code_version(chunk_video_audio_with_actions))
+    hit = cache.get("chunks", key)
+    if hit is not None:
+        entry, data = hit
+        out_dir.mkdir(parents=True, exist_ok=True)
+        for name in data["files"]:
+            cache.restore(entry, name, out_dir / name)
+        chunks = data["chunks"]
+        for chunk in chunks:
+            chunk["video_path"] = str(out_dir / chunk["video_path"])
+            chunk["audio_path"] = str(out_dir / chunk["audio_path"])
+            if not data["files"]:
+                _cut_chunk_media(chunk, video_path, audio_path, video_start_ts, **options)
+        if seeds is not None:
+            for seed in read_seeds(entry / _CACHED_SEEDS):
+                seeds(_rebase_seed(seed, out_dir))
+        count("cache_hits")
+        print(f"[INFO] Reused {len(chunks)} cached chunks ({key[:12]}) → {out_dir}")
+        return chunks
+    failures, emitted = [], []
+    def keep(seed):
+        emitted.append(EventSeed.from_dict(seed).compact())  # held until the entry is stored
+        if seeds is not None:
+            seeds(seed)
+    chunks = run(failures.append, keep)
+    if not failures:
+        # chunk media always sits in output_dir, so records keep just the file names
+        stored = [{**c, "video_path": Path(c["video_path"]).name, "audio_path": Path(c["audio_path"]).name}
+                  for c in chunks]
+        files = {name: out_dir / name for c in stored for name in (c["video_path"], c["audio_path"])
+                 if cache_media and (out_dir / name).exists()}
+        cache.put("chunks", key, {"chunks": stored, "files": sorted(files)},
+                  {**files, _CACHED_SEEDS: lambda dst: dump_seeds(dst, (s.to_dict() for s in emitted))})
     return chunks
 
 
-if __name__ == "__main__":
-    import argparse, json, datetime, shutil, sys, re, time as time_mod
+def add_segmentation_args(parser):
+    parser.add_argument("--segmentation", choices=["fixed", "adaptive"], default="fixed",
+                        help="fixed: --duration windows; adaptive: merge idle spans, cut active ones at --duration")
+    parser.add_argument("--min_duration", type=float, default=SEGMENT_DEFAULTS["min_duration"],
+                        help="Adaptive: shortest chunk (s)")
+    parser.add_argument("--max_duration", type=float, default=SEGMENT_DEFAULTS["max_duration"],
+                        help="Adaptive: longest (idle) chunk (s)")
+    parser.add_argument("--motion_threshold", type=float, default=SEGMENT_DEFAULTS["motion_threshold"],
+                        help="Adaptive: mean grey-level change per step that counts as activity")
+    parser.add_argument("--audio_threshold", type=float, default=SEGMENT_DEFAULTS["audio_threshold"],
+                        help="Adaptive: RMS above the session median that counts as activity")
+
+def segmentation_from_args(args):
+    # the chunker's segmentation option for add_segmentation_args' flags
+    if args.segmentation == "fixed":
+        return None
+    return {"min_duration": args.min_duration, "max_duration": args.max_duration,
+            "motion_threshold": args.motion_threshold, "audio_threshold": args.audio_threshold}
+
+def cli(argv=None):
+    import argparse, sys, time as time_mod
 
     parser = argparse.ArgumentParser(
         description="Aethermind Perception Pipeline: chunk video/audio/actions and run event detection."
@@ -231,36 +725,54 @@ if __name__ == "__main__":
     parser.add_argument("--out", default="chunks", help="Main output directory")
     parser.add_argument("--video_start_ts", type=float, default=None,
                         help="Epoch seconds of video start (for timestamp normalization)")
-    args = parser.parse_args()
+    parser.add_argument("--mode", choices=["stream", "encode"], default="stream",
+                        help="stream: decode the source once; encode: re-encode every chunk with libx264 (legacy)")
+    parser.add_argument("--write_chunks", choices=["copy", "none"], default="copy",
+                        help="Stream mode only: stream-copy chunk .mp4 files, or skip writing them")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Process chunks in parallel over N worker processes")
+    parser.add_argument("--audio_backend", choices=["slice", "ffmpeg"], default="slice",
+                        help="slice: map the session wav once and slice it; ffmpeg: one ffmpeg process per chunk")
+    parser.add_argument("--no_audio_chunks", action="store_true",
+                        help="With --audio_backend slice: don't write chunk .wav files")
+    parser.add_argument("--frame_size", type=str, default=None,
+                        help="Downscale sampled frames to WIDTHxHEIGHT before flow (e.g. 640x360)")
+    parser.add_argument("--flow", choices=FLOW_METHODS, default="farneback",
+                        help="Motion estimator for video_dyn: dense Farneback, sparse LK, or frame differencing")
+    parser.add_argument("--flow_scale", type=float, default=1.0,
+                        help="Downscale factor applied before flow (e.g. 0.5); magnitudes stay in source pixels")
+    parser.add_argument("--flow_roi", type=str, default=None,
+                        help="Only estimate flow inside X,Y,W,H (source pixels)")
+    parser.add_argument("--cache", type=str, default=None,
+                        help=f"Stage cache folder (default: <out>/{CACHE_DIRNAME})")
+    parser.add_argument("--no_cache", action="store_true", help="Always recompute the chunks")
+    parser.add_argument("--cache_media", action="store_true",
+                        help="Also keep the chunk .mp4/.wav files in the cache instead of cutting them again on a hit")
+    parser.add_argument("--profile_chunk", type=int, default=None,
+                        help="Profile this chunk's processing into the output folder (with --no_cache)")
+    parser.add_argument("--profiler", choices=PROFILERS, default="cprofile")
+    parser.add_argument("--seeds", choices=[*SEED_FORMATS, "none"], default="jsonl",
+                        help="Write the EventSeeds to seeds.jsonl, seeds.msgpack, or not at all")
+    parser.add_argument("--seed_fsync", choices=FSYNC_POLICIES, default="close",
+                        help="When the seeds file is fsynced: never, once at the end, or after every batch")
+    parser.add_argument("--seed_batch", type=int, default=64, help="Seeds per write")
+    parser.add_argument("--game_profile", default="default",
+                        help=f"Key/button → semantic action tables: {', '.join(PROFILES)}, or a .json file")
+    add_segmentation_args(parser)
+    args = parser.parse_args(argv)
 
     # Determine input files
-    session_json = None
-    session_start_ts = None
     if args.folder:
-        folder = Path(args.folder)
-        files = list(folder.iterdir())
-        video = args.video or next((str(f) for f in files if f.suffix.lower() == ".mp4"), None)
-        audio = args.audio or next((str(f) for f in files if f.suffix.lower() == ".wav"), None)
-        actions = args.actions or next((str(f) for f in files if f.name.endswith("actions.jsonl")), None)
-        session_json_path = next((f for f in files if f.name == "session.json"), None)
-        if session_json_path:
-            with open(session_json_path, "r") as sjf:
-                session_json = json.load(sjf)
-            # Parse start_time string to epoch seconds
-            start_time_str = session_json.get("start_time")
-            if start_time_str:
-                # Example: "2025-08-01_20-12-27"
-                dt_match = re.match(r"(\d{4})-(\d{2})-(\d{2})_(\d{2})-(\d{2})-(\d{2})", start_time_str)
-                if dt_match:
-                    dt_obj = datetime.datetime(
-                        int(dt_match.group(1)), int(dt_match.group(2)), int(dt_match.group(3)),
-                        int(dt_match.group(4)), int(dt_match.group(5)), int(dt_match.group(6))
-                    )
-                    session_start_ts = int(dt_obj.replace(tzinfo=datetime.timezone.utc).timestamp())
+        found = find_session_inputs(args.folder, args.video, args.audio, args.actions)
+        video, audio, actions = found["video"], found["audio"], found["actions"]
+        session_json, session_json_path = found["session_json"], found["session_json_path"]
+        session_start_ts = found["start_ts"]
         if not video or not audio:
             print("[ERROR] Could not find .mp4 and .wav in folder or via arguments.")
             sys.exit(1)
     else:
+        session_json = None
+        session_start_ts = None
         video = args.video
         audio = args.audio
         actions = args.actions
@@ -273,35 +785,62 @@ if __name__ == "__main__":
     # Apply 4-hour offset to correct for UTC/local mismatch if session_start_ts is used
     if video_start_ts is not None and args.video_start_ts is None:
         print("[INFO] Applying +4 hour (14400s) offset to session start time for UTC/local correction.")
-        video_start_ts += 14400 # this might need to be adjusted as there's an issue with absolute time between session.json and the actions.jsonl timestamps
+        video_start_ts += SESSION_CLOCK_OFFSET
 
     # Create timestamped output subfolder
     dt_str = datetime.datetime.now().strftime("session_%Y%m%d_%H%M%S")
     out_dir = Path(args.out) / dt_str
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    # Copy input files for provenance
-    shutil.copy(video, out_dir / Path(video).name)
-    shutil.copy(audio, out_dir / Path(audio).name)
+    # Link input files for provenance (hardlinks; the pipeline never writes to them)
+    link_input(video, out_dir / Path(video).name)
+    link_input(audio, out_dir / Path(audio).name)
     if actions:
-        shutil.copy(actions, out_dir / Path(actions).name)
+        link_input(actions, out_dir / Path(actions).name)
     if session_json:
-        shutil.copy(str(session_json_path), out_dir / Path(session_json_path).name)
+        link_input(str(session_json_path), out_dir / Path(session_json_path).name)
 
     # Use copied files as input
     video_in = str(out_dir / Path(video).name)
     audio_in = str(out_dir / Path(audio).name)
     actions_in = str(out_dir / Path(actions).name) if actions else ACTION_LOG
 
-    # Run chunking
-    chunks = chunk_video_audio_with_actions(
-        video_in,
-        audio_in,
-        actions_in,
-        args.duration,
-        str(out_dir),
-        video_start_ts
-    )
+    # Run chunking (reused from the stage cache when inputs, settings and code are unchanged)
+    cache = None if args.no_cache else StageCache(args.cache or Path(args.out) / CACHE_DIRNAME)
+    metrics = Metrics()  # timers and counters of the run → metrics.json
+    run_start = time_mod.perf_counter()
+    sink = (SeedSink(out_dir / SEED_FORMATS[args.seeds], batch=args.seed_batch, fsync=args.seed_fsync)
+            if args.seeds != "none" else None)
+    with use_metrics(metrics):
+        chunks = chunk_with_cache(
+            cache,
+            video_in,
+            audio_in,
+            actions_in,
+            args.duration,
+            str(out_dir),
+            video_start_ts,
+            mode=args.mode,
+            write_chunks=args.write_chunks,
+            workers=args.workers,
+            audio_backend=args.audio_backend,
+            write_audio=not args.no_audio_chunks,
+            frame_size=tuple(int(v) for v in args.frame_size.lower().split("x")) if args.frame_size else None,
+            flow={
+                "method": args.flow,
+                "scale": args.flow_scale,
+                "roi": tuple(int(v) for v in args.flow_roi.split(",")) if args.flow_roi else None,
+            },
+            profile_chunk=args.profile_chunk,
+            profiler=args.profiler,
+            seeds=sink,
+            game_profile=args.game_profile,
+            segmentation=segmentation_from_args(args),
+            cache_media=args.cache_media,
+        )
+        if sink is not None:
+            sink.close()
+            print(f"Wrote {sink.count} EventSeeds → {sink.path}")
 
     # No need to adjust chunk start/end here; already absolute in chunk_video_audio_with_actions
 
@@ -312,11 +851,9 @@ if __name__ == "__main__":
     print(f"Generated {len(chunks)} chunks → {rel_path}")
 
     # Build session.json for event_detector
-    session_manifest = {}
-    if session_json:
-        session_manifest.update(session_json)
-    session_manifest['chunks'] = chunks
-    # session_manifest['seeds_path'] = str(out_dir / "seeds.jsonl")
+    session_manifest = build_session_manifest(session_json, chunks, video_in, audio_in, video_start_ts)
+    if sink is not None:
+        session_manifest["seeds_path"] = str(sink.path)
     session_path = out_dir / "session.json"
     with open(session_path, "w") as sf:
         json.dump(session_manifest, sf, indent=2)
@@ -326,7 +863,15 @@ if __name__ == "__main__":
     try:
         from event_detector import detect_events
         print(f"Running event detection on {out_dir} ...")
-        events = detect_events(str(out_dir))
+        with use_metrics(metrics):
+            events = detect_events(str(out_dir))
         print(f"Event detection complete. {len(events)} events detected.")
     except ImportError:
         print("[WARN] event_detector not found, skipping event detection.")
+
+    metrics_path = out_dir / "metrics.json"
+    metrics.write(metrics_path, session=out_dir.name, wall_s=time_mod.perf_counter() - run_start)
+    print(f"Wrote run metrics → {metrics_path}")
+
+if __name__ == "__main__":
+    cli()
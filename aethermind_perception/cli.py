@@ -0,0 +1,65 @@
+# cli.py
+"""
+One command line for the perception entry points:
+
+    python aethermind_perception/cli.py <command> [options]
+    python aethermind_perception/cli.py <command> --help
+
+Each command is the cli() of the module that implements it, and that module (with
+whatever it imports) is only loaded once the command is picked, so `--help` starts
+without numpy. OpenCV is only loaded once a command opens a video.
+Running a module directly (python chunker.py ...) still works the same.
+"""
+import importlib
+import sys
+from pathlib import Path
+
+_SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+
+# command -> (module, help); modules outside this folder are looked up in scripts/
+COMMANDS = {
+    "session": ("session_pipeline", "Run the whole pipeline on a session folder, in one process"),
+    "batch": ("batch_runner", "Run the pipeline over a folder of sessions"),
+    "chunk": ("chunker", "Chunk a session and emit EventSeeds (timestamped output folder)"),
+    "events": ("event_detector", "Score a chunker output folder into session_events.json"),
+    "vectors": ("stream_to_vectors", "Vectorize a session folder into vector_windows.vec"),
+    "merge": ("add_vectors_to_events", "Attach vectors to chunk events"),
+    "live": ("live_capture", "Follow a recording in progress and emit seeds per chunk"),
+    "store": ("vector_store", "Inspect or export a vector store"),
+}
+
+def usage():
+    width = max(map(len, COMMANDS))
+    lines = [f"usage: {Path(sys.argv[0]).name} <command> [options]", "", "commands:"]
+    lines += [f"  {name:<{width}}  {text}" for name, (_, text) in COMMANDS.items()]
+    lines += ["", "<command> --help shows the command's options."]
+    return "\n".join(lines)
+
+def load(command):
+    """
+    The module implementing `command`, imported on first use.
+    """
+    module = COMMANDS[command][0]
+    if not (Path(__file__).resolve().parent / f"{module}.py").exists() and str(_SCRIPTS_DIR) not in sys.path:
+        sys.path.append(str(_SCRIPTS_DIR))
+    return importlib.import_module(module)
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return 0 if argv else 2
+    command, rest = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"unknown command: {command}\n\n{usage()}", file=sys.stderr)
+        return 2
+    argv0 = sys.argv[0]
+    sys.argv[0] = f"{Path(argv0).name} {command}"  # argparse's prog, so usage names the command
+    try:
+        load(command).cli(rest)
+    finally:
+        sys.argv[0] = argv0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
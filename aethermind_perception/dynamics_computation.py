@@ -1,21 +1,127 @@
 # dynamics_computation.py
-import numpy as np, cv2, librosa
-def compute_optical_flow(video_frames, frame_idx_start=0):
+import numpy as np
+from functools import lru_cache
+
+FLOW_METHODS = ("farneback", "lk", "diff")
+
+class FlowEngine:
+    """
+    Frame-pair motion estimator behind compute_optical_flow.
+      method: "farneback" dense flow (default), "lk" sparse Lucas-Kanade on up to
+              max_corners tracked corners, or "diff" mean absolute grey-level frame
+              difference (a motion proxy in intensity units, not pixels).
+      scale:  resize factor applied before estimation (0.5 = half width and height);
+              flow magnitudes are reported back in full-resolution pixels.
+      roi:    optional (x, y, w, h) in full-resolution pixels; only that region is used.
+    Grey, resize, flow and magnitude buffers are allocated once per frame size and reused.
+    Accuracy vs. speed on synthetic clips: benchmarks/README.md.
+    """
+    def __init__(self, method="farneback", scale=1.0, roi=None, max_corners=200):
+        if method not in FLOW_METHODS:
+            raise ValueError(f"unknown flow method: {method}")
+        if not 0.0 < scale <= 1.0:
+            raise ValueError(f"flow scale must be in (0, 1]: {scale}")
+        self.method, self.scale, self.roi, self.max_corners = method, float(scale), roi, max_corners
+        self._shape = None
+
+    def _alloc(self, shape):
+        h, w = shape
+        x, y, rw, rh = self.roi if self.roi else (0, 0, w, h)
+        x, y = min(max(0, x), w - 1), min(max(0, y), h - 1)
+        self._crop = (slice(y, y + max(1, min(rh, h - y))), slice(x, x + max(1, min(rw, w - x))))
+        ch, cw = self._crop[0].stop - y, self._crop[1].stop - x
+        sh, sw = max(1, int(round(ch * self.scale))), max(1, int(round(cw * self.scale)))
+        self._direct = (sh, sw) == (h, w)
+        self._gray = np.empty((h, w), np.uint8)
+        self._small = [np.empty((sh, sw), np.uint8) for _ in range(2)]
+        self._flow = np.zeros((sh, sw, 2), np.float32)
+        self._fx, self._fy, self._mag = (np.empty((sh, sw), np.float32) for _ in range(3))
+        self._diff = np.empty((sh, sw), np.uint8)
+        self._shape = shape
+
+    def prepare(self, frame, slot):
+        # BGR frame → grey → ROI → downscaled, written into reusable buffer `slot` (0 or 1)
+        import cv2
+        if frame.shape[:2] != self._shape:
+            self._alloc(frame.shape[:2])
+        out = self._small[slot]
+        if self._direct:
+            if frame.ndim == 3:
+                cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, out)
+            else:
+                np.copyto(out, frame)
+            return out
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, self._gray) if frame.ndim == 3 else frame
+        crop = gray[self._crop]
+        if crop.shape == out.shape:
+            np.copyto(out, crop)
+        else:
+            cv2.resize(crop, (out.shape[1], out.shape[0]), out, interpolation=cv2.INTER_AREA)
+        return out
+
+    def magnitude(self, prev, nxt):
+        # mean motion between two prepared frames
+        import cv2
+        if self.method == "farneback":
+            cv2.calcOpticalFlowFarneback(prev, nxt, self._flow, 0.5, 3, 15, 3, 5, 1.2, 0)
+            cv2.split(self._flow, [self._fx, self._fy])
+            cv2.magnitude(self._fx, self._fy, self._mag)
+            return float(self._mag.mean()) / self.scale
+        if self.method == "lk":
+            pts = cv2.goodFeaturesToTrack(prev, self.max_corners, 0.01, 7)
+            if pts is None:
+                return 0.0
+            moved, status, _ = cv2.calcOpticalFlowPyrLK(prev, nxt, pts, None)
+            ok = status[:, 0] == 1
+            if not ok.any():
+                return 0.0
+            d = (moved - pts)[ok].reshape(-1, 2)
+            return float(np.sqrt((d * d).sum(axis=1)).mean()) / self.scale
+        cv2.absdiff(prev, nxt, self._diff)
+        return float(self._diff.mean())
+
+@lru_cache(maxsize=None)
+def get_flow_engine(method="farneback", scale=1.0, roi=None):
+    # one engine (and one set of buffers) per configuration per process
+    return FlowEngine(method=method, scale=scale, roi=tuple(roi) if roi else None)
+
+def compute_optical_flow(video_frames, frame_idx_start=0, engine=None):
+    engine = engine or get_flow_engine()
     if len(video_frames) < 2:
         return {"flow_mean": 0.0, "flow_std": 0.0, "cut_prob": 0.0,
-                "frame_idx_start": frame_idx_start, "frame_idx_end": frame_idx_start}
+                "frame_idx_start": frame_idx_start, "frame_idx_end": frame_idx_start,
+                "flow_method": engine.method}
     mags = []
-    prev = cv2.cvtColor(video_frames[0], cv2.COLOR_BGR2GRAY)
+    prev = engine.prepare(video_frames[0], 0)
     for i in range(1, len(video_frames)):
-        nxt = cv2.cvtColor(video_frames[i], cv2.COLOR_BGR2GRAY)
-        flow = cv2.calcOpticalFlowFarneback(prev, nxt, None, 0.5, 3, 15, 3, 5, 1.2, 0)
-        mag = np.sqrt(flow[...,0]**2 + flow[...,1]**2)
-        mags.append(mag.mean()); prev = nxt
+        nxt = engine.prepare(video_frames[i], i % 2)
+        mags.append(engine.magnitude(prev, nxt)); prev = nxt
     return {"flow_mean": float(np.mean(mags)), "flow_std": float(np.std(mags)),
             "cut_prob": 0.0, "frame_idx_start": frame_idx_start,
-            "frame_idx_end": frame_idx_start + len(video_frames)-1}
+            "frame_idx_end": frame_idx_start + len(video_frames)-1,
+            "flow_method": engine.method}
 
-def compute_audio_rms(audio_path, frame_len=2048, hop_len=1024):
-    y, sr = librosa.load(audio_path, sr=None, mono=True)
-    rms = librosa.feature.rms(y=y, frame_length=frame_len, hop_length=hop_len)[0]
+def rms_frames(y, frame_len=2048, hop_len=1024):
+    # librosa.feature.rms(y=y, frame_length, hop_length)[0]: centred frames, zero padded,
+    # from running sums of squares (librosa's first call costs seconds of numba/scipy import)
+    y = np.asarray(y, dtype=np.float64)
+    pad = frame_len // 2
+    c2 = np.concatenate([[0.0], np.cumsum(np.pad(y * y, pad))])
+    starts = np.arange(1 + max(0, len(y) + 2 * pad - frame_len) // hop_len) * hop_len
+    power = np.maximum(c2[starts + frame_len] - c2[starts], 0.0) / frame_len
+    return np.sqrt(power).astype(np.float32)
+
+def compute_audio_rms(audio_path, frame_len=2048, hop_len=1024, samples=None, sr=None):
+    # samples/sr: mono float window already in memory (skips reading audio_path)
+    if samples is None:
+        import librosa  # only to decode a file; loaded on first use
+        y, sr = librosa.load(audio_path, sr=None, mono=True)
+    else:
+        y = samples
+    rms = rms_frames(y, frame_len, hop_len)
     return {"rms_frames": rms.astype(float).tolist(), "sr": int(sr)}
+
+def rms_from_envelope(envelope, a0, a1):
+    # compute_audio_rms for samples [a0, a1), sliced from the session-wide envelope
+    # (frame_len = 2*hop); frames sit on the session's hop grid rather than the chunk's
+    return {"rms_frames": envelope.rms_frames(a0, a1).astype(float).tolist(), "sr": int(envelope.sr)}
@@ -0,0 +1,169 @@
+# embedders.py
+"""
+Batched window embedders for stream_to_vectors.
+
+A video embedder has prepare(frames), run per window on the decode thread to reduce
+the window's BGR frames to model input, and embed(prepared), run on a list of those;
+an audio embedder has embed(audio, ranges) over a SessionAudio and a list of sample
+ranges. embed returns a (batch, dim) array and `labels` names the dims.
+stream_to_vectors feeds them `batch_size` windows at a time from a decode thread
+(`prefetch`), so a real model (CLIP, VGGish, ...) runs once per batch, not per window,
+and whatever `dim` it has goes straight into the vector store.
+
+  video  "mean_rgb"    mean colour of the window's frames (dim 3, the original stub)
+         "projection"  NumPy stand-in for a learned model: mean of the frames at
+                       size x size, through a fixed random projection, L2-normalized
+  audio  "mean_std"    mean and std of the samples (dim 2, the original stub), from the
+                       session envelope without converting the window
+         "spectrum"    NumPy stand-in: log band energies of the window's spectrum
+"""
+import queue
+import threading
+from functools import lru_cache
+import numpy as np
+from audio_envelope import load_envelope
+
+VIDEO_EMBEDDERS = ("mean_rgb", "projection")
+AUDIO_EMBEDDERS = ("mean_std", "spectrum")
+
+class MeanRGBEmbedder:
+    dim = 3
+    labels = ("video_r", "video_g", "video_b")
+
+    def prepare(self, frames):
+        if not frames:
+            return np.zeros(self.dim)
+        return np.stack([f.mean(axis=(0, 1)) for f in frames]).mean(axis=0)
+
+    def embed(self, prepared):
+        return np.stack(prepared).reshape(len(prepared), self.dim)
+
+class ProjectionEmbedder:
+    """
+    prepare: the window's frames averaged at size x size in [0, 1] (zeros if empty);
+    embed: one (batch, size*size*3) @ (size*size*3, dim) product, rows L2-normalized.
+    """
+    def __init__(self, dim=512, size=32, seed=0):
+        self.dim, self.size = int(dim), int(size)
+        self.labels = tuple(f"video_{j}" for j in range(self.dim))
+        rng = np.random.default_rng(seed)
+        self.weights = (rng.standard_normal((self.size * self.size * 3, self.dim))
+                        / np.sqrt(self.size * self.size * 3)).astype(np.float32)
+
+    def prepare(self, frames):
+        import cv2
+        acc = np.zeros((self.size, self.size, 3), np.float32)
+        small = np.empty((self.size, self.size, 3), np.uint8)
+        for f in frames:
+            cv2.resize(f, (self.size, self.size), small, interpolation=cv2.INTER_AREA)
+            acc += small
+        return (acc / (255.0 * max(1, len(frames)))).ravel()
+
+    def embed(self, prepared):
+        out = np.stack(prepared) @ self.weights
+        norm = np.linalg.norm(out, axis=1, keepdims=True)
+        return np.divide(out, norm, out=np.zeros_like(out), where=norm > 0)
+
+class MeanStdEmbedder:
+    dim = 2
+    labels = ("audio_mean", "audio_std")
+
+    def embed(self, audio, ranges):
+        env = load_envelope(audio)
+        return np.array([env.mean_std(a0, a1) for a0, a1 in ranges]).reshape(len(ranges), self.dim)
+
+class SpectrumEmbedder:
+    """
+    Mono window zero-padded to the longest in the batch, one batched rfft, log mean
+    power in `dim` log-spaced bands.
+    """
+    def __init__(self, dim=64):
+        self.dim = int(dim)
+        self.labels = tuple(f"audio_{j}" for j in range(self.dim))
+
+    def embed(self, audio, ranges):
+        n = max((a1 - a0 for a0, a1 in ranges), default=0)
+        if n < 2:
+            return np.zeros((len(ranges), self.dim))
+        x = np.zeros((len(ranges), n))
+        for k, (a0, a1) in enumerate(ranges):
+            x[k, :a1 - a0] = audio.float_samples(a0, a1).mean(axis=1)
+        power = np.abs(np.fft.rfft(x, axis=1)) ** 2
+        edges = np.unique(np.geomspace(1, power.shape[1], self.dim + 1).astype(int))
+        bands = np.add.reduceat(power, edges[:-1], axis=1) / np.diff(edges)
+        out = np.zeros((len(ranges), self.dim))
+        out[:, :bands.shape[1]] = np.log1p(bands)
+        return out
+
+@lru_cache(maxsize=None)
+def get_video_embedder(name="mean_rgb", dim=None):
+    # one embedder (and its weights) per configuration per process
+    if name == "mean_rgb":
+        return MeanRGBEmbedder()
+    if name == "projection":
+        return ProjectionEmbedder(dim=dim or 512)
+    raise ValueError(f"unknown video embedder: {name}")
+
+@lru_cache(maxsize=None)
+def get_audio_embedder(name="mean_std", dim=None):
+    if name == "mean_std":
+        return MeanStdEmbedder()
+    if name == "spectrum":
+        return SpectrumEmbedder(dim=dim or 64)
+    raise ValueError(f"unknown audio embedder: {name}")
+
+def prefetch(items, depth=2):
+    """
+    Iterate `items` on a background thread, keeping up to `depth` ready ahead of the
+    consumer (OpenCV and NumPy release the GIL while decoding/computing). Exceptions
+    from the producer are re-raised in the consumer.
+    """
+    q = queue.Queue(maxsize=max(1, depth))
+    done = object()
+    stop = threading.Event()
+
+    def put(entry):
+        # give up once the consumer has gone away
+        while not stop.is_set():
+            try:
+                q.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except BaseException as e:
+            put((done, e))
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, err = q.get()
+            if item is done:
+                if err is not None:
+                    raise err
+                return
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+def batched(items, size):
+    """
+    Lists of up to `size` consecutive items.
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -1,9 +1,12 @@
 import numpy as np
 import wave
 import contextlib
-import cv2
 from pathlib import Path
 import json
+from collections import deque
+from session_audio import open_session_audio, pcm16_rms
+from audio_envelope import load_envelope
+from metrics import timer
 
 def compute_video_motion(video_path):
     """
@@ -11,63 +14,44 @@ def compute_video_motion(video_path):
     - For each pair of consecutive frames, compute the mean absolute pixel difference (grayscale).
     - The final score is the mean of all these frame-to-frame differences.
     - Higher values indicate more motion.
+    The chunker measures the same score while decoding (video_stream.MotionMeter) and
+    stores it as raw_motion; this is the fallback for chunks that don't have it.
     """
+    import cv2
+    from video_stream import MotionMeter
     cap = cv2.VideoCapture(str(video_path))
-    ret, prev = cap.read()
-    diffs = []
-    while ret:
+    meter = MotionMeter()
+    while True:
         ret, frame = cap.read()
         if not ret: break
-        diff = cv2.absdiff(cv2.cvtColor(prev, cv2.COLOR_BGR2GRAY),
-                           cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
-        diffs.append(np.mean(diff))
-        prev = frame
+        meter.add(frame)
     cap.release()
-    return float(np.mean(diffs)) if diffs else 0.0
+    return meter.value
 
 def compute_audio_energy(audio_path):
     """
     Return RMS (root mean square) energy of the audio chunk.
     - Reads all audio samples as int16.
-    - Computes sqrt(mean(sample^2)) over the chunk.
+    - Computes sqrt(mean(sample^2)) over the chunk (squared in float64, int16 would overflow).
     - Higher values indicate louder audio.
     """
     with contextlib.closing(wave.open(str(audio_path),'r')) as wf:
         frames = wf.readframes(wf.getnframes())
         data = np.frombuffer(frames, dtype=np.int16)
-        return float(np.sqrt(np.mean(data**2))) if data.size else 0.0
+        return pcm16_rms(data)
 
-def detect_events(session_dir, output_path=None):
+def score_events(events, motion_weight=0.6, energy_weight=0.4, threshold=0.3):
     """
-    Event detection pipeline:
-    - Loads session.json to get all chunk metadata.
-    - For each chunk:
-        - Computes video motion (see compute_video_motion).
-        - Computes audio energy (see compute_audio_energy).
+    Normalization/scoring pass over chunk records that already carry raw_motion and
+    raw_energy (updated in place and returned):
     - Normalizes motion and energy across all chunks to [0, 1] range.
     - Calculates 'event_score' as a weighted sum: 0.6*motion + 0.4*energy.
     - Sets 'is_event' True if event_score > 0.3 (example threshold).
-    - Writes results to session_events.json.
     """
-    session_dir = Path(session_dir)
-    manifest = json.loads((session_dir / "session.json").read_text())
-    events = []
-    motion_vals, energy_vals = [], []
-
-    # First pass: gather raw metrics for each chunk
-    for c in manifest["chunks"]:
-        mp = session_dir / Path(c["video_path"]).name
-        ap = session_dir / Path(c["audio_path"]).name
-        # Compute mean frame-to-frame motion for this chunk
-        m = compute_video_motion(mp)
-        # Compute RMS audio energy for this chunk
-        e = compute_audio_energy(ap)
-        motion_vals.append(m)
-        energy_vals.append(e)
-        # Store raw metrics in the event record
-        events.append({**c, "raw_motion": m, "raw_energy": e})
-
-    # Normalize and score
+    if not events:
+        return events
+    motion_vals = [ev["raw_motion"] for ev in events]
+    energy_vals = [ev["raw_energy"] for ev in events]
     m_min, m_max = min(motion_vals), max(motion_vals)
     e_min, e_max = min(energy_vals), max(energy_vals)
     for ev in events:
@@ -75,11 +59,168 @@ def detect_events(session_dir, output_path=None):
         m = (ev["raw_motion"] - m_min) / (m_max - m_min + 1e-8)
         e = (ev["raw_energy"] - e_min) / (e_max - e_min + 1e-8)
         # Weighted event score: 60% motion, 40% energy
-        ev["event_score"] = float(0.6*m + 0.4*e)
+        ev["event_score"] = float(motion_weight*m + energy_weight*e)
         # Mark as event if score exceeds threshold (example: 0.3)
-        ev["is_event"] = ev["event_score"] > 0.3
+        ev["is_event"] = ev["event_score"] > threshold
+    return events
+
+class _RunningRange:
+    """
+    min/max of a stream of values: over the last `window` values (monotonic deques, O(1)
+    amortized per value; window=None keeps everything), or with decay in (0, 1) as
+    exponentially-decayed extremes that drift back towards each new value.
+    """
+    def __init__(self, window=None, decay=None):
+        self.window, self.decay = window, decay
+        self._lo, self._hi = deque(), deque()  # (index, value), values increasing / decreasing
+        self._n = 0
+        self.lo = self.hi = None
+
+    def add(self, x):
+        if self.decay is not None:
+            if self.lo is None:
+                self.lo = self.hi = x
+            else:
+                self.lo = min(x, self.decay * self.lo + (1 - self.decay) * x)
+                self.hi = max(x, self.decay * self.hi + (1 - self.decay) * x)
+            return
+        i, self._n = self._n, self._n + 1
+        while self._lo and self._lo[-1][1] >= x:
+            self._lo.pop()
+        while self._hi and self._hi[-1][1] <= x:
+            self._hi.pop()
+        self._lo.append((i, x)); self._hi.append((i, x))
+        if self.window is not None:
+            while self._lo[0][0] <= i - self.window:
+                self._lo.popleft()
+            while self._hi[0][0] <= i - self.window:
+                self._hi.popleft()
+        self.lo, self.hi = self._lo[0][1], self._hi[0][1]
+
+    def norm(self, x):
+        return (x - self.lo) / (self.hi - self.lo + 1e-8)
+
+class OnlineEventDetector:
+    """
+    Streaming counterpart of score_events: feed chunk records (with raw_motion and
+    raw_energy) as they are produced and get is_event decisions while the session runs.
+    - window: normalize over the last `window` chunks (None = everything so far), or
+      decay: exponentially-decayed min/max instead (e.g. 0.98 per chunk).
+    - delay: a chunk is scored once `delay` later chunks have arrived, so its own
+      neighbourhood is in the statistics; decisions lag the input by exactly `delay` chunks.
+    update() returns the chunks decided by that call, flush() decides the ones still
+    waiting and finalize() gives the batch score_events result over everything seen.
+    - keep_history: keep every chunk for finalize(). Off by default, so a long capture
+      holds only the window; pass the chunks to finalize(chunks) instead.
+    """
+    def __init__(self, window=150, decay=None, delay=2,
+                 motion_weight=0.6, energy_weight=0.4, threshold=0.3, keep_history=False):
+        if window is not None and window <= delay:
+            raise ValueError("window must be larger than delay")
+        self.delay = delay
+        self.motion_weight, self.energy_weight, self.threshold = motion_weight, energy_weight, threshold
+        self._motion = _RunningRange(window, decay)
+        self._energy = _RunningRange(window, decay)
+        self._pending = deque()
+        self.history = [] if keep_history else None
+
+    def _decide(self, chunk):
+        m = self._motion.norm(chunk["raw_motion"])
+        e = self._energy.norm(chunk["raw_energy"])
+        score = float(self.motion_weight*m + self.energy_weight*e)
+        return {**chunk, "event_score": score, "is_event": score > self.threshold}
+
+    def update(self, chunk):
+        if self.history is not None:
+            self.history.append(chunk)
+        self._motion.add(chunk["raw_motion"])
+        self._energy.add(chunk["raw_energy"])
+        self._pending.append(chunk)
+        out = []
+        while len(self._pending) > self.delay:
+            out.append(self._decide(self._pending.popleft()))
+        return out
+
+    def flush(self):
+        out = [self._decide(c) for c in self._pending]
+        self._pending.clear()
+        return out
+
+    def finalize(self, chunks=None):
+        """
+        score_events over `chunks`, by default every chunk seen (needs keep_history=True).
+        """
+        if chunks is None:
+            if self.history is None:
+                raise ValueError("finalize() without chunks needs OnlineEventDetector(keep_history=True)")
+            chunks = self.history
+        return score_events([dict(c) for c in chunks],
+                            self.motion_weight, self.energy_weight, self.threshold)
+
+def chunk_events(chunks, media=None, session_dir=None):
+    """
+    Event records for chunk records (see detect_events), without reading or writing
+    session.json. `media` is the manifest's "media" entry; `session_dir` holds the chunk
+    files, only needed for chunks without raw_motion/raw_energy.
+    """
+    with timer("event_scoring"):
+        return _chunk_events(chunks, media, session_dir)
+
+def _chunk_events(chunks, media, session_dir):
+    events = []
+    media = media or {}
+    audio = envelope = None
+    need_energy = any(c.get("raw_energy") is None for c in chunks)
+    if need_energy and media.get("audio") and Path(media["audio"]).exists():
+        audio = open_session_audio(media["audio"], start_ts=media.get("video_start_ts") or 0.0)
+        envelope = load_envelope(audio)
+
+    # First pass: gather raw metrics for each chunk (usually already in the record)
+    for c in chunks:
+        m, e = c.get("raw_motion"), c.get("raw_energy")
+        if m is None:
+            # Compute mean frame-to-frame motion for this chunk
+            m = compute_video_motion(Path(session_dir) / Path(c["video_path"]).name)
+        if e is None:
+            # Compute RMS audio energy for this chunk
+            if envelope is not None:
+                e = envelope.energy(*audio.chunk_range(c["start"], c["end"]))
+            else:
+                e = compute_audio_energy(Path(session_dir) / Path(c["audio_path"]).name)
+        # Store raw metrics in the event record
+        events.append({**c, "raw_motion": m, "raw_energy": e})
+
+    return score_events(events)
+
+def detect_events(session_dir, output_path=None):
+    """
+    Event detection pipeline:
+    - Loads session.json to get all chunk metadata.
+    - For each chunk, takes raw_motion/raw_energy from the chunk record (the chunker
+      measures both while chunking); only when one is missing:
+        - Computes video motion (see compute_video_motion).
+        - Computes audio energy (see compute_audio_energy), or slices it from the session
+          audio envelope when the manifest lists the session audio under "media".
+    - Scores the chunks (see score_events).
+    - Writes results to session_events.json.
+    """
+    session_dir = Path(session_dir)
+    manifest = json.loads((session_dir / "session.json").read_text())
+    events = chunk_events(manifest["chunks"], manifest.get("media"), session_dir)
 
     # Output results to session_events.json
     out = output_path or (session_dir / "session_events.json")
     (session_dir / out.name).write_text(json.dumps(events, indent=2))
     return events
+
+def cli(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Score the chunks of a chunker output folder into session_events.json")
+    parser.add_argument("session_dir", help="Folder with the chunker's session.json")
+    args = parser.parse_args(argv)
+    events = detect_events(args.session_dir)
+    print(f"{sum(1 for e in events if e.get('is_event'))} events in {len(events)} chunks → "
+          f"{Path(args.session_dir) / 'session_events.json'}")
+
+if __name__ == "__main__":
+    cli()
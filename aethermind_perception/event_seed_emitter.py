@@ -1,7 +1,8 @@
 # event_seed_emitter.py
 import os, time
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, fields
 from typing import Any, Dict, List, Optional
+from seed_columns import SemanticActions, rms_column
 
 SCHEMA_VERSION = {"major": 1, "minor": 0}
 
@@ -17,7 +18,7 @@ def media_key(path: str) -> str:
 def make_event_uid(session_id: str, video_path: str, start: float, end: float) -> str:
     return f"{session_id}|{media_key(video_path)}|{start:.3f}-{end:.3f}"
 
-@dataclass
+@dataclass(slots=True)
 class EventSeed:
     event_uid: str
     session_id: str
@@ -35,14 +36,40 @@ class EventSeed:
     system: Dict[str, Any]
     action_window: Dict[str, int]
     decision_trace: Optional[Dict[str, Any]] = None
-    def to_dict(self) -> Dict[str, Any]: return asdict(self)
+    # shallow: the nested dicts/lists are the seed's own (asdict would deep-copy them all)
+    def to_dict(self) -> Dict[str, Any]:
+        d = {name: getattr(self, name) for name in _FIELDS}
+        if isinstance(self.actions, SemanticActions):
+            d["actions"] = self.actions.to_list()
+        rms = self.audio_dyn.get("rms_frames")
+        if hasattr(rms, "dtype"):
+            d["audio_dyn"] = {**self.audio_dyn, "rms_frames": rms.astype(float).tolist()}
+        return d
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "EventSeed": return cls(**d)
+
+    def compact(self) -> "EventSeed":
+        """
+        A copy holding actions and rms_frames as columns (seed_columns), about a sixth of
+        the memory of the dicts; to_dict() gives the original dict back. Fields that don't
+        fit the columns are kept as they are.
+        """
+        d = {name: getattr(self, name) for name in _FIELDS}
+        d["actions"] = SemanticActions.from_list(self.actions) or self.actions
+        rms = rms_column(self.audio_dyn.get("rms_frames"))
+        if rms is not None:
+            d["audio_dyn"] = {**self.audio_dyn, "rms_frames": rms}
+        return EventSeed(**d)
+
+_FIELDS = tuple(f.name for f in fields(EventSeed))
 
 def emit_event_seed(session_id, video_path, audio_path, actions, sync, video_dyn, audio_dyn, system,
                     pre_ms=300, post_ms=500, decision_trace=None, duration_s=2.0):
     start = monotonic_s(); end = start + float(duration_s)
     seed = EventSeed(
         event_uid=make_event_uid(session_id, video_path, start, end),
-        session_id=session_id, schema_version=SCHEMA_VERSION, created_at=wall_iso(),
+        session_id=session_id, schema_version=dict(SCHEMA_VERSION), created_at=wall_iso(),
         start=start, end=end, source="perception",
         video_path=video_path, audio_path=audio_path,
         actions=actions, sync=sync, video_dyn=video_dyn, audio_dyn=audio_dyn,
@@ -1,33 +1,150 @@
 # input_semantics_mapper.py
-def map_raw_to_semantic_action(raw):
-    key_map = {
-        "W":"move_forward","A":"move_left","S":"move_backward","D":"move_right",
-        "E":"interact","SPACE":"jump","I":"inventory",
-    }
-    mouse_map = {"left":"click_primary","right":"click_secondary","middle":"click_middle"}
-    action = None; valid = False
-    if isinstance(raw.get("keys"), list) and raw["keys"]:
-        # choose first mapped, or None
-        for k in raw["keys"]:
-            if k in key_map: action = key_map[k]; valid = True; break
-    if not valid and isinstance(raw.get("mouse",{}).get("buttons"), dict):
-        for btn, down in raw["mouse"]["buttons"].items():
-            if down and btn in mouse_map: action = mouse_map[btn]; valid = True; break
-    return {"action": action, "valid_for_game": bool(valid)}
-
-def _normalize_mouse(raw, resolution):
-    w,h = resolution
-    x,y = raw.get("mouse",{}).get("position",[0,0])
-    return [max(0,min(1,x/float(max(1,w)))), max(0,min(1,y/float(max(1,h))))]
-
-def process_actions(raw_actions, resolution=(1920,1080)):
-    out = []
-    for a in raw_actions:
-        sem = map_raw_to_semantic_action(a)
-        a2 = {
-            "ts": a["ts"],
-            "raw": a,
-            "semantic": {**sem, "mouse_norm": _normalize_mouse(a, resolution)}
-        }
-        out.append(a2)
+"""
+Raw input actions → semantic actions:
+
+    {"ts", "raw": <the raw action>, "semantic": {"action", "valid_for_game", "mouse_norm"}}
+
+The action is the first of the raw keys the game profile maps (in the order they were
+pressed), else the first held mouse button it maps, else None. mouse_norm is the mouse
+position over the screen resolution, clipped to [0, 1].
+
+A game profile is {"keys": {key: action}, "mouse": {button: action}}: a name in PROFILES,
+a path to a JSON file, or the dict itself. Its tables are compiled once (SemanticMapper,
+cached per name/path), and a whole window of actions is mapped in one NumPy pass.
+process_actions leaves actions that are already semantic as they are, so calling it
+again on its own output changes nothing.
+"""
+import json
+from itertools import compress, repeat
+import numpy as np
+
+PROFILES = {
+    "default": {
+        "keys": {"W": "move_forward", "A": "move_left", "S": "move_backward", "D": "move_right",
+                 "E": "interact", "SPACE": "jump", "I": "inventory"},
+        "mouse": {"left": "click_primary", "right": "click_secondary", "middle": "click_middle"},
+    },
+}
+
+def load_profile(profile="default"):
+    """
+    The {"keys", "mouse"} tables of a profile name, JSON file path or dict.
+    """
+    if isinstance(profile, dict):
+        return profile
+    if profile in PROFILES:
+        return PROFILES[profile]
+    if str(profile).endswith(".json"):
+        with open(profile) as f:
+            return json.load(f)
+    raise ValueError(f"unknown game profile: {profile} (use one of {', '.join(PROFILES)} or a .json file)")
+
+def is_semantic(action):
+    return isinstance(action, dict) and "semantic" in action and "raw" in action
+
+def _first(owner, codes, n):
+    # per row, the first code >= 0 among that row's entries (owner is non-decreasing), else -1
+    out = np.full(n, -1, dtype=np.int64)
+    hit = codes >= 0
+    owner, codes = owner[hit], codes[hit]
+    if len(owner):
+        first = np.ones(len(owner), bool)
+        first[1:] = owner[1:] != owner[:-1]
+        out[owner[first]] = codes[first]
+    return out
+
+def _clip_unit(v):
+    # max(0, min(1, v)) element-wise: the bounds come back as the ints 0 and 1, as the builtins give them
+    hi = ~(v < 1)  # NaN included, like min(1, nan)
+    out = v.tolist()
+    for i in np.flatnonzero(hi | (v <= 0)).tolist():
+        out[i] = 1 if hi[i] else 0
+    return out
+
+class SemanticMapper:
+    """
+    A game profile's key and button tables, compiled to action codes.
+    """
+    def __init__(self, profile="default"):
+        tables = load_profile(profile)
+        self.actions = tuple(dict.fromkeys([*tables["keys"].values(), *tables["mouse"].values()]))
+        code = {a: i for i, a in enumerate(self.actions)}
+        self.key_code = {k: code[a] for k, a in tables["keys"].items()}
+        self.button_code = {b: code[a] for b, a in tables["mouse"].items()}
+
+    def map(self, raw_actions, resolution=(1920, 1080)):
+        """
+        Semantic actions for a list of raw actions (none of them semantic already).
+        """
+        n = len(raw_actions)
+        if n == 0:
+            return []
+        # gather every row's keys and held buttons, then map them all at once
+        keys_flat, key_counts, held_flat, held_counts, pos = [], [], [], [], []
+        for a in raw_actions:
+            keys = a.get("keys")
+            if isinstance(keys, list):
+                keys_flat.extend(keys)
+                key_counts.append(len(keys))
+            else:
+                key_counts.append(0)
+            mouse = a.get("mouse", {})
+            buttons = mouse.get("buttons")
+            if isinstance(buttons, dict):
+                held = list(compress(buttons, buttons.values()))
+                held_flat.extend(held)
+                held_counts.append(len(held))
+            else:
+                held_counts.append(0)
+            pos.append(mouse.get("position", [0, 0]))
+        # buttons count as rows n..2n-1, after every key, so one pass finds both firsts
+        rows = np.repeat(np.arange(2 * n), key_counts + held_counts)
+        codes = np.array(list(map(self.key_code.get, keys_flat, repeat(-1)))
+                         + list(map(self.button_code.get, held_flat, repeat(-1))), dtype=np.int64)
+        first = _first(rows, codes, 2 * n)
+        codes = np.where(first[:n] >= 0, first[:n], first[n:]).tolist()
+
+        w, h = resolution
+        xy = _clip_unit((np.array(pos, dtype=np.float64).reshape(n, 2)
+                         / np.array([float(max(1, w)), float(max(1, h))])).ravel())
+
+        actions = self.actions
+        return [
+            {"ts": a["ts"], "raw": a,
+             "semantic": {"action": actions[c] if c >= 0 else None, "valid_for_game": c >= 0,
+                          "mouse_norm": xy[2 * i:2 * i + 2]}}
+            for i, (a, c) in enumerate(zip(raw_actions, codes))
+        ]
+
+_MAPPERS = {}
+
+def get_mapper(profile="default"):
+    """
+    The compiled SemanticMapper for a profile; names and paths are compiled only once.
+    """
+    if isinstance(profile, SemanticMapper):
+        return profile
+    if isinstance(profile, dict):
+        return SemanticMapper(profile)
+    mapper = _MAPPERS.get(profile)
+    if mapper is None:
+        mapper = _MAPPERS[profile] = SemanticMapper(profile)
+    return mapper
+
+def map_raw_to_semantic_action(raw, profile="default"):
+    sem = get_mapper(profile).map([{"ts": None, **raw}])[0]["semantic"]
+    return {"action": sem["action"], "valid_for_game": sem["valid_for_game"]}
+
+def process_actions(raw_actions, resolution=(1920, 1080), profile="default"):
+    """
+    Semantic actions for a window of raw actions, in order. Entries that are already
+    semantic (e.g. the output of an earlier call) are passed through unchanged.
+    """
+    mapper = get_mapper(profile)
+    todo = [i for i, a in enumerate(raw_actions) if not is_semantic(a)]
+    if len(todo) == len(raw_actions):
+        return mapper.map(raw_actions, resolution)
+    out = list(raw_actions)
+    for i, a in zip(todo, mapper.map([raw_actions[i] for i in todo], resolution)):
+        out[i] = a
     return out
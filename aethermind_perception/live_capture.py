@@ -0,0 +1,359 @@
+# live_capture.py
+"""
+Follow a recording while the recorder is still writing it and emit a chunk record and
+EventSeed as soon as each window closes.
+
+Expected layout of the capture folder (names configurable):
+  segment_0000.mp4, segment_0001.mp4, ...  video in closed segment files, frames continuous
+  audio.wav                                appended PCM/float wav (header sizes may be 0)
+  actions.jsonl                            appended action records
+  capture.done                             written by the recorder once everything is closed
+
+A segment counts as complete once a later one exists (or capture.done does). A window
+[k*d, (k+1)*d) closes when the video has reached its end and the audio has `grace`
+seconds beyond it, so actions logged slightly late still land in their window.
+
+Output folder:
+  chunks.jsonl / seeds.jsonl / events.jsonl   one line per chunk / seed / online decision
+  live_checkpoint.json                         progress, rewritten after every window
+  session.json / session_events.json           written when the capture is done
+Restarting on the same output folder resumes from the checkpoint; lines written after
+the last checkpoint are cut off first, so nothing is emitted twice.
+"""
+import json
+import os
+import struct
+import time
+from pathlib import Path
+import numpy as np
+from chunker import build_chunk, parse_action
+from session_audio import SessionAudio, pcm16_rms
+from dynamics_computation import compute_audio_rms, get_flow_engine
+from video_stream import MotionMeter, sparse_indices, window_frame_range, _resize
+from event_detector import OnlineEventDetector
+
+CHECKPOINT = "live_checkpoint.json"
+DONE_MARKER = "capture.done"
+OUTPUTS = ("chunks.jsonl", "seeds.jsonl", "events.jsonl")
+
+class SegmentVideo:
+    """
+    Frames of a recording split over numbered segment files, read in order as one stream.
+    `segments` lists the (name, frame_count) of every segment read to the end.
+    """
+    def __init__(self, folder, pattern="segment_*.mp4", segments=(), pos=0):
+        self.folder, self.pattern = Path(folder), pattern
+        self.segments = [tuple(s) for s in segments]
+        self.pos = pos  # index of the next frame
+        self._skip = pos - sum(n for _, n in self.segments)  # frames of the current segment read before a resume
+        self._cap = self._name = None
+        self._count = 0
+        self.fps = self.size = None
+
+    def _next_segment(self, finished):
+        names = sorted(p.name for p in self.folder.glob(self.pattern))
+        if not finished:
+            names = names[:-1]  # the newest segment may still be open in the recorder
+        done = {n for n, _ in self.segments}
+        return next((n for n in names if n not in done), None)
+
+    def _open(self, finished):
+        import cv2
+        if self._cap is not None:
+            return True
+        name = self._next_segment(finished)
+        if name is None:
+            return False
+        self._cap, self._name, self._count = cv2.VideoCapture(str(self.folder / name)), name, 0
+        if self.fps is None:
+            self.fps = self._cap.get(cv2.CAP_PROP_FPS) or 30
+            self.size = (int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        return True
+
+    def probe(self, finished):
+        # fps/size become known once the first segment is complete
+        self._open(finished)
+        return self.fps
+
+    def next_frame(self, finished):
+        """
+        Next frame of the stream, or None until another segment is complete.
+        """
+        while self._open(finished):
+            while self._skip > 0 and self._cap.grab():
+                self._skip -= 1
+                self._count += 1
+            ok, frame = self._cap.read()
+            if ok and frame is not None:
+                self.pos += 1
+                self._count += 1
+                return frame
+            self._cap.release()
+            self.segments.append((self._name, self._count))
+            self._cap = None
+        return None
+
+    def close(self):
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+class LiveSession:
+    """
+    Tail/follow chunker over one capture folder; see the module docstring for the layout.
+    poll() emits every window that has closed since the last call; run() polls until the
+    recorder has written capture.done and everything has been emitted.
+    Chunk records match chunker.chunk_video_audio_with_actions(mode="stream") records,
+    with per-chunk audio RMS as with audio_backend="ffmpeg". Chunk .mp4 files are not
+    written (video_path is a logical name); write_audio=False skips the chunk .wav files.
+    """
+    def __init__(self, capture_dir, output_dir, chunk_duration=2.0, video_start_ts=None,
+                 segments="segment_*.mp4", audio_name="audio.wav", actions_name="actions.jsonl",
+                 grace=0.5, write_audio=True, frame_size=None, flow=None, detector=None, on_chunk=None,
+                 game_profile="default"):
+        self.capture_dir, self.out_dir = Path(capture_dir), Path(output_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.chunk_duration, self.video_start_ts, self.grace = chunk_duration, video_start_ts, grace
+        self.audio_path = self.capture_dir / audio_name
+        self.actions_path = self.capture_dir / actions_name
+        self.write_audio, self.frame_size, self.on_chunk = write_audio, frame_size, on_chunk
+        self.flow_engine = get_flow_engine(**flow) if flow else None
+        self.game_profile = game_profile
+        self.detector = detector or OnlineEventDetector()
+        self.session_id = self.out_dir.name
+
+        ck = self._load_checkpoint()
+        self.next_chunk = ck.get("next_chunk", 0)
+        self.actions_offset = ck.get("actions_offset", 0)
+        self.pending_actions = ck.get("pending_actions", [])
+        self.done = ck.get("done", False)
+        self.video = SegmentVideo(self.capture_dir, segments, ck.get("segments", ()), ck.get("video_pos", 0))
+        self._win = None
+        self._restore_outputs(ck.get("files", {}))
+
+    # -- checkpointing ------------------------------------------------------------------
+
+    def _load_checkpoint(self):
+        path = self.out_dir / CHECKPOINT
+        return json.loads(path.read_text()) if path.exists() else {}
+
+    def _restore_outputs(self, sizes):
+        # cut anything appended after the last checkpoint, then bring the detector back
+        for name in OUTPUTS:
+            path = self.out_dir / name
+            if path.exists():
+                with open(path, "r+b") as f:
+                    f.truncate(sizes.get(name, 0))
+        # replaying the written chunks rebuilds the detector; its decisions are already in events.jsonl
+        self.chunks = self._read_jsonl("chunks.jsonl")
+        for c in self.chunks:
+            self.detector.update(c)
+
+    def _read_jsonl(self, name):
+        path = self.out_dir / name
+        if not path.exists():
+            return []
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def _append(self, name, records):
+        if records:
+            with open(self.out_dir / name, "a") as f:
+                for r in records:
+                    f.write(json.dumps(r) + "\n")
+
+    def _checkpoint(self):
+        files = {}
+        for name in OUTPUTS:
+            path = self.out_dir / name
+            files[name] = path.stat().st_size if path.exists() else 0
+        state = {
+            "next_chunk": self.next_chunk,
+            "video_pos": self.video.pos,
+            "segments": self.video.segments,
+            "actions_offset": self.actions_offset,
+            "pending_actions": self.pending_actions,
+            "files": files,
+            "done": self.done,
+        }
+        tmp = self.out_dir / (CHECKPOINT + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.out_dir / CHECKPOINT)
+
+    # -- inputs -------------------------------------------------------------------------
+
+    def _read_actions(self):
+        # only complete lines; a half-written last line is picked up on the next poll
+        if not self.actions_path.exists():
+            return
+        with open(self.actions_path, "rb") as f:
+            f.seek(self.actions_offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if line.strip():
+                self.pending_actions.append(parse_action(json.loads(line), self.video_start_ts))
+        self.actions_offset += end
+
+    def _open_audio(self):
+        # a fresh mapping every poll: the file has grown since the last one
+        try:
+            return SessionAudio(self.audio_path, start_ts=self.video_start_ts or 0.0)
+        except (FileNotFoundError, ValueError, struct.error):
+            return None
+
+    # -- windows ------------------------------------------------------------------------
+
+    def _new_window(self):
+        k = self.next_chunk
+        rel_start, rel_end = k * self.chunk_duration, (k + 1) * self.chunk_duration
+        first, last = window_frame_range(rel_start, rel_end, self.video.fps, 1 << 62)
+        self._win = {
+            "rel": (rel_start, rel_end), "first": first, "last": last,
+            "wanted": set(sparse_indices(first, last, 12)), "frames": [], "meter": MotionMeter(),
+        }
+
+    def _try_close_window(self, audio, finished):
+        win = self._win
+        while self.video.pos < win["last"]:
+            idx = self.video.pos
+            frame = self.video.next_frame(finished)
+            if frame is None:
+                break
+            win["meter"].add(frame)
+            if idx in win["wanted"]:
+                win["frames"].append(_resize(frame, self.frame_size))
+        rel_start, rel_end = win["rel"]
+        if self.video.pos < win["last"]:
+            if not finished:
+                return None
+            if self.video.pos <= win["first"]:
+                self.done = True  # nothing left to chunk
+                return None
+            rel_end = self.video.pos / self.video.fps  # the last window is short, like chunk_bounds
+        if not finished and (audio is None or audio.n_frames < (rel_end + self.grace) * audio.sr):
+            return None
+        return self._emit(rel_start, rel_end, audio)
+
+    def _emit(self, rel_start, rel_end, audio):
+        win = self._win
+        offset = self.video_start_ts or 0.0
+        cur_start, cur_end = offset + rel_start, offset + rel_end
+        window_actions = [a for a in self.pending_actions if rel_start <= a["ts"] < rel_end]
+        self.pending_actions = [a for a in self.pending_actions if a["ts"] >= rel_end]
+
+        base = f"chunk_{self.next_chunk:04d}"
+        vid_out, aud_out = self.out_dir / f"{base}.mp4", self.out_dir / f"{base}.wav"
+        # no audio (the .wav is missing or still empty when the capture ends): a silent
+        # chunk, rather than process_event reading a chunk .wav that was never written
+        audio_dyn, raw_energy = {"rms_frames": [], "sr": 0}, 0.0
+        if audio is not None:
+            if self.write_audio:
+                pcm = audio.write_wav(aud_out, rel_start, rel_end)
+            else:
+                pcm = audio.pcm16(*audio.frame_range(rel_start, rel_end))
+            raw_energy = pcm16_rms(pcm)
+            # what librosa.load(mono=True) gives for the chunk .wav
+            mono = (pcm.astype(np.float32) / 32768.0).mean(axis=1)
+            audio_dyn = compute_audio_rms(str(aud_out), samples=mono, sr=audio.sr)
+
+        seeds = []
+        chunk = build_chunk(
+            cur_start, cur_end, window_actions, self.video_start_ts, self.session_id,
+            win["frames"], self.video.size, self.video.fps, vid_out, aud_out,
+            audio_dyn=audio_dyn, raw_motion=win["meter"].value, raw_energy=raw_energy,
+            flow_engine=self.flow_engine, on_seed=seeds.append, game_profile=self.game_profile,
+        )
+        decided = self.detector.update(chunk)
+        self._append("seeds.jsonl", seeds)
+        self._append("chunks.jsonl", [chunk])
+        self._append("events.jsonl", decided)
+        self.chunks.append(chunk)
+        self.next_chunk += 1
+        self._checkpoint()
+        if self.on_chunk is not None:
+            self.on_chunk(chunk)
+        return chunk
+
+    def poll(self):
+        """
+        Emit every window that has closed; returns their chunk records.
+        """
+        if self.done:
+            return []
+        finished = (self.capture_dir / DONE_MARKER).exists()
+        self._read_actions()
+        audio = self._open_audio()
+        if self.video.probe(finished) is None:
+            if finished:
+                self.done = True  # the recorder stopped without writing any video
+                self._finish()
+            return []
+        emitted = []
+        while not self.done:
+            if self._win is None:
+                self._new_window()
+            chunk = self._try_close_window(audio, finished)
+            if chunk is None:
+                break
+            emitted.append(chunk)
+            self._win = None
+        if self.done:
+            self._finish()
+        return emitted
+
+    def _finish(self):
+        self.video.close()
+        self._append("events.jsonl", self.detector.flush())
+        with open(self.out_dir / "session.json", "w") as sf:
+            json.dump({"chunks": self.chunks}, sf, indent=2)
+        with open(self.out_dir / "session_events.json", "w") as ef:
+            json.dump(self.detector.finalize(self.chunks), ef, indent=2)
+        self._checkpoint()
+
+    def run(self, poll_interval=0.5, timeout=None):
+        """
+        Poll until the capture is done and fully emitted (or `timeout` seconds pass).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.done:
+            self.poll()
+            if self.done or (deadline is not None and time.monotonic() > deadline):
+                break
+            time.sleep(poll_interval)
+        return self.chunks
+
+
+def cli(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Follow a recording in progress and emit EventSeeds per chunk.")
+    parser.add_argument("--folder", required=True, help="Capture folder the recorder is writing to")
+    parser.add_argument("--out", required=True, help="Output folder (rerun with the same one to resume)")
+    parser.add_argument("--duration", type=float, default=2.0, help="Chunk length (s)")
+    parser.add_argument("--video_start_ts", type=float, default=None,
+                        help="Epoch seconds of the first video frame / audio sample")
+    parser.add_argument("--segments", default="segment_*.mp4", help="Glob for the video segment files")
+    parser.add_argument("--audio", default="audio.wav", help="Audio file name in the capture folder")
+    parser.add_argument("--actions", default="actions.jsonl", help="Action log name in the capture folder")
+    parser.add_argument("--grace", type=float, default=0.5,
+                        help="Seconds of audio past a window's end to wait for before closing it")
+    parser.add_argument("--poll", type=float, default=0.5, help="Seconds between polls")
+    parser.add_argument("--no_audio_chunks", action="store_true", help="Don't write chunk .wav files")
+    parser.add_argument("--game_profile", default="default",
+                        help="Key/button → semantic action tables (a name in input_semantics_mapper.PROFILES, or a .json file)")
+    args = parser.parse_args(argv)
+
+    session = LiveSession(
+        args.folder, args.out, chunk_duration=args.duration, video_start_ts=args.video_start_ts,
+        segments=args.segments, audio_name=args.audio, actions_name=args.actions, grace=args.grace,
+        write_audio=not args.no_audio_chunks, game_profile=args.game_profile,
+    )
+    chunks = session.run(poll_interval=args.poll)
+    print(f"Live capture done: {len(chunks)} chunks → {Path(args.out) / 'chunks.jsonl'}")
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,176 @@
+# metrics.py
+"""
+Lightweight timers and counters for the pipeline stages.
+
+Instrumented code calls timer(name) / count(name, n) unconditionally; they go to the
+Metrics installed with use_metrics, or nowhere (a shared no-op) when there is none,
+so uninstrumented runs pay a function call and a dict lookup.
+
+    with use_metrics(Metrics()) as m:
+        run_session(...)
+    m.write("metrics.json")
+
+use_metrics installs a Metrics for the whole process (every thread, so stage threads
+and prefetch threads report to it), or with thread_only=True for the current thread
+only, which is how chunker.process_chunk collects a chunk's numbers to hand back from
+a pool worker (Metrics.merge).
+
+Timers currently reported: segment, decode, encode, ffmpeg_split, audio_slice, flow, rms,
+seed_emit, seed_write, event_scoring, vector_decode, vector_embed, vector_write.
+Counters: chunks, frames_decoded, dropped_frames, seeds, vector_windows, cache_hits.
+"""
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+class Metrics:
+    """
+    Named timers (count, total and max seconds) and counters, safe to update from
+    several threads.
+    """
+    def __init__(self):
+        self.timers = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def add_time(self, name, seconds, calls=1):
+        with self._lock:
+            t = self.timers.get(name)
+            if t is None:
+                self.timers[name] = [calls, seconds, seconds]
+            else:
+                t[0] += calls
+                t[1] += seconds
+                t[2] = max(t[2], seconds)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def timer(self, name):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - t)
+
+    def to_dict(self):
+        with self._lock:
+            timers = {name: {"count": c, "total_s": total, "max_s": peak,
+                             "mean_ms": 1000.0 * total / c if c else 0.0}
+                      for name, (c, total, peak) in sorted(self.timers.items())}
+            return {"timers": timers, "counters": dict(sorted(self.counters.items()))}
+
+    def merge(self, data):
+        """
+        Add a to_dict() from elsewhere (e.g. a pool worker) into this one.
+        """
+        for name, t in data.get("timers", {}).items():
+            with self._lock:
+                mine = self.timers.get(name)
+                if mine is None:
+                    self.timers[name] = [t["count"], t["total_s"], t["max_s"]]
+                else:
+                    mine[0] += t["count"]
+                    mine[1] += t["total_s"]
+                    mine[2] = max(mine[2], t["max_s"])
+        for name, n in data.get("counters", {}).items():
+            self.count(name, n)
+
+    def write(self, path, **extra):
+        """
+        Write to_dict() plus `extra` fields as JSON.
+        """
+        data = {**extra, **self.to_dict()}
+        tmp = Path(f"{path}.tmp")
+        tmp.write_text(json.dumps(data, indent=2))
+        os.replace(tmp, path)
+        return data
+
+class _NullMetrics(Metrics):
+    # what instrumented code talks to when nothing is collecting
+    def add_time(self, name, seconds, calls=1):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    @contextmanager
+    def timer(self, name):
+        yield
+
+    def merge(self, data):
+        pass
+
+NULL = _NullMetrics()
+_process = [NULL]
+_thread = threading.local()
+
+def current():
+    """
+    The Metrics this thread reports to (NULL when none is installed).
+    """
+    return getattr(_thread, "metrics", None) or _process[0]
+
+def timer(name):
+    return current().timer(name)
+
+def count(name, n=1):
+    current().count(name, n)
+
+@contextmanager
+def use_metrics(metrics, thread_only=False):
+    """
+    Report to `metrics` for the duration of the block: from every thread of the
+    process, or with thread_only=True from the current thread only.
+    """
+    if thread_only:
+        previous = getattr(_thread, "metrics", None)
+        _thread.metrics = metrics
+    else:
+        previous = _process[0]
+        _process[0] = metrics
+    try:
+        yield metrics
+    finally:
+        if thread_only:
+            _thread.metrics = previous
+        else:
+            _process[0] = previous
+
+PROFILERS = ("cprofile", "pyinstrument")
+
+@contextmanager
+def profiled(path, profiler="cprofile"):
+    """
+    Profile the block on the current thread and write the result to `path`: a pstats
+    dump for cProfile (read it with `python -m pstats` or snakeviz), an HTML report for
+    pyinstrument (optional dependency).
+    """
+    if profiler == "cprofile":
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            yield
+        finally:
+            prof.disable()
+            prof.dump_stats(str(path))
+    elif profiler == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise ValueError("profiler 'pyinstrument' needs the pyinstrument package") from None
+        prof = Profiler()
+        prof.start()
+        try:
+            yield
+        finally:
+            prof.stop()
+            Path(path).write_text(prof.output_html())
+    else:
+        raise ValueError(f"unknown profiler: {profiler}")
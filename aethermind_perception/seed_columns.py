@@ -0,0 +1,115 @@
+# seed_columns.py
+"""
+Column-backed forms of the bulky parts of an EventSeed, for keeping many seeds in
+memory (event_seed_emitter.EventSeed.compact):
+
+  SemanticActions  the list process_actions returns as NumPy columns: ts, the action
+                   (a code into a small vocabulary), valid_for_game and mouse_norm.
+                   "raw" is a RawActions, or another SemanticActions when the actions
+                   are wrapped twice (seeds from before process_actions passed
+                   semantic actions through)
+  RawActions       chunk actions ({"ts", "keys", "mouse"}) in action_ingest's column layout
+  rms_column       audio_dyn["rms_frames"] as float32 (float64 if float32 would round them)
+
+to_list() gives back dicts equal to the originals with the same key order and the same
+int/float types, so they serialize to the same text. from_list checks that on the way
+in (by comparing the JSON) and returns None for a list it can't hold exactly; callers
+keep that one as it is.
+"""
+import json
+import numpy as np
+from action_ingest import ActionRecords, parse_actions
+
+def _same(built, original):
+    try:
+        return json.dumps(built.to_list()) == json.dumps(original)
+    except TypeError:  # not JSON to begin with (e.g. NumPy ints)
+        return False
+
+class RawActions:
+    """
+    Chunk action dicts as action_ingest columns (rows in the original order).
+    """
+    __slots__ = ("cols",)
+
+    def __init__(self, cols):
+        self.cols = cols
+
+    @classmethod
+    def from_list(cls, actions, check=True):
+        try:
+            records = [{"time": a["ts"], **{k: v for k, v in a.items() if k != "ts"}} for a in actions]
+            cols = parse_actions(records)
+        except (TypeError, KeyError, ValueError, AttributeError):
+            return None
+        if len(cols["skipped_lines"]) or len(cols["coerced_lines"]):
+            return None  # parse_actions would have changed the records
+        if not np.all(np.diff(cols["time"]) >= 0):
+            return None  # parse_actions sorts by time; only in-order lists keep their order
+        raw = cls(cols)
+        return raw if not check or _same(raw, actions) else None
+
+    def __len__(self):
+        return len(self.cols["time"])
+
+    def to_list(self):
+        out = []
+        for r in ActionRecords(self.cols):
+            ts = r.pop("time")
+            out.append({"ts": ts, **r})
+        return out
+
+class SemanticActions:
+    """
+    process_actions output as columns; see the module docstring.
+    """
+    __slots__ = ("ts", "codes", "vocab", "valid", "mouse_norm", "mouse_int", "raw")
+
+    def __init__(self, ts, codes, vocab, valid, mouse_norm, mouse_int, raw):
+        self.ts, self.codes, self.vocab, self.valid = ts, codes, vocab, valid
+        self.mouse_norm, self.mouse_int, self.raw = mouse_norm, mouse_int, raw
+
+    @classmethod
+    def from_list(cls, actions, check=True):
+        try:
+            raws = [a["raw"] for a in actions]
+            sems = [a["semantic"] for a in actions]
+            vocab = {}
+            codes = np.array([vocab.setdefault(s["action"], len(vocab)) for s in sems], dtype=np.int16)
+            mouse = [s["mouse_norm"] for s in sems]
+            mouse_norm = np.array(mouse, dtype=np.float64).reshape(len(actions), 2)
+            mouse_int = np.array([[type(v) is int for v in m] for m in mouse], dtype=bool).reshape(len(actions), 2)
+            ts = np.array([a["ts"] for a in actions], dtype=np.float64)
+            valid = np.array([s["valid_for_game"] for s in sems], dtype=bool)
+        except (TypeError, KeyError, ValueError):
+            return None
+        nested = raws and all(isinstance(r, dict) and "semantic" in r for r in raws)
+        raw = (SemanticActions if nested else RawActions).from_list(raws, check=False)  # checked as a whole below
+        if raw is None:
+            return None
+        out = cls(ts, codes, tuple(vocab), valid, mouse_norm, mouse_int if mouse_int.any() else None, raw)
+        return out if not check or _same(out, actions) else None
+
+    def __len__(self):
+        return len(self.ts)
+
+    def to_list(self):
+        mouse = self.mouse_norm.tolist()
+        if self.mouse_int is not None:
+            for i, j in zip(*np.nonzero(self.mouse_int)):
+                mouse[i][j] = int(mouse[i][j])
+        return [
+            {"ts": ts, "raw": raw, "semantic": {"action": self.vocab[code], "valid_for_game": valid, "mouse_norm": m}}
+            for ts, raw, code, valid, m in zip(self.ts.tolist(), self.raw.to_list(), self.codes.tolist(),
+                                              self.valid.tolist(), mouse)
+        ]
+
+def rms_column(frames):
+    """
+    rms_frames as an array that gives the same floats back, or None if it isn't a list of floats.
+    """
+    if not isinstance(frames, list) or not all(type(v) is float for v in frames):
+        return None
+    values = np.array(frames, dtype=np.float64)
+    narrow = values.astype(np.float32)
+    return narrow if np.array_equal(narrow.astype(np.float64), values, equal_nan=True) else values
@@ -0,0 +1,129 @@
+# seed_sink.py
+"""
+Persisting EventSeeds as they are emitted.
+
+SeedSink appends seeds to a file, encoded into a buffer and written `batch` seeds at a
+time, so the sink costs one write per batch instead of one per seed:
+
+  seeds.jsonl     one JSON object per line (orjson when installed, else json)
+  seeds.msgpack   a stream of msgpack maps, about a fifth smaller (needs msgpack)
+
+fsync decides when the data is forced to disk: "never" (left to the OS), "close"
+(once, when the sink is closed; the default) or "batch" (after every batch, so a crash
+loses at most the seeds still in the buffer). read_seeds reads either format back,
+ignoring a record cut short by a crash.
+
+    with SeedSink(out_dir / "seeds.jsonl") as sink:
+        chunk_video_audio_with_actions(..., seeds=sink)
+"""
+import json
+import os
+from pathlib import Path
+from metrics import count, timer
+
+SEED_FORMATS = {"jsonl": "seeds.jsonl", "msgpack": "seeds.msgpack"}
+FSYNC_POLICIES = ("never", "close", "batch")
+
+try:
+    import orjson
+    _loads = orjson.loads
+    def _json_line(seed):
+        return orjson.dumps(seed, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY)
+except ImportError:
+    _loads = json.loads
+    def _json_line(seed):
+        return (json.dumps(seed, separators=(",", ":")) + "\n").encode()
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        raise ValueError("seed format 'msgpack' needs the msgpack package") from None
+    return msgpack
+
+def seed_format(path):
+    """
+    The SEED_FORMATS key for a seeds file, from its suffix.
+    """
+    suffix = Path(path).suffix.lstrip(".")
+    if suffix not in SEED_FORMATS:
+        raise ValueError(f"unknown seed format for {path} (use .jsonl or .msgpack)")
+    return suffix
+
+class SeedSink:
+    """
+    Buffered seed writer; see the module docstring. The sink is also a callable, so it
+    can be passed wherever an on_seed callback is expected. append=True adds to an
+    existing file instead of starting it over.
+    """
+    def __init__(self, path, fmt=None, batch=64, fsync="close", append=False):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"unknown fsync policy: {fsync}")
+        self.path = Path(path)
+        self.format = fmt or seed_format(self.path)
+        if self.format == "jsonl":
+            self._encode = _json_line
+        elif self.format == "msgpack":
+            self._encode = _msgpack().Packer(use_bin_type=True).pack
+        else:
+            raise ValueError(f"unknown seed format: {self.format}")
+        self.batch, self.fsync = max(1, int(batch)), fsync
+        self.count = 0
+        self._buffer = []
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "ab" if append else "wb")
+
+    def write(self, seed):
+        self._buffer.append(self._encode(seed))
+        self.count += 1
+        if len(self._buffer) >= self.batch:
+            self.flush()
+
+    __call__ = write
+
+    def flush(self):
+        if self._buffer:
+            with timer("seed_write"):
+                self._file.write(b"".join(self._buffer))
+                self._file.flush()
+                if self.fsync == "batch":
+                    os.fsync(self._file.fileno())
+            count("seeds", len(self._buffer))
+            self._buffer.clear()
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            if self.fsync != "never":
+                os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def dump_seeds(path, seeds):
+    """
+    Write a list of seeds in one go (format from the suffix), e.g. into a stage cache
+    entry; not counted in the metrics like a SeedSink's.
+    """
+    fmt = seed_format(path)
+    encode = _json_line if fmt == "jsonl" else _msgpack().Packer(use_bin_type=True).pack
+    Path(path).write_bytes(b"".join(encode(seed) for seed in seeds))
+
+def read_seeds(path):
+    """
+    The seeds stored in a seeds.jsonl or seeds.msgpack file, in order. A last record
+    that was only partly written is skipped.
+    """
+    fmt = seed_format(path)
+    with open(path, "rb") as f:
+        if fmt == "msgpack":
+            yield from _msgpack().Unpacker(f, raw=False)
+            return
+        for line in f:
+            if line.endswith(b"\n") and line.strip():
+                yield _loads(line)
@@ -0,0 +1,118 @@
+# segmentation.py
+"""
+Activity-driven chunk boundaries, for recordings that are idle most of the time.
+
+The session is cut into steps of `step` seconds and every step gets three cheap signals:
+  motion   grey-level change between one small frame per step (video_stream.sampled_motion,
+           one forward pass over the video)
+  audio    peak RMS frame of the step, from the cached session envelope (audio_envelope)
+  actions  keys down, buttons held and mouse travel in the step (action_index.action_features)
+
+A step is active when any signal crosses its threshold (audio counts above the session's
+median, so steady music or hum reads as idle), widened by `pad` steps on each side.
+Active runs are cut into chunk_duration windows, as fixed chunking would; idle runs become
+near-equal chunks of up to max_duration. Chunks shorter than min_duration are merged into
+their shorter neighbour where the result stays within max_duration, or chunk_duration if
+either side is active. A fully active session therefore gets the fixed windows.
+"""
+import math
+import numpy as np
+from action_index import action_features
+from audio_envelope import load_envelope
+from video_stream import sampled_motion
+
+DEFAULTS = {"step": 0.5, "min_duration": 1.0, "max_duration": 30.0, "motion_threshold": 1.0,
+            "audio_threshold": 0.02, "pad": 1}
+
+def activity_signals(video_path, audio, action_index, abs_start, abs_end, step=0.5):
+    """
+    The per-step signals described in the module docstring, as {"motion", "audio", "actions"}
+    arrays over ceil((abs_end - abs_start) / step) steps. `audio` is a session_audio.SessionAudio.
+    """
+    n = max(1, math.ceil((abs_end - abs_start) / step - 1e-9))
+    t0 = abs_start + step * np.arange(n)
+    t1 = np.minimum(t0 + step, abs_end)
+
+    envelope = load_envelope(audio)
+    peaks = np.zeros(n)
+    for k in range(n):
+        frames = envelope.rms_frames(*audio.chunk_range(t0[k], t1[k]))
+        if len(frames):
+            peaks[k] = frames.max()
+
+    if len(action_index):
+        feats = action_features(action_index, t0, t1)
+        actions = feats["key_presses"] + feats["left_clicks"] + feats["right_clicks"] + feats["mouse_dist"]
+    else:
+        actions = np.zeros(n)
+    return {"motion": sampled_motion(video_path, (t0 - abs_start).tolist()), "audio": peaks,
+            "actions": np.asarray(actions, dtype=np.float64)}
+
+def active_steps(signals, motion_threshold=1.0, audio_threshold=0.02, pad=1):
+    """
+    Boolean activity per step (see the module docstring).
+    """
+    audio = signals["audio"]
+    active = ((signals["motion"] > motion_threshold) | (signals["actions"] > 0)
+              | (audio > np.median(audio) + audio_threshold))
+    if pad > 0:
+        active = np.convolve(active, np.ones(2 * pad + 1), mode="same") > 0
+    return active
+
+def segment_bounds(abs_start, abs_end, active, step=0.5, chunk_duration=2.0, min_duration=1.0,
+                   max_duration=30.0):
+    """
+    [start, end) chunks covering [abs_start, abs_end) from the per-step activity.
+    """
+    if not 0 < min_duration <= chunk_duration <= max_duration:
+        raise ValueError("need 0 < min_duration <= chunk_duration <= max_duration")
+    n = len(active)
+    edges = [0, *(np.flatnonzero(np.diff(np.asarray(active, dtype=np.int8))) + 1).tolist(), n]
+    cuts, limits = [0], []
+    for r0, r1 in zip(edges[:-1], edges[1:]):
+        if active[r0]:
+            # chunk_duration windows from the start of the run, as chunk_bounds cuts them
+            per = max(1, round(chunk_duration / step))
+            inner = list(range(r0 + per, r1, per))
+            limit = chunk_duration
+        else:
+            # near-equal pieces on step boundaries, none longer than max_duration
+            pieces = min(r1 - r0, max(1, math.ceil((r1 - r0) * step / max_duration - 1e-9)))
+            inner = [r0 + round(p * (r1 - r0) / pieces) for p in range(1, pieces)]
+            limit = max_duration
+        cuts += inner + [r1]
+        limits += [limit] * (len(inner) + 1)
+    times = [min(abs_end, abs_start + c * step) for c in cuts]
+    times[-1] = abs_end
+    segs = [[a, b, lim] for a, b, lim in zip(times[:-1], times[1:], limits) if b > a]
+
+    # a short piece joins its shorter neighbour if the two stay within the stricter limit,
+    # so nothing with activity in it grows past chunk_duration
+    i = 0
+    while i < len(segs):
+        length = segs[i][1] - segs[i][0]
+        fits = [j for j in (i - 1, i + 1) if 0 <= j < len(segs)
+                and length + segs[j][1] - segs[j][0] <= min(segs[i][2], segs[j][2]) + 1e-9]
+        if length < min_duration - 1e-9 and fits:
+            j = min(fits, key=lambda j: segs[j][1] - segs[j][0])
+            lo = min(i, j)
+            segs[lo:lo + 2] = [[segs[lo][0], segs[lo + 1][1], min(segs[lo][2], segs[lo + 1][2])]]
+            i = lo
+        else:
+            i += 1
+    return [(a, b) for a, b, _ in segs]
+
+def adaptive_chunk_bounds(video_path, audio, action_index, abs_start, abs_end, chunk_duration=2.0, **settings):
+    """
+    Chunk bounds for chunker.chunk_video_audio_with_actions(segmentation=settings); settings
+    are any of DEFAULTS. Returns (bounds, active steps).
+    """
+    unknown = set(settings) - set(DEFAULTS)
+    if unknown:
+        raise ValueError(f"unknown segmentation settings: {', '.join(sorted(unknown))}")
+    s = {**DEFAULTS, **settings}
+    signals = activity_signals(video_path, audio, action_index, abs_start, abs_end, s["step"])
+    active = active_steps(signals, s["motion_threshold"], s["audio_threshold"], s["pad"])
+    bounds = segment_bounds(abs_start, abs_end, active, s["step"], chunk_duration, s["min_duration"],
+                            s["max_duration"])
+    return bounds, active
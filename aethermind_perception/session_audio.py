@@ -0,0 +1,199 @@
+# session_audio.py
+import struct
+import wave
+from decimal import Decimal
+from pathlib import Path
+import numpy as np
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+def _parse_wav_header(path):
+    """
+    Walk the RIFF chunks of a .wav file.
+    Returns (format_tag, channels, sr, bits, data_offset, data_size).
+    """
+    with open(path, "rb") as f:
+        riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave_id != b"WAVE":
+            raise ValueError(f"{path} is not a RIFF/WAVE file")
+        fmt = None
+        while True:
+            head = f.read(8)
+            if len(head) < 8:
+                break
+            cid, size = struct.unpack("<4sI", head)
+            if cid == b"fmt ":
+                body = f.read(size)
+                tag, channels, sr, _, _, bits = struct.unpack("<HHIIHH", body[:16])
+                if tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    tag = struct.unpack("<H", body[24:26])[0]  # first two bytes of the sub-format GUID
+                fmt = (tag, channels, sr, bits)
+            elif cid == b"data":
+                if fmt is None:
+                    raise ValueError(f"{path}: data chunk before fmt chunk")
+                return (*fmt, f.tell(), size)
+            else:
+                f.seek(size + (size & 1), 1)  # chunks are word-aligned
+    raise ValueError(f"{path}: no data chunk")
+
+def _parse_us(t: float) -> int:
+    # ffmpeg reads "-ss 1.2345678" as whole microseconds, dropping the extra digits
+    return int(Decimal(str(t)) * 1_000_000)
+
+def _us_to_samples(us: int, sr: int) -> int:
+    # av_rescale with round-half-away-from-zero
+    num = us * sr
+    return (num + 500_000) // 1_000_000 if num >= 0 else -((-num + 500_000) // 1_000_000)
+
+class SessionAudio:
+    """
+    The session .wav opened once and memory-mapped; nothing is decoded up front.
+    `data` is a (frames, channels) view straight onto the file for 8/16/32-bit PCM and
+    float audio (24-bit PCM is kept as raw bytes and widened per slice).
+    `start_ts` is the absolute time (epoch seconds) of the first sample, so stages can
+    ask for windows in the same timestamps as chunks and vectors.
+    """
+
+    def __init__(self, path, start_ts: float = 0.0):
+        self.path = str(path)
+        self.start_ts = start_ts
+        tag, self.channels, self.sr, self.bits, offset, size = _parse_wav_header(self.path)
+        if tag not in (WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT):
+            raise ValueError(f"{self.path}: unsupported wav format tag {tag:#x}")
+        self.is_float = tag == WAVE_FORMAT_IEEE_FLOAT
+        width = self.bits // 8
+        # the header size is unreliable for files still being written, trust the file length;
+        # streaming writers leave it as 0 or 0xFFFFFFFF until the file is closed
+        available = Path(self.path).stat().st_size - offset
+        size = available if size in (0, 0xFFFFFFFF) else min(size, available)
+        self.n_frames = size // (width * self.channels)
+        if self.n_frames == 0:
+            self.data = np.zeros((0, self.channels), dtype=np.int16)
+            return
+        if self.is_float:
+            dtype = {4: "<f4", 8: "<f8"}[width]
+        else:
+            dtype = {1: "u1", 2: "<i2", 3: "u1", 4: "<i4"}[width]
+        count = self.n_frames * self.channels * (3 if width == 3 else 1)
+        flat = np.memmap(self.path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+        self.data = flat.reshape(self.n_frames, -1)
+
+    @property
+    def duration(self) -> float:
+        return self.n_frames / float(self.sr)
+
+    def frame_range(self, rel_start: float, rel_end: float):
+        """
+        Sample range [a0, a1) for a window given in seconds from the start of the file,
+        matching what `ffmpeg -i in.wav -ss START -to END` keeps.
+        """
+        start_us = _parse_us(rel_start)
+        a0 = _us_to_samples(start_us, self.sr)
+        a1 = a0 + _us_to_samples(_parse_us(rel_end) - start_us, self.sr)
+        a0 = min(max(a0, 0), self.n_frames)
+        return a0, min(max(a1, a0), self.n_frames)
+
+    def chunk_range(self, start: float, end: float):
+        """
+        frame_range for a chunk given in absolute timestamps.
+        """
+        return self.frame_range(start - self.start_ts, end - self.start_ts)
+
+    def sample_range(self, t0: float, t1: float):
+        """
+        Sample range [a0, a1) for absolute timestamps, truncating like int((t - start) * sr).
+        """
+        a0 = min(max(int((t0 - self.start_ts) * self.sr), 0), self.n_frames)
+        a1 = min(max(int((t1 - self.start_ts) * self.sr), a0), self.n_frames)
+        return a0, a1
+
+    def samples(self, t0: float, t1: float) -> np.ndarray:
+        """
+        Zero-copy (n, channels) view of [t0, t1) in the file's own sample type.
+        """
+        return self.data[slice(*self.sample_range(t0, t1))]
+
+    def float_window(self, t0: float, t1: float, dtype=np.float64) -> np.ndarray:
+        """
+        [t0, t1) scaled to [-1, 1] the way soundfile.read does (1-D for mono files).
+        Only the window is converted; float files of the requested dtype come back as a view.
+        """
+        x = self.float_samples(*self.sample_range(t0, t1), dtype=dtype)
+        return x[:, 0] if self.channels == 1 else x
+
+    def float_samples(self, a0: int, a1: int, dtype=np.float64) -> np.ndarray:
+        """
+        Samples [a0, a1) as (n, channels) floats in [-1, 1].
+        """
+        if self.is_float:
+            return self.data[a0:a1].astype(dtype, copy=False)
+        if self.bits <= 16:
+            return self.pcm16(a0, a1).astype(dtype) / 32768.0
+        return self._int32(a0, a1).astype(dtype) / 2147483648.0
+
+    def _int32(self, a0, a1):
+        # 24/32-bit PCM widened to int32, full scale at 2**31
+        x = self.data[a0:a1]
+        if self.bits == 24:
+            b = x.reshape(len(x), self.channels, 3).astype(np.int32)
+            return (b[..., 0] << 8 | b[..., 1] << 16 | b[..., 2] << 24)
+        return x.astype(np.int32)
+
+    def pcm16(self, a0: int, a1: int) -> np.ndarray:
+        """
+        Samples [a0, a1) as (n, channels) int16, converted the way ffmpeg's pcm_s16le
+        encoder does. For 16-bit files this is a view onto the mapped file.
+        """
+        x = self.data[a0:a1]
+        if self.is_float:
+            return np.clip(np.rint(x * 32768.0), -32768, 32767).astype(np.int16)
+        if self.bits == 16:
+            return x
+        if self.bits == 8:
+            return ((x.astype(np.int16) - 128) << 8).astype(np.int16)
+        if self.bits == 24:
+            # little-endian 24-bit: keep the top two bytes
+            b = x.reshape(len(x), self.channels, 3)
+            return (b[..., 1].astype(np.uint16) | (b[..., 2].astype(np.uint16) << 8)).view(np.int16)
+        return (x >> 16).astype(np.int16)
+
+    def write_wav(self, out_path, rel_start: float, rel_end: float):
+        """
+        Write [rel_start, rel_end) as a PCM16 .wav, sample-for-sample what
+        split_media_ffmpeg(..., is_video=False) writes (without ffmpeg's LIST/INFO tag).
+        Returns the int16 samples that were written.
+        """
+        pcm = self.pcm16(*self.frame_range(rel_start, rel_end))
+        with wave.open(str(out_path), "wb") as wf:
+            wf.setnchannels(self.channels)
+            wf.setsampwidth(2)
+            wf.setframerate(self.sr)
+            wf.writeframes(np.ascontiguousarray(pcm, dtype="<i2").tobytes())
+        return pcm
+
+# one mapping per (path, start_ts) per process, shared by the chunker, event detector and vectorizer
+_OPEN = {}
+
+def open_session_audio(path, start_ts: float = 0.0) -> SessionAudio:
+    """
+    Shared SessionAudio for `path`; repeated calls in a process reuse the same mapping.
+    """
+    key = (str(Path(path).resolve()), start_ts)
+    audio = _OPEN.get(key)
+    if audio is None:
+        audio = _OPEN[key] = SessionAudio(path, start_ts=start_ts)
+    return audio
+
+def close_session_audio():
+    _OPEN.clear()
+
+def pcm16_rms(pcm: np.ndarray) -> float:
+    """
+    RMS over all int16 samples (every channel), squared in float64 so it cannot overflow.
+    """
+    if pcm.size == 0:
+        return 0.0
+    x = pcm.astype(np.float64)
+    return float(np.sqrt(np.mean(x * x)))
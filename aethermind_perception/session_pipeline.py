@@ -0,0 +1,248 @@
+# session_pipeline.py
+"""
+In-process session pipeline: chunking, event detection, vectorization and the vector
+merge as stages of a dependency graph, run in one process.
+
+    inputs ─┬─ chunks ── events ──┬─ merged
+            └─ vectors ───────────┘
+
+Stages hand their results to each other in memory and independent stages run at the
+same time (vectors alongside chunks → events). Files are only written for the
+requested outputs:
+  chunks.json                        chunk records
+  session.json                       the manifest event_detector.detect_events reads
+  session_events.json                scored chunk events
+  vector_windows.vec                 the vector store (always written for a row-range merge)
+  vector_windows.jsonl               its JSONL export
+  session_events_with_vectors.json   events with their vectors (row ranges, or inline)
+  seeds.jsonl / seeds.msgpack        the chunks' EventSeeds (seed_sink.SeedSink)
+  chunk_media                        per-chunk .mp4/.wav files
+  metrics.json                       stage wall times plus the timers and counters of
+                                     metrics.py (decode, flow, ..., dropped_frames)
+
+    python session_pipeline.py path/to/session_folder [--out DIR] [--outputs a,b,...]
+"""
+import argparse
+import json
+import os
+import time
+from contextlib import ExitStack
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from chunker import (ACTION_LOG, SESSION_CLOCK_OFFSET, add_segmentation_args, build_session_manifest, chunk_with_cache,
+                     find_session_inputs, segmentation_from_args)
+from event_detector import chunk_events
+from metrics import PROFILERS, Metrics, use_metrics
+from seed_sink import FSYNC_POLICIES, SEED_FORMATS, SeedSink
+from stage_cache import CACHE_DIRNAME, StageCache
+from stream_to_vectors import vectorize_with_cache
+from vector_store import attach_vectors
+
+OUTPUTS = ("chunks.json", "session.json", "session_events.json", "vector_windows.vec",
+           "vector_windows.jsonl", "session_events_with_vectors.json", "seeds.jsonl", "seeds.msgpack",
+           "chunk_media", "metrics.json")
+DEFAULT_OUTPUTS = ("session_events.json", "vector_windows.vec", "session_events_with_vectors.json",
+                   "seeds.jsonl", "metrics.json")
+
+# the stage that produces each output
+_OUTPUT_STAGE = {
+    "chunks.json": "chunks", "session.json": "chunks", "chunk_media": "chunks",
+    "seeds.jsonl": "chunks", "seeds.msgpack": "chunks",
+    "session_events.json": "events",
+    "vector_windows.vec": "vectors", "vector_windows.jsonl": "vectors",
+    "session_events_with_vectors.json": "merged",
+}
+
+class Stage:
+    """
+    A pipeline step: fn is called with the results of `deps` as keyword arguments.
+    """
+    def __init__(self, name, fn, deps=()):
+        self.name, self.fn, self.deps = name, fn, tuple(deps)
+
+def _timed(fn, kwargs):
+    t = time.perf_counter()
+    result = fn(**kwargs)
+    return result, time.perf_counter() - t
+
+def run_stages(stages, targets, max_workers=2):
+    """
+    Run the stages `targets` depend on (and the targets), each one as soon as its deps
+    are done, on a thread pool of max_workers. Returns ({name: result}, {name: seconds}).
+    After a failure nothing new is started; the first exception is raised once the
+    stages already running have finished.
+    """
+    by_name = {s.name: s for s in stages}
+    needed, stack = set(), list(targets)
+    while stack:
+        name = stack.pop()
+        if name not in needed:
+            if name not in by_name:
+                raise KeyError(f"unknown pipeline stage: {name}")
+            needed.add(name)
+            stack.extend(by_name[name].deps)
+    results, timings, running = {}, {}, {}
+    pending = set(needed)
+    error = None
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            if error is None:
+                for name in sorted(pending):
+                    stage = by_name[name]
+                    if all(d in results for d in stage.deps):
+                        pending.discard(name)
+                        fut = pool.submit(_timed, stage.fn, {d: results[d] for d in stage.deps})
+                        running[fut] = name
+            if not running:
+                if error is None:
+                    raise ValueError(f"pipeline stages never became ready (dependency cycle?): {sorted(pending)}")
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = running.pop(fut)
+                try:
+                    results[name], timings[name] = fut.result()
+                except BaseException as e:
+                    error = error or e
+    if error is not None:
+        raise error
+    return results, timings
+
+def session_stages(folder, out_dir, outputs, chunk_duration=2.0, workers=1, inline=False,
+                   chunk_options=None, vector_options=None, cache=None, seed_options=None):
+    """
+    The session pipeline's stages for `folder`, writing `outputs` into out_dir.
+    chunk_options / vector_options are passed on to chunk_video_audio_with_actions
+    and stream_to_vectors.vectorize, seed_options (batch, fsync) to the SeedSinks. With
+    a stage_cache.StageCache, chunks and vectors are reused when their inputs, settings
+    and code are unchanged.
+    """
+    out_dir = Path(out_dir)
+    outputs = set(outputs)
+
+    def write_json(name, data):
+        if name in outputs:
+            (out_dir / name).write_text(json.dumps(data, indent=2))
+
+    def inputs():
+        found = find_session_inputs(folder)
+        if not found["video"] or not found["audio"]:
+            raise FileNotFoundError(f"{folder}: no .mp4 and .wav to process")
+        start = found["start_ts"]
+        found["video_start_ts"] = start + SESSION_CLOCK_OFFSET if start is not None else None
+        return found
+
+    def chunks(inputs):
+        media = "chunk_media" in outputs
+        with ExitStack() as stack:
+            sinks = [stack.enter_context(SeedSink(out_dir / name, **(seed_options or {})))
+                     for name in SEED_FORMATS.values() if name in outputs]
+            def emit(seed):
+                for sink in sinks:
+                    sink.write(seed)
+            records = chunk_with_cache(
+                cache, inputs["video"], inputs["audio"], inputs["actions"] or ACTION_LOG, chunk_duration,
+                str(out_dir), inputs["video_start_ts"], write_chunks="copy" if media else "none",
+                write_audio=media, workers=workers,
+                seeds=emit if sinks else None,
+                **(chunk_options or {}))
+        write_json("chunks.json", records)
+        manifest = build_session_manifest(inputs["session_json"], records, inputs["video"],
+                                          inputs["audio"], inputs["video_start_ts"])
+        write_json("session.json", manifest)
+        return manifest
+
+    def events(chunks):
+        found = chunk_events(chunks["chunks"], chunks["media"], out_dir)
+        write_json("session_events.json", found)
+        return found
+
+    def vectors(inputs):
+        path = out_dir / "vector_windows.vec" if "vector_windows.vec" in outputs else None
+        store = vectorize_with_cache(cache, folder, path, **(vector_options or {}))
+        if "vector_windows.jsonl" in outputs:
+            store.export_jsonl(out_dir / "vector_windows.jsonl")
+        return store
+
+    def merged(events, vectors):
+        records = [dict(e) for e in events]
+        ref = None if inline or vectors.path is None else os.path.relpath(vectors.path, out_dir)
+        attach_vectors(records, vectors, offset=SESSION_CLOCK_OFFSET, store_ref=ref)
+        write_json("session_events_with_vectors.json", records)
+        return records
+
+    return [
+        Stage("inputs", inputs),
+        Stage("chunks", chunks, ["inputs"]),
+        Stage("events", events, ["chunks"]),
+        Stage("vectors", vectors, ["inputs"]),
+        Stage("merged", merged, ["events", "vectors"]),
+    ]
+
+def run_session(folder, out_dir=None, outputs=DEFAULT_OUTPUTS, max_workers=None, inline=False,
+                cache_dir=None, **options):
+    """
+    Run the pipeline for a session folder; out_dir defaults to the folder itself.
+    cache_dir is a stage cache folder (none by default).
+    max_workers stages run at once, by default 2 (one on a single-core machine, where
+    overlapping the CPU-bound stages only adds switching).
+    Returns ({stage: result}, {stage: seconds}); see session_stages for the options.
+    """
+    if max_workers is None:
+        max_workers = min(2, os.cpu_count() or 1)
+    outputs = set(outputs)
+    unknown = outputs - set(OUTPUTS)
+    if unknown:
+        raise ValueError(f"unknown pipeline outputs: {sorted(unknown)}")
+    if "session_events_with_vectors.json" in outputs and not inline:
+        outputs.add("vector_windows.vec")  # the merged events point into it
+    out_dir = Path(out_dir or folder)
+    if "session.json" in outputs and out_dir.resolve() == Path(folder).resolve():
+        raise ValueError("session.json output would overwrite the recorder's session.json; use another out_dir")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    cache = StageCache(cache_dir) if cache_dir is not None else None
+    stages = session_stages(folder, out_dir, outputs, inline=inline, cache=cache, **options)
+    targets = sorted({_OUTPUT_STAGE[o] for o in outputs if o in _OUTPUT_STAGE})
+    if "metrics.json" not in outputs:
+        return run_stages(stages, targets, max_workers=max_workers)
+    t = time.perf_counter()
+    with use_metrics(Metrics()) as metrics:
+        results, timings = run_stages(stages, targets, max_workers=max_workers)
+    metrics.write(out_dir / "metrics.json", session=Path(folder).name,
+                  wall_s=time.perf_counter() - t, stages=timings)
+    return results, timings
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Run the session pipeline in one process")
+    parser.add_argument("folder", help="Session folder (screen.mp4, audio.wav, actions.jsonl, session.json)")
+    parser.add_argument("--out", default=None, help="Output folder (default: the session folder)")
+    parser.add_argument("--outputs", default=",".join(DEFAULT_OUTPUTS),
+                        help=f"Comma-separated files to write, from: {', '.join(OUTPUTS)}")
+    parser.add_argument("--duration", type=float, default=2.0, help="Chunk length (s)")
+    parser.add_argument("--workers", type=int, default=1, help="Chunker worker processes")
+    parser.add_argument("--max_workers", type=int, default=None, help="Stages run at the same time (default 2, 1 on one core)")
+    parser.add_argument("--inline", action="store_true", help="Copy vectors into the merged events")
+    parser.add_argument("--cache", default=None, help=f"Stage cache folder (default: <out>/{CACHE_DIRNAME})")
+    parser.add_argument("--no_cache", action="store_true", help="Recompute every stage")
+    parser.add_argument("--cache_media", action="store_true",
+                        help="Also keep the chunk .mp4/.wav files in the cache instead of cutting them again on a hit")
+    parser.add_argument("--profile_chunk", type=int, default=None,
+                        help="Profile this chunk's processing into the output folder (with --no_cache)")
+    parser.add_argument("--profiler", choices=PROFILERS, default="cprofile")
+    parser.add_argument("--seed_fsync", choices=FSYNC_POLICIES, default="close",
+                        help="When seeds files are fsynced: never, once at the end, or after every batch")
+    add_segmentation_args(parser)
+    args = parser.parse_args(argv)
+    cache_dir = None if args.no_cache else args.cache or Path(args.out or args.folder) / CACHE_DIRNAME
+    _, timings = run_session(args.folder, args.out, [o for o in args.outputs.split(",") if o],
+                             max_workers=args.max_workers, inline=args.inline, cache_dir=cache_dir,
+                             chunk_duration=args.duration, workers=args.workers,
+                             chunk_options={"profile_chunk": args.profile_chunk, "profiler": args.profiler,
+                                            "segmentation": segmentation_from_args(args),
+                                            "cache_media": args.cache_media},
+                             seed_options={"fsync": args.seed_fsync})
+    for name, seconds in timings.items():
+        print(f"[pipeline] {name}: {seconds:.2f} s")
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,255 @@
+# stage_cache.py
+"""
+Content-addressed cache for pipeline stage outputs.
+
+A stage's key is a digest of its input media (content, not path), its parameters and
+the source code it runs (code_version), so a rerun with the same inputs and settings
+reuses the stored result, and a change to any of them (a new recording, another
+--duration, an edited flow estimator) misses. Entries live under
+
+    <root>/<stage>/<key>/entry.json   the stage's JSON result
+    <root>/<stage>/<key>/...          its files (chunk media, a vector store)
+
+Entries are built in a temporary folder and renamed into place, so readers only ever
+see complete ones. Files go in and out by reflink where the filesystem supports it,
+else by copy; never by hardlink, because later runs rewrite their outputs in place.
+Input digests are remembered per inode under <root>/digests, so hardlinked provenance
+copies (link_input) of a recording are hashed only once.
+"""
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import threading
+import types
+from functools import lru_cache
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # not on Windows
+    fcntl = None
+
+CACHE_DIRNAME = ".stage_cache"
+FICLONE = getattr(fcntl, "FICLONE", 0x40049409)  # the constant is only exported from 3.12
+_PACKAGE_DIR = Path(__file__).resolve().parent
+_DIGESTS = {}
+_LOCK = threading.Lock()
+
+def clone_file(src, dst):
+    """
+    Copy src to dst as a reflink (copy-on-write, no data copied) where the filesystem
+    supports it, else as a full copy. Returns "reflink" or "copy".
+    """
+    dst = Path(dst)
+    if dst.exists() or dst.is_symlink():
+        dst.unlink()  # never write through an existing (possibly hardlinked) file
+    if fcntl is not None:
+        try:
+            with open(src, "rb") as fi, open(dst, "wb") as fo:
+                fcntl.ioctl(fo.fileno(), FICLONE, fi.fileno())
+            shutil.copystat(src, dst)
+            return "reflink"
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+    return "copy"
+
+def clone_tree(src, dst):
+    """
+    clone_file for a file or, recursively, a directory.
+    """
+    src, dst = Path(src), Path(dst)
+    if not src.is_dir():
+        return clone_file(src, dst)
+    dst.mkdir(parents=True, exist_ok=True)
+    for item in src.iterdir():
+        clone_tree(item, dst / item.name)
+
+def link_input(src, dst):
+    """
+    Provenance copy of an input file that is only ever read: a hardlink, else a reflink,
+    else a full copy. Returns "existing", "hardlink", "reflink" or "copy".
+    """
+    dst = Path(dst)
+    if dst.exists():
+        if os.path.samefile(src, dst):
+            return "existing"
+        dst.unlink()
+    try:
+        os.link(src, dst)
+        return "hardlink"
+    except OSError:  # another filesystem, or links not allowed
+        return clone_file(src, dst)
+
+def file_digest(path, root=None):
+    """
+    blake2b hex digest of a file's content, None if it doesn't exist. Remembered per
+    (device, inode, size, mtime): in memory, and under <root>/digests when given.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    stamp = f"{st.st_dev}-{st.st_ino}-{st.st_size}-{st.st_mtime_ns}"
+    digest = _DIGESTS.get(stamp)
+    if digest is not None:
+        return digest
+    side = Path(root) / "digests" / stamp if root is not None else None
+    if side is not None and side.exists():
+        digest = side.read_text().strip()
+    else:
+        h = hashlib.blake2b(digest_size=20)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        if side is not None:
+            side.parent.mkdir(parents=True, exist_ok=True)
+            tmp = side.with_name(f"{side.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(digest)
+            os.replace(tmp, side)
+    _DIGESTS[stamp] = digest
+    return digest
+
+def _local_file(obj):
+    try:
+        path = inspect.getsourcefile(obj)
+    except TypeError:  # builtins, C extensions
+        return None
+    # generated code (dataclass methods, ...) reports a pseudo file like "<string>"
+    if path is None or not os.path.isfile(path) or Path(path).resolve().parent != _PACKAGE_DIR:
+        return None
+    return str(Path(path).resolve())
+
+def _code_names(code):
+    names = list(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names += _code_names(const)
+    return names
+
+@lru_cache(maxsize=None)
+def code_version(*objs):
+    """
+    Digest of the source the given functions, classes or modules run: their own source
+    plus, transitively, every function/class of this package they reference and the
+    simple constants they read. A module counts as its whole file. Editing a part of a
+    module that a stage never calls leaves the stage's key unchanged. Computed once per
+    process.
+    """
+    parts, seen, whole = set(), set(), set()
+    stack = list(objs)
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, (staticmethod, classmethod)):
+            obj = obj.__func__
+        elif isinstance(obj, property):
+            stack += [f for f in (obj.fget, obj.fset) if f is not None]
+            continue
+        obj = inspect.unwrap(obj) if callable(obj) else obj
+        if not isinstance(obj, (types.ModuleType, types.FunctionType, type)):
+            continue
+        path = _local_file(obj)
+        if path is None:
+            continue
+        ident = (path, getattr(obj, "__qualname__", None))
+        if ident in seen:
+            continue
+        seen.add(ident)
+        if isinstance(obj, types.ModuleType):
+            whole.add(path)
+            parts.add(Path(path).read_text())
+            stack += list(vars(obj).values())
+        elif isinstance(obj, type):
+            if path not in whole:
+                parts.add(inspect.getsource(obj))
+            stack += list(vars(obj).values())
+        else:
+            if path not in whole:
+                parts.add(inspect.getsource(obj))
+            for name in _code_names(obj.__code__):
+                value = obj.__globals__.get(name)
+                if isinstance(value, (bool, int, float, str, bytes, tuple, type(None))):
+                    parts.add(f"{name}={value!r}")
+                elif value is not None:
+                    stack.append(value)
+    h = hashlib.blake2b(digest_size=20)
+    for part in sorted(parts):
+        h.update(part.encode())
+    return h.hexdigest()
+
+class StageCache:
+    """
+    Stage results under `root`, addressed by StageCache.key.
+    """
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def key(self, stage, inputs=(), params=None, code=None):
+        """
+        Key for a stage run over the input files `inputs` (by content), with the
+        JSON-able `params` and a code_version digest.
+        """
+        spec = {
+            "stage": stage,
+            "inputs": [file_digest(p, self.root) for p in inputs],
+            "params": params or {},
+            "code": code,
+        }
+        blob = json.dumps(spec, sort_keys=True, default=str).encode()
+        return hashlib.blake2b(blob, digest_size=20).hexdigest()
+
+    def entry(self, stage, key):
+        return self.root / stage / key
+
+    def get(self, stage, key):
+        """
+        (entry folder, stored data) for a complete entry, or None.
+        """
+        path = self.entry(stage, key)
+        try:
+            with open(path / "entry.json") as f:
+                return path, json.load(f)["data"]
+        except FileNotFoundError:
+            return None
+
+    def put(self, stage, key, data=None, files=None):
+        """
+        Store a stage result: `data` (JSON-able) and `files`, a {name: source} mapping
+        where a source is a file or folder to clone, or a callable that writes it given
+        the destination path. Returns the entry folder.
+        """
+        final = self.entry(stage, key)
+        tmp = final.with_name(f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        tmp.mkdir(parents=True)
+        try:
+            for name, source in (files or {}).items():
+                if callable(source):
+                    source(tmp / name)
+                else:
+                    clone_tree(source, tmp / name)
+            with open(tmp / "entry.json", "w") as f:
+                json.dump({"stage": stage, "key": key, "data": data}, f)
+            with _LOCK:
+                try:
+                    os.rename(tmp, final)
+                except OSError:  # already stored by another run
+                    if not (final / "entry.json").exists():
+                        raise
+        finally:
+            if tmp.exists():
+                shutil.rmtree(tmp)
+        return final
+
+    def restore(self, entry, name, dst):
+        """
+        Clone the entry's file or folder `name` to dst.
+        """
+        dst = Path(dst)
+        if dst.is_dir() and not dst.is_symlink():
+            shutil.rmtree(dst)
+        clone_tree(Path(entry) / name, dst)
@@ -3,12 +3,20 @@ import os
 import json
 import math
 import datetime
-import cv2
-import soundfile as sf
 import numpy as np
+from session_audio import open_session_audio
+from action_index import ActionIndex, action_features
+from action_ingest import load_action_index
+from video_stream import iter_video_windows
+from vector_store import VectorBuffer, VectorStore, VectorStoreWriter, vector_columns
+from stage_cache import CACHE_DIRNAME, StageCache, code_version
+from metrics import count, timer
+from embedders import (AUDIO_EMBEDDERS, VIDEO_EMBEDDERS, batched, get_audio_embedder,
+                       get_video_embedder, prefetch)
 
 """
-Breaks down a scene into `vector_windows.jsonl` in the `aethermind-input` folder specified and represents the following: 
+Breaks down a scene into a VectorWindow store, `vector_windows.vec/` (see vector_store.py), in the `aethermind-input` folder specified
+(`--jsonl` also writes the old `vector_windows.jsonl`) and represents the following: 
 a sequence of half-second “snapshots” of your scene, each reduced to a compact 9-dimensional feature vector. Here’s exactly what each field means:
 
     t = the timestamp (in seconds since the epoch) at the midpoint of that 0.5 s window.
@@ -39,25 +47,36 @@ a sequence of half-second “snapshots” of your scene, each reduced to a compa
             x[7] = total key-press count
 
             x[8] = total mouse movement distance (in pixels)
+
+    With --video_embedder / --audio_embedder (embedders.py) the video and audio parts are
+    that embedder's output instead, so x has video dim + audio dim + 4 values; the store
+    header lists them in meta["x"].
+
+    action_feat = the action summary as named fields (left_clicks, right_clicks, mouse_dx,
+    mouse_dy, key_presses); mouse_dx/dy are the net cursor movement over the window.
     """
 
-def embed_video(frames):
+# VectorWindow.action_feat fields (EVENT_OBJECT.md)
+ACTION_FEAT_KEYS = ("left_clicks", "right_clicks", "mouse_dx", "mouse_dy", "key_presses")
+ACTION_FEAT_DTYPE = [("left_clicks", "<i8"), ("right_clicks", "<i8"), ("mouse_dx", "<f8"),
+                     ("mouse_dy", "<f8"), ("key_presses", "<i8")]
+# the action part of x, after the video and audio embeddings
+ACTION_X_LABELS = ("left_clicks", "right_clicks", "key_presses", "mouse_dist")
+
+def embed_video(frames, embedder="mean_rgb"):
     """
-    Stub: Replace with actual video embedding, e.g. CLIP.
+    One window through a video embedder (embedders.py; "mean_rgb" is the mean colour stub).
     `frames` is a list of numpy arrays.
-    Return a 1D numpy vector.
+    Return a 1D numpy vector. main() batches windows instead.
     """
-    if not frames:
-        return np.zeros(3)  # adjust size as needed
-    # Example: mean RGB values across frames
-    stack = np.stack([f.mean(axis=(0,1)) for f in frames])
-    return stack.mean(axis=0)
+    emb = get_video_embedder(embedder)
+    return emb.embed([emb.prepare(frames)])[0]
 
 def embed_audio(audio_segment, sample_rate):
     """
-    Stub: Replace with actual audio embedding, e.g. VGGish.
+    Stub for a single array: mean and std, what the "mean_std" audio embedder gives.
     `audio_segment` is a numpy array of shape (n_samples,).
-    Return a 1D numpy vector.
+    Return a 1D numpy vector. main() uses the batched embedders (embedders.py).
     """
     if audio_segment.size == 0:
         return np.zeros(2)
@@ -66,27 +85,32 @@ def embed_audio(audio_segment, sample_rate):
 def summarize_actions(actions, start_ts, end_ts):
     """
     Summarize action events in [start_ts, end_ts].
-    `actions` is a list of dicts with 'time', 'keys', 'mouse'.
+    `actions` is an ActionIndex (or a list of dicts with 'time', 'keys', 'mouse', which
+    is indexed first). For many windows use action_index.action_features directly.
     Return a fixed-length numpy vector.
     """
-    # Filter actions in window
-    window_actions = [a for a in actions if start_ts <= a['time'] < end_ts]
-    left_clicks = sum(1 for a in window_actions if a['mouse']['buttons']['left'])
-    right_clicks = sum(1 for a in window_actions if a['mouse']['buttons']['right'])
-    key_presses = sum(len(a['keys']) for a in window_actions)
-    # mouse movement distance
-    mouse_dist = 0.0
-    for prev, a in zip(window_actions, window_actions[1:]):
-        prev_pos = np.array(prev['mouse']['position'])
-        curr_pos = np.array(a['mouse']['position'])
-        mouse_dist += np.linalg.norm(curr_pos - prev_pos)
-    return np.array([left_clicks, right_clicks, key_presses, mouse_dist])
+    if isinstance(actions, list):
+        actions = ActionIndex.from_records(actions)
+    f = action_features(actions, start_ts, end_ts)
+    return np.array([f["left_clicks"][0], f["right_clicks"][0], f["key_presses"][0], f["mouse_dist"][0]])
 
 def load_actions(path):
-    with open(path, 'r') as f:
-        return [json.loads(line) for line in f]
+    # parsed once into columns and cached next to the log (see action_ingest)
+    return load_action_index(path)
 
-def main(folder):
+def vectorize(folder, out_path=None, video_embedder="mean_rgb", audio_embedder="mean_std",
+              video_dim=None, audio_dim=None, batch_size=64, max_frames=None, frame_size=None):
+    """
+    VectorWindows for a session folder as a VectorStore: written to the store directory
+    `out_path`, or kept in memory when out_path is None.
+
+    The video is decoded once, front to back, and each frame goes to the window its
+    timestamp falls in. max_frames keeps at most that many evenly spaced frames per
+    window (the rest are skipped without conversion) and frame_size=(w, h) downscales
+    them on read. `batch_size` windows are embedded per call; frames are decoded and
+    reduced to the video embedder's input (prepare) on a background thread up to two
+    batches ahead.
+    """
     # Load session metadata
     with open(os.path.join(folder, 'session.json'), 'r') as f:
         session = json.load(f)
@@ -105,8 +129,8 @@ def main(folder):
     # Open video and audio
     video_path = os.path.join(folder, 'screen.mp4')
     audio_path = os.path.join(folder, 'audio.wav')
-    cap = cv2.VideoCapture(video_path)
-    audio, sr = sf.read(audio_path)
+    # memory-mapped, shared with the chunker/event detector; windows are converted one at a time
+    audio = open_session_audio(audio_path, start_ts=start_time)
 
     # Load actions
     actions = load_actions(os.path.join(folder, 'actions.jsonl'))
@@ -114,54 +138,123 @@ def main(folder):
     # Define window parameters
     window_size = 0.5  # seconds
     num_windows = math.ceil(duration / window_size)
+    windows = [(start_time + i * window_size, min(start_time + (i + 1) * window_size, start_time + duration))
+               for i in range(num_windows)]
+
+    # Action features for every window in one pass over the action columns
+    idx = np.arange(num_windows)
+    t0s = start_time + idx * window_size
+    t1s = np.minimum(start_time + (idx + 1) * window_size, start_time + duration)
+    feats = action_features(actions, t0s, t1s)
+
+    video_emb = get_video_embedder(video_embedder, video_dim)
+    audio_emb = get_audio_embedder(audio_embedder, audio_dim)
+    labels = [*video_emb.labels, *audio_emb.labels, *ACTION_X_LABELS]
+    meta = {'window': window_size, 'x': labels,
+            'video_embedder': video_embedder, 'audio_embedder': audio_embedder}
 
     # Prepare output
-    out_path = os.path.join(folder, 'vector_windows.jsonl')
-    with open(out_path, 'w') as out_file:
-        for i in range(num_windows):
-            t0 = start_time + i * window_size
-            t1 = min(start_time + (i + 1) * window_size, start_time + duration)
-
-            # Video frames in [t0, t1)
-            frames = []
-            cap.set(cv2.CAP_PROP_POS_MSEC, (t0 - start_time) * 1000)
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                ts = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0 + start_time
-                if ts >= t1:
-                    break
-                frames.append(frame)
-
-            # Audio samples in [t0, t1)
-            a0 = int((t0 - start_time) * sr)
-            a1 = int((t1 - start_time) * sr)
-            audio_seg = audio[a0:a1] if a1 > a0 else np.array([])
-
-            # Compute embeddings
-            v_emb = embed_video(frames)
-            a_emb = embed_audio(audio_seg, sr)
-            c_feat = summarize_actions(actions, t0, t1)
-
-            # Fuse into single vector
-            x = np.concatenate([v_emb, a_emb, c_feat]).tolist()
-            record = {'t': (t0 + t1) / 2.0, 'x': x}
-
-            # Write JSON line
-            out_file.write(json.dumps(record) + '\n')
-
-            # Progress update
-            if (i + 1) % max(1, num_windows // 10) == 0 or (i + 1) == num_windows:
-                print(f"Processed window {i+1}/{num_windows} ({(i+1)/num_windows*100:.1f}%)")
-
-    cap.release()
+    columns = vector_columns(len(labels), action_feat=ACTION_FEAT_DTYPE)
+    if out_path is None:
+        sink = VectorBuffer(columns, meta=meta)
+    else:
+        sink = VectorStoreWriter(out_path, columns, meta=meta, truncate=True)
+    rel_windows = [(t0 - start_time, t1 - start_time) for t0, t1 in windows]
+    frames = iter_video_windows(video_path, rel_windows, max_frames=max_frames, target_size=frame_size)
+
+    def prepared():
+        # runs on the prefetch thread
+        while True:
+            with timer("vector_decode"):
+                window = next(frames, None)
+            if window is None:
+                return
+            with timer("vector_embed"):
+                yield video_emb.prepare(window[0])
+
+    decoded = prefetch(prepared(), depth=2 * batch_size)
+    with sink as store:
+        i = 0
+        for batch in batched(decoded, batch_size):
+            # Compute embeddings for the whole batch
+            with timer("vector_embed"):
+                v_emb = video_emb.embed(batch)
+                a_emb = audio_emb.embed(audio, [audio.sample_range(*windows[j]) for j in range(i, i + len(batch))])
+            with timer("vector_write"):
+                for k in range(len(batch)):
+                    t0, t1 = windows[i]
+                    c_feat = np.array([feats["left_clicks"][i], feats["right_clicks"][i],
+                                       feats["key_presses"][i], feats["mouse_dist"][i]])
+
+                    # Fuse into single vector
+                    x = np.concatenate([v_emb[k], a_emb[k], c_feat])
+                    store.append(t=(t0 + t1) / 2.0, x=x, action_feat={key: feats[key][i] for key in ACTION_FEAT_KEYS})
+
+                    # Progress update
+                    if (i + 1) % max(1, num_windows // 10) == 0 or (i + 1) == num_windows:
+                        print(f"Processed window {i+1}/{num_windows} ({(i+1)/num_windows*100:.1f}%)")
+                    i += 1
+            count("vector_windows", len(batch))
+
+    return sink.store() if out_path is None else VectorStore(out_path)
+
+def vectorize_with_cache(cache, folder, out_path=None, **options):
+    """
+    vectorize through a stage_cache.StageCache (None runs it uncached), keyed on the
+    folder's session.json, screen.mp4, audio.wav and actions.jsonl contents, the options
+    and the vectorizer code. A hit is cloned to out_path, or opened from the cache
+    when out_path is None.
+    """
+    if cache is None:
+        return vectorize(folder, out_path, **options)
+    inputs = [os.path.join(folder, name) for name in ('session.json', 'screen.mp4', 'audio.wav', 'actions.jsonl')]
+    key = cache.key("vectors", inputs, options, code_version(vectorize))
+    hit = cache.get("vectors", key)
+    if hit is not None:
+        entry, _ = hit
+        count("cache_hits")
+        print(f"[INFO] Reused cached vector windows ({key[:12]})")
+        if out_path is None:
+            return VectorStore(os.path.join(entry, 'vector_windows.vec'))
+        cache.restore(entry, 'vector_windows.vec', out_path)
+        return VectorStore(out_path)
+    store = vectorize(folder, out_path, **options)
+    cache.put("vectors", key, files={'vector_windows.vec': out_path if out_path is not None else store.save})
+    return store
+
+def main(folder, jsonl=False, cache=None, **options):
+    """
+    Vectorize a session folder into `vector_windows.vec` (see vectorize for the options),
+    through the StageCache `cache` if given.
+    """
+    out_path = os.path.join(folder, 'vector_windows.vec')
+    store = vectorize_with_cache(cache, folder, out_path, **options)
     print(f"Vector windows saved to {out_path}")
+    if jsonl:
+        store.export_jsonl(os.path.join(folder, 'vector_windows.jsonl'))
 
-if __name__ == '__main__':
+def cli(argv=None):
     parser = argparse.ArgumentParser(
         description="Stream input folder into VectorWindow objects"
     )
     parser.add_argument('--folder', required=True, help="Path to input folder")
-    args = parser.parse_args()
-    main(args.folder)
+    parser.add_argument('--jsonl', action='store_true', help="Also export vector_windows.jsonl")
+    parser.add_argument('--video_embedder', choices=VIDEO_EMBEDDERS, default="mean_rgb")
+    parser.add_argument('--audio_embedder', choices=AUDIO_EMBEDDERS, default="mean_std")
+    parser.add_argument('--video_dim', type=int, default=None, help="Output size of the video embedder, where it has one")
+    parser.add_argument('--audio_dim', type=int, default=None, help="Output size of the audio embedder, where it has one")
+    parser.add_argument('--batch_size', type=int, default=64, help="Windows per embedder call")
+    parser.add_argument('--max_frames', type=int, default=None,
+                        help="Embed at most this many evenly spaced frames per window (default: all)")
+    parser.add_argument('--frame_size', type=str, default=None,
+                        help="Downscale frames to WIDTHxHEIGHT before embedding (e.g. 640x360)")
+    parser.add_argument('--cache', default=None, help=f"Stage cache folder (default: <folder>/{CACHE_DIRNAME})")
+    parser.add_argument('--no_cache', action='store_true', help="Always recompute the vectors")
+    args = parser.parse_args(argv)
+    cache = None if args.no_cache else StageCache(args.cache or os.path.join(args.folder, CACHE_DIRNAME))
+    main(args.folder, jsonl=args.jsonl, cache=cache, video_embedder=args.video_embedder, audio_embedder=args.audio_embedder,
+         video_dim=args.video_dim, audio_dim=args.audio_dim, batch_size=args.batch_size, max_frames=args.max_frames,
+         frame_size=tuple(int(v) for v in args.frame_size.lower().split("x")) if args.frame_size else None)
+
+if __name__ == '__main__':
+    cli()
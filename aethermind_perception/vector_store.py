@@ -0,0 +1,300 @@
+# vector_store.py
+"""
+VectorWindow store: a directory with one raw little-endian file per column and a JSON
+header, so vectors are appended in place and read back memory-mapped.
+
+    vector_windows.vec/
+      header.json      {"version", "rows", "columns": [{"name", "dtype", "shape"}], "meta"}
+      t.bin            float64 window midpoints (epoch seconds), ascending
+      x.bin            (rows, dim) float32 vectors, laid out as meta["x"] describes
+      action_feat.bin  named action features, one structured row per window
+
+"rows" in the header is the committed row count: bytes past it (an append that died
+before flush) are ignored by readers and cut off by the next writer.
+
+    python vector_store.py path/to/vector_windows.vec --jsonl out.jsonl
+"""
+import argparse
+import json
+import os
+from pathlib import Path
+import numpy as np
+from action_index import TimeIndex
+from action_ingest import read_jsonl
+
+HEADER = "header.json"
+VERSION = 1
+
+def vector_columns(dim, dtype="float32", action_feat=None):
+    """
+    Columns of a VectorWindow store: t, x of `dim` values and, if given, action_feat as
+    a structured row of (name, dtype) fields.
+    """
+    cols = {"t": (np.float64, ()), "x": (dtype, (dim,))}
+    if action_feat:
+        cols["action_feat"] = (list(action_feat), ())
+    return cols
+
+def _dtype_to_json(dt):
+    return dt.descr if dt.names else dt.str
+
+def _dtype_from_json(d):
+    return np.dtype([tuple(f) for f in d] if isinstance(d, list) else d)
+
+def _columns(columns):
+    return {name: (np.dtype(dt).newbyteorder("<"), tuple(shape)) for name, (dt, shape) in columns.items()}
+
+def _read_header(path):
+    with open(Path(path) / HEADER) as f:
+        header = json.load(f)
+    if header.get("version") != VERSION:
+        raise ValueError(f"{path}: unsupported vector store version {header.get('version')!r}")
+    cols = {c["name"]: (_dtype_from_json(c["dtype"]), tuple(c["shape"])) for c in header["columns"]}
+    return header["rows"], cols, header.get("meta", {})
+
+def _row_bytes(dt, shape):
+    return dt.itemsize * int(np.prod(shape, dtype=np.int64))
+
+class VectorStoreWriter:
+    """
+    Appends rows to a store, creating it (or with truncate=True, starting it over).
+    Rows are buffered and written every `flush_rows`; flush() makes them visible to
+    readers by rewriting the header atomically. Rows must come in ascending t.
+    """
+    def __init__(self, path, columns=None, meta=None, truncate=False, flush_rows=1024):
+        self.path = Path(path)
+        self.flush_rows = flush_rows
+        if (self.path / HEADER).exists() and not truncate:
+            self.rows, self.columns, self.meta = _read_header(self.path)
+            if columns is not None and _columns(columns) != self.columns:
+                raise ValueError(f"{path}: store has columns {self.columns}, not {_columns(columns)}")
+            self.meta.update(meta or {})
+        else:
+            if columns is None:
+                raise ValueError(f"{path}: no vector store here and no columns given")
+            self.path.mkdir(parents=True, exist_ok=True)
+            self.rows, self.columns, self.meta = 0, _columns(columns), dict(meta or {})
+        self._files = {}
+        for name, (dt, shape) in self.columns.items():
+            f = open(self.path / f"{name}.bin", "a+b")
+            size = self.rows * _row_bytes(dt, shape)
+            if f.seek(0, os.SEEK_END) < size:
+                f.close()
+                raise ValueError(f"{path}: {name}.bin is shorter than the {self.rows} committed rows")
+            f.truncate(size)
+            self._files[name] = f
+        self.last_t = -np.inf
+        if self.rows:
+            with open(self.path / "t.bin", "rb") as f:
+                f.seek((self.rows - 1) * 8)
+                self.last_t = float(np.frombuffer(f.read(8), dtype="<f8")[0])
+        self._buffer = {name: [] for name in self.columns}
+        self._write_header()
+
+    def append(self, **row):
+        """
+        Add one row; every column is required, structured columns may be given as dicts.
+        """
+        if row.keys() != self._buffer.keys():
+            raise ValueError(f"row has columns {sorted(row)}, store has {sorted(self._buffer)}")
+        t = float(row["t"])
+        if t < self.last_t:
+            raise ValueError(f"rows must be appended in time order ({t} after {self.last_t})")
+        self.last_t = t
+        for name, value in row.items():
+            dt = self.columns[name][0]
+            if dt.names and isinstance(value, dict):
+                value = tuple(value[k] for k in dt.names)
+            self._buffer[name].append(value)
+        if len(self._buffer["t"]) >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        n = len(self._buffer["t"])
+        if n:
+            for name, (dt, shape) in self.columns.items():
+                np.array(self._buffer[name], dtype=dt).reshape(n, *shape).tofile(self._files[name])
+                self._files[name].flush()
+                self._buffer[name].clear()
+            self.rows += n
+        self._write_header()
+
+    def close(self):
+        if self._files:
+            self.flush()
+            for f in self._files.values():
+                f.close()
+            self._files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write_header(self):
+        header = {
+            "version": VERSION,
+            "rows": self.rows,
+            "columns": [{"name": name, "dtype": _dtype_to_json(dt), "shape": list(shape)}
+                        for name, (dt, shape) in self.columns.items()],
+            "meta": self.meta,
+        }
+        tmp = self.path / (HEADER + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(header, f, indent=2)
+        os.replace(tmp, self.path / HEADER)
+
+class VectorBuffer(VectorStoreWriter):
+    """
+    VectorStoreWriter's append() with the rows kept in memory; store() gives a
+    VectorStore over them (no files), for stages that hand vectors on in-process.
+    """
+    def __init__(self, columns, meta=None):
+        self.path = None
+        self.flush_rows = float("inf")
+        self.rows, self.columns, self.meta = 0, _columns(columns), dict(meta or {})
+        self._files = {}
+        self.last_t = -np.inf
+        self._buffer = {name: [] for name in self.columns}
+
+    def flush(self):
+        pass  # rows stay in _buffer until store()
+
+    def close(self):
+        pass
+
+    def store(self):
+        n = len(self._buffer["t"])
+        arrays = {name: np.array(self._buffer[name], dtype=dt).reshape(n, *shape)
+                  for name, (dt, shape) in self.columns.items()}
+        return VectorStore.from_arrays(arrays, self.meta)
+
+class VectorStore:
+    """
+    A store opened read-only: every column is a np.memmap of the committed rows
+    (`t`, `x`, ... as attributes and in `arrays`). Indexing gives the VectorWindow dicts
+    vector_windows.jsonl used to hold, built only for the rows asked for.
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        self.rows, self.columns, self.meta = _read_header(self.path)
+        self.arrays = {}
+        for name, (dt, shape) in self.columns.items():
+            if self.rows:
+                arr = np.memmap(self.path / f"{name}.bin", dtype=dt, mode="r", shape=(self.rows, *shape))
+            else:
+                arr = np.zeros((0, *shape), dtype=dt)
+            self.arrays[name] = arr
+        self.t = self.arrays["t"]
+        self.x = self.arrays.get("x")
+
+    @classmethod
+    def from_arrays(cls, arrays, meta=None):
+        """
+        A store over in-memory column arrays (same first dimension, "t" ascending).
+        """
+        self = cls.__new__(cls)
+        self.path = None
+        self.arrays = dict(arrays)
+        self.rows = len(self.arrays["t"])
+        self.columns = {name: (a.dtype, a.shape[1:]) for name, a in self.arrays.items()}
+        self.meta = dict(meta or {})
+        self.t = self.arrays["t"]
+        self.x = self.arrays.get("x")
+        return self
+
+    def save(self, path):
+        """
+        Write the rows to a store directory at `path` (replacing it); returns the on-disk store.
+        """
+        with VectorStoreWriter(path, self.columns, meta=self.meta, truncate=True) as w:
+            for name, arr in self.arrays.items():
+                np.ascontiguousarray(arr).tofile(w._files[name])
+            w.rows = self.rows
+        return VectorStore(path)
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.records(*i.indices(self.rows)[:2])
+        if i < 0:
+            i += self.rows
+        if not 0 <= i < self.rows:
+            raise IndexError(i)
+        return self.records(i, i + 1)[0]
+
+    def __iter__(self):
+        step = 4096
+        for i0 in range(0, self.rows, step):
+            yield from self.records(i0, min(i0 + step, self.rows))
+
+    def records(self, i0, i1):
+        """
+        Rows [i0, i1) as {"t": ..., "x": [...], "action_feat": {...}} dicts.
+        """
+        cols = {}
+        for name, arr in self.arrays.items():
+            part = arr[i0:i1]
+            names = arr.dtype.names
+            cols[name] = [dict(zip(names, r)) for r in part.tolist()] if names else part.tolist()
+        return [dict(zip(cols, r)) for r in zip(*cols.values())]
+
+    def index(self, offset=0.0):
+        """
+        TimeIndex over the rows at t + offset: span() gives row ranges, window() records.
+        """
+        return TimeIndex(self, self.t + offset if offset else np.asarray(self.t))
+
+    def export_jsonl(self, out_path):
+        """
+        Write the store as vector_windows.jsonl (for debugging / older tools).
+        """
+        with open(out_path, "w") as f:
+            for r in self:
+                f.write(json.dumps(r) + "\n")
+
+def attach_vectors(chunks, vectors, offset=0.0, store_ref=None):
+    """
+    Give every chunk the vectors with t + offset in [start, end). `vectors` is a
+    VectorStore or a list of VectorWindow dicts. With a store and `store_ref` (how the
+    output should point at the store, usually a relative path) chunks get "vector_store"
+    and "vector_rows" [i0, i1); otherwise the dicts are copied in as "vectors".
+    """
+    if isinstance(vectors, VectorStore):
+        index = vectors.index(offset=offset)
+    else:
+        index = TimeIndex.from_records(vectors, key="t", offset=offset)
+        store_ref = None
+    for chunk in chunks:
+        if store_ref is None:
+            chunk["vectors"] = index.window(chunk["start"], chunk["end"])
+        else:
+            chunk["vector_store"] = store_ref
+            chunk["vector_rows"] = list(index.span(chunk["start"], chunk["end"]))
+    return chunks
+
+def open_vectors(path):
+    """
+    A VectorStore for a store directory; for a vector_windows.jsonl, its records as a list.
+    """
+    if (Path(path) / HEADER).exists():
+        return VectorStore(path)
+    return read_jsonl(path)
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or export a VectorWindow store")
+    parser.add_argument("store", help="Path to a vector store directory")
+    parser.add_argument("--jsonl", help="Export the rows to this JSONL file")
+    args = parser.parse_args(argv)
+    store = VectorStore(args.store)
+    print(json.dumps({"rows": len(store), "columns": {n: [str(dt), list(s)] for n, (dt, s) in store.columns.items()},
+                      "meta": store.meta}, indent=2))
+    if args.jsonl:
+        store.export_jsonl(args.jsonl)
+        print(f"{len(store)} rows written to {args.jsonl}")
+
+if __name__ == "__main__":
+    cli()
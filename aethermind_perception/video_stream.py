@@ -0,0 +1,280 @@
+# video_stream.py
+import math
+import numpy as np
+# cv2 is imported by the functions that open or decode a video, so importing this
+# module (and the chunker/CLI that import it) doesn't load OpenCV
+
+def probe_video(path: str):
+    """
+    Return (total_frames, fps, (width, height)) without decoding anything.
+    Falls back to the same defaults as read_video_frames_sparse.
+    """
+    import cv2
+    cap = cv2.VideoCapture(str(path))
+    if not cap.isOpened():
+        return 0, 30, (1920, 1080)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or 0
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 1920)
+    h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 1080)
+    cap.release()
+    return total, fps, (w, h)
+
+def video_codec(path: str):
+    """
+    The video stream's codec from its FourCC ("h264", "hevc", ...), or None.
+    """
+    import cv2
+    cap = cv2.VideoCapture(str(path))
+    code = int(cap.get(cv2.CAP_PROP_FOURCC)) if cap.isOpened() else 0
+    cap.release()
+    if not code:
+        return None
+    fourcc = "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4)).strip("\0 ").lower()
+    return {"avc1": "h264", "avc3": "h264", "x264": "h264",
+            "hev1": "hevc", "hvc1": "hevc", "h265": "hevc"}.get(fourcc, fourcc)
+
+def window_frame_range(rel_start: float, rel_end: float, fps: float, total: int):
+    """
+    Frame indices [first, last) whose timestamps i/fps fall in [rel_start, rel_end).
+    """
+    first = min(total, max(0, int(math.ceil(rel_start * fps - 1e-6))))
+    last = min(total, max(first, int(math.ceil(rel_end * fps - 1e-6))))
+    return first, last
+
+def sparse_indices(first: int, last: int, max_frames: int = 12):
+    """
+    Up to max_frames indices evenly spaced over [first, last), same spacing as
+    read_video_frames_sparse uses over a whole clip (max_frames=None: all of them).
+    """
+    count = last - first
+    if count <= 0:
+        return []
+    take = count if max_frames is None else min(max_frames, count)
+    return [first + int(i * (count - 1) / max(1, take - 1)) for i in range(take)]
+
+def _resize(frame, target_size):
+    import cv2
+    # target_size is (width, height); INTER_AREA is the right filter for shrinking
+    if target_size is None or (frame.shape[1], frame.shape[0]) == tuple(target_size):
+        return frame
+    return cv2.resize(frame, tuple(target_size), interpolation=cv2.INTER_AREA)
+
+# width MotionMeter shrinks frames to before comparing them
+MOTION_WIDTH = 320
+
+class MotionMeter:
+    """
+    Mean grey-level absolute difference between consecutive frames, fed one decoded
+    frame at a time: the motion score event_detector.compute_video_motion defines,
+    measured while the frames are being decoded anyway.
+    Frames wider than `width` are subsampled to it first (INTER_NEAREST, aspect kept),
+    so the grey conversion and difference run on a few hundred pixels per row whatever
+    the recording's resolution. Picking pixels rather than averaging them keeps the
+    score on the full-resolution scale (a sample of the same per-pixel differences) and
+    costs a tenth of the full-size conversion; width=None measures every pixel.
+    """
+    def __init__(self, width=MOTION_WIDTH):
+        self.width = width
+        self._small = None
+        self._gray = [None, None]
+        self._diff = None
+        self._slot = 0
+        self.reset()
+
+    def reset(self):
+        # start a new clip/window: no pair spans the boundary
+        self.diffs = []
+        self._prev = None
+
+    def add(self, frame):
+        import cv2
+        h, w = frame.shape[:2]
+        if self.width and w > self.width:
+            size = (self.width, max(1, int(round(h * self.width / w))))
+            if self._small is None or self._small.shape[:2] != size[::-1]:
+                self._small = np.empty((size[1], size[0], 3), np.uint8)
+            frame = cv2.resize(frame, size, self._small, interpolation=cv2.INTER_NEAREST)
+        if self._gray[0] is None or self._gray[0].shape != frame.shape[:2]:
+            self._gray = [np.empty(frame.shape[:2], np.uint8) for _ in range(2)]
+            self._diff = np.empty(frame.shape[:2], np.uint8)
+            self._prev = None
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, self._gray[self._slot])
+        if self._prev is not None:
+            cv2.absdiff(self._prev, gray, self._diff)
+            self.diffs.append(cv2.mean(self._diff)[0])
+        self._prev = gray
+        self._slot ^= 1
+
+    @property
+    def value(self) -> float:
+        return float(np.mean(self.diffs)) if self.diffs else 0.0
+
+class FrameClock:
+    """
+    Counts dropped frames while decoding: gaps in the decoded frames' timestamps longer
+    than one frame interval (a recorder that skipped frames in a variable-rate file),
+    plus frames a window should have had that the decoder never returned (a truncated
+    or unreadable stream). Fed like MotionMeter; start(fps) begins a stream, reset()
+    a window, and the gap into a window's first frame counts toward that window.
+    """
+    def __init__(self, fps=None):
+        self.start(fps)
+
+    def start(self, fps):
+        self.interval_ms = 1000.0 / fps if fps else None
+        self._prev = None
+        self.reset()
+
+    def reset(self):
+        self.frames = 0
+        self.dropped = 0
+
+    def add(self, t_ms):
+        if self._prev is not None and self.interval_ms:
+            self.dropped += max(0, int(round((t_ms - self._prev) / self.interval_ms)) - 1)
+        self._prev = t_ms
+        self.frames += 1
+
+    def missing(self, n):
+        self.dropped += max(0, n)
+
+def _advance(cap, pos, last, wanted, target_size=None, meter=None, clock=None):
+    """
+    Decode forward from frame `pos` up to `last`, retrieving (and resizing) only the
+    indices in `wanted`; every other frame is grab()bed, which skips the colour
+    conversion and copy. With a MotionMeter every frame is retrieved and fed to it (the
+    retrieve is still full resolution; the meter subsamples it before measuring). A
+    FrameClock sees every frame's timestamp, and the frames short of `last` if the
+    stream ends early.
+    Returns (frames, new_pos, ok).
+    """
+    import cv2
+    frames = []
+    ok = True
+    while pos < last:
+        ok = cap.grab()
+        if not ok:
+            break
+        if clock is not None:
+            clock.add(cap.get(cv2.CAP_PROP_POS_MSEC))
+        if meter is not None or pos in wanted:
+            ok, frame = cap.retrieve()
+            if not ok or frame is None:
+                break
+            if meter is not None:
+                meter.add(frame)
+            if pos in wanted:
+                frames.append(_resize(frame, target_size))
+        pos += 1
+    if clock is not None and pos < last:
+        clock.missing(last - pos)
+    return frames, pos, ok
+
+def read_frames_sequential(path: str, max_frames: int = 12, target_size=None, meter=None, clock=None):
+    """
+    Read up to max_frames evenly spaced across the clip in a single forward pass.
+    Returns (frames, (width,height), fps) like read_video_frames_sparse; width/height are
+    the source resolution even when target_size=(w, h) downscales the returned frames.
+    A MotionMeter passed as `meter` sees every frame of the clip, and so does a
+    FrameClock passed as `clock` (started here at the clip's fps).
+    """
+    import cv2
+    cap = cv2.VideoCapture(str(path))
+    if not cap.isOpened():
+        return [], (1920, 1080), 30  # sensible defaults
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or 0
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 1920)
+    h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 1080)
+    idxs = sparse_indices(0, total, max_frames)
+    frames = []
+    if meter is not None:
+        meter.reset()
+    if clock is not None:
+        clock.start(fps)
+    if idxs:
+        frames, _, _ = _advance(cap, 0, idxs[-1] + 1, set(idxs), target_size, meter, clock)
+    cap.release()
+    return frames, (w, h), fps
+
+def read_frames_seek(path: str, max_frames: int = 12):
+    """
+    The original seek-per-frame sampler (CAP_PROP_POS_FRAMES before every read), kept for
+    benchmarks/bench_frame_sampler.py. Each seek decodes again from the previous keyframe.
+    """
+    import cv2
+    cap = cv2.VideoCapture(str(path))
+    if not cap.isOpened():
+        return [], (1920, 1080), 30
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or 0
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 1920)
+    h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 1080)
+    frames = []
+    for i in sparse_indices(0, total, max_frames):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, i)
+        ok, frame = cap.read()
+        if ok and frame is not None:
+            frames.append(frame)
+    cap.release()
+    return frames, (w, h), fps
+
+def sampled_motion(path: str, times, target_size=(64, 36)):
+    """
+    Mean grey-level absolute difference between frames sampled at `times` (seconds from
+    video start, ascending; the first frame at or after each), shrunk to target_size
+    first. Entry k compares sample k with sample k-1 (entry 0 is 0). One forward pass;
+    the frames in between are only grab()bed. Samples past the end repeat the last one.
+    """
+    import cv2
+    total, fps, _ = probe_video(path)
+    motion = np.zeros(len(times))
+    cap = cv2.VideoCapture(str(path))
+    pos, ok, prev = 0, cap.isOpened(), None
+    for k, t in enumerate(times):
+        idx = min(max(0, total - 1), int(math.ceil(t * fps - 1e-6)))
+        if ok and idx >= pos:
+            frames, pos, ok = _advance(cap, pos, idx + 1, {idx}, target_size)
+            if frames:
+                gray = cv2.cvtColor(frames[0], cv2.COLOR_BGR2GRAY)
+                if prev is not None:
+                    motion[k] = cv2.mean(cv2.absdiff(prev, gray))[0]
+                prev = gray
+    cap.release()
+    return motion
+
+def iter_video_windows(video_path: str, windows, max_frames: int = 12, target_size=None, meter=None,
+                       clock=None):
+    """
+    Decode video_path once, front to back, and yield (frames, (width,height), fps)
+    for every (rel_start, rel_end) window in `windows` (seconds from video start,
+    ascending, non-overlapping); max_frames=None yields every frame of the window.
+    Only the sampled frames are retrieved; everything else is grab()bed and skipped,
+    so no frame is ever decoded twice or re-encoded.
+    With a MotionMeter, it is reset at the start of every window and has seen all of
+    the window's frames by the time that window is yielded (read meter.value then).
+    A FrameClock passed as `clock` is started at the video's fps and handled the same
+    way (read clock.dropped).
+    """
+    import cv2
+    total, fps, (w, h) = probe_video(video_path)
+    if clock is not None:
+        clock.start(fps)
+    cap = cv2.VideoCapture(str(video_path))
+    pos = 0
+    ok = cap.isOpened()
+    for rel_start, rel_end in windows:
+        first, last = window_frame_range(rel_start, rel_end, fps, total)
+        frames = []
+        if meter is not None:
+            meter.reset()
+        if clock is not None:
+            clock.reset()
+        if ok:
+            wanted = set(sparse_indices(first, last, max_frames))
+            frames, pos, ok = _advance(cap, pos, last, wanted, target_size, meter, clock)
+        elif clock is not None:
+            clock.missing(last - first)
+        yield frames, (w, h), fps
+    cap.release()
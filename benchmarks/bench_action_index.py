@@ -0,0 +1,105 @@
+"""
+Action windowing: list scans against action_index on a synthetic 100 Hz action log.
+
+Three lookups, as the pipeline does them:
+  chunks    chunker actions per 2 s chunk (window_actions_for)
+  vectors   stream_to_vectors.summarize_actions per 0.5 s window, and
+            action_index.action_features over all windows in one pass
+  merge     add_vectors_to_events vectors per 2 s chunk
+The scans are O(events) per window, so they are timed on the first --sample windows and
+extrapolated; the indexed lookups run over every window.
+
+    python benchmarks/bench_action_index.py [--events 1000000] [--sample 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../aethermind_perception')))
+from action_index import ActionIndex, TimeIndex, action_features
+from stream_to_vectors import summarize_actions
+
+def make_log(n, hz=100.0, t0=1754107947.0):
+    rng = np.random.default_rng(0)
+    ts = t0 + np.arange(n) / hz + rng.uniform(0, 0.002, n)
+    pos = np.cumsum(rng.integers(-5, 6, (n, 2)), axis=0) + 500
+    keys = rng.integers(0, 3, n)
+    left, right = rng.random(n) < 0.2, rng.random(n) < 0.05
+    return [{"time": float(ts[i]), "keys": ["W"] * int(keys[i]),
+             "mouse": {"position": [int(pos[i, 0]), int(pos[i, 1])],
+                       "buttons": {"left": bool(left[i]), "right": bool(right[i]), "middle": False}}}
+            for i in range(n)]
+
+def scan_summary(actions, start_ts, end_ts):
+    # the list-scan summarize_actions this replaces
+    window_actions = [a for a in actions if start_ts <= a['time'] < end_ts]
+    left_clicks = sum(1 for a in window_actions if a['mouse']['buttons']['left'])
+    right_clicks = sum(1 for a in window_actions if a['mouse']['buttons']['right'])
+    key_presses = sum(len(a['keys']) for a in window_actions)
+    mouse_dist = 0.0
+    for prev, a in zip(window_actions, window_actions[1:]):
+        mouse_dist += np.linalg.norm(np.array(a['mouse']['position']) - np.array(prev['mouse']['position']))
+    return np.array([left_clicks, right_clicks, key_presses, mouse_dist])
+
+def timed(fn, items):
+    t = time.perf_counter()
+    out = [fn(*it) for it in items]
+    return time.perf_counter() - t, out
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--sample", type=int, default=20, help="windows timed for the full scans")
+    args = parser.parse_args()
+
+    t = time.perf_counter()
+    actions = make_log(args.events)
+    print(f"{args.events} events over {(actions[-1]['time'] - actions[0]['time']) / 3600:.2f} h "
+          f"(generated in {time.perf_counter() - t:.1f} s)")
+    t = time.perf_counter()
+    index = ActionIndex.from_records(actions)
+    build = time.perf_counter() - t
+    vectors = [{"t": float(x), "x": []} for x in np.arange(actions[0]["time"], actions[-1]["time"], 0.5) + 0.25]
+    t = time.perf_counter()
+    vindex = TimeIndex.from_records(vectors, key="t")
+    vbuild = time.perf_counter() - t
+
+    start, end = actions[0]["time"], actions[-1]["time"]
+    chunks = [(s, s + 2.0) for s in np.arange(start, end, 2.0)]
+    windows = [(s, s + 0.5) for s in np.arange(start, end, 0.5)]
+    k = args.sample
+
+    rows = []
+    scan, ref = timed(lambda a, b: [x for x in actions if a <= x["time"] < b], chunks[:k])
+    fast, got = timed(index.window, chunks)
+    assert all(r == g for r, g in zip(ref, got))
+    rows.append(("chunks (2 s)", len(chunks), scan / k * len(chunks), fast))
+
+    scan, ref = timed(lambda a, b: scan_summary(actions, a, b), windows[:k])
+    fast, got = timed(lambda a, b: summarize_actions(index, a, b), windows)
+    assert all(np.allclose(r, g, rtol=1e-9) for r, g in zip(ref, got))
+    rows.append(("vectors (0.5 s)", len(windows), scan / k * len(windows), fast))
+
+    t = time.perf_counter()
+    w0, w1 = np.array(windows).T
+    feats = action_features(index, w0, w1)
+    batch = time.perf_counter() - t
+    assert np.allclose(feats["mouse_dist"][:k], [r[3] for r in ref], rtol=1e-9)
+    rows.append(("vectors, all windows at once", len(windows), scan / k * len(windows), batch))
+
+    scan, ref = timed(lambda a, b: [v for v in vectors if a <= v["t"] < b], chunks[:k])
+    fast, got = timed(vindex.window, chunks)
+    assert all(r == g for r, g in zip(ref, got))
+    rows.append(("merge (2 s)", len(chunks), scan / k * len(chunks), fast))
+
+    print(f"index build: actions {build:.2f} s, vectors {vbuild:.3f} s")
+    print("| lookup | windows | scan (s, extrapolated) | indexed (s) | speedup |")
+    print("|---|---|---|---|---|")
+    for name, n, s, f in rows:
+        print(f"| {name} | {n} | {s:.1f} | {f:.3f} | {s / f:.0f}x |")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Embedder batching, with the "projection" / "spectrum" stand-in embedders.
+
+  embed only  --windows prepared windows / 0.5 s audio ranges, embedded one per call
+              and in batches (the part a real model's per-call cost lands on)
+  pipeline    stream_to_vectors.main on a synthetic 720p30 session, per batch size
+              (decode and prepare run on the prefetch thread either way)
+
+    python benchmarks/bench_embedders.py [--windows 2000] [--seconds 60] [--dim 512]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../aethermind_perception')))
+from embedders import ProjectionEmbedder, SpectrumEmbedder, batched
+from session_audio import open_session_audio
+from stream_to_vectors import main as vectorize
+from vector_store import VectorStore
+
+def make_session(folder, seconds, fps=30, size=(1280, 720)):
+    rng = np.random.default_rng(0)
+    tex = rng.integers(0, 255, (size[1], size[0] * 2, 3), dtype=np.uint8)
+    vw = cv2.VideoWriter(os.path.join(folder, "screen.mp4"), cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    for i in range(seconds * fps):
+        x = (i * 7) % size[0]
+        vw.write(np.ascontiguousarray(tex[:, x:x + size[0]]))
+    vw.release()
+    with wave.open(os.path.join(folder, "audio.wav"), "wb") as w:
+        w.setnchannels(2); w.setsampwidth(2); w.setframerate(48000)
+        w.writeframes(rng.integers(-3000, 3000, seconds * 48000 * 2).astype("<i2").tobytes())
+    with open(os.path.join(folder, "actions.jsonl"), "w") as f:
+        for i in range(seconds * 50):
+            f.write(json.dumps({"time": 1754093547.0 + i / 50, "keys": [],
+                                "mouse": {"position": [i % 1280, i % 720], "buttons": {"left": False}}}) + "\n")
+    with open(os.path.join(folder, "session.json"), "w") as f:
+        json.dump({"start_time": 1754093547.0, "duration": seconds}, f)
+
+def embed_only(tmp, n, dim):
+    rng = np.random.default_rng(1)
+    video = ProjectionEmbedder(dim=dim)
+    prepared = list(rng.random((n, video.size * video.size * 3), dtype=np.float32))
+    audio = open_session_audio(os.path.join(tmp, "audio.wav"))
+    ranges = [(a0, a0 + 24000) for a0 in rng.integers(0, audio.n_frames - 24000, n)]
+    spectrum = SpectrumEmbedder(dim=128)
+    rows = []
+    for batch_size in (1, 16, 64, 256):
+        t = time.perf_counter()
+        v = np.concatenate([video.embed(b) for b in batched(prepared, batch_size)])
+        tv = time.perf_counter() - t
+        t = time.perf_counter()
+        a = np.concatenate([spectrum.embed(audio, b) for b in batched(ranges, batch_size)])
+        ta = time.perf_counter() - t
+        assert v.shape == (n, dim) and a.shape == (n, 128)
+        rows.append((batch_size, tv / n * 1000, ta / n * 1000))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--windows", type=int, default=2000)
+    parser.add_argument("--seconds", type=int, default=60)
+    parser.add_argument("--dim", type=int, default=512)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        make_session(tmp, args.seconds)
+        embed_rows = embed_only(tmp, args.windows, args.dim)
+        rows, ref = [], None
+        for batch_size in (1, 16, 64):
+            t = time.perf_counter()
+            vectorize(tmp, video_embedder="projection", audio_embedder="spectrum",
+                      video_dim=args.dim, audio_dim=128, batch_size=batch_size)
+            dt = time.perf_counter() - t
+            x = np.array(VectorStore(os.path.join(tmp, "vector_windows.vec")).x)
+            ref = x if ref is None else ref
+            assert np.allclose(x, ref, atol=1e-5)
+            rows.append((batch_size, len(x), dt))
+    print(f"embed only: {args.windows} windows, video dim {args.dim}, audio dim 128 (48 kHz stereo)")
+    print("| batch size | projection (ms / window) | spectrum (ms / window) |")
+    print("|---|---|---|")
+    for b, tv, ta in embed_rows:
+        print(f"| {b} | {tv:.3f} | {ta:.3f} |")
+    print(f"pipeline: {args.seconds} s 720p30")
+    print("| batch size | windows | total (s) | ms / window |")
+    print("|---|---|---|---|")
+    for b, n, dt in rows:
+        print(f"| {b} | {n} | {dt:.2f} | {dt / n * 1000:.1f} |")
+
+if __name__ == "__main__":
+    main()
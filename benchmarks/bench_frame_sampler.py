@@ -0,0 +1,79 @@
+"""
+Sparse frame sampling: seek-per-frame vs. one sequential pass.
+
+Encodes synthetic H.264 clips with ffmpeg (moving test pattern, like a chunk written by
+the chunker), then times read_frames_seek (the old read_video_frames_sparse) against
+read_frames_sequential with and without downscale-on-read. A second table times the
+chunker's stream-mode pass (iter_video_windows over 2 s windows, 12 frames each)
+without a MotionMeter, which only grab()s the unsampled frames, and with one, which
+retrieves every frame, at full resolution and at the meter's default width.
+
+    python benchmarks/bench_frame_sampler.py [--repeat 3]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../aethermind_perception')))
+from video_stream import MOTION_WIDTH, MotionMeter, iter_video_windows, read_frames_seek, read_frames_sequential
+
+CLIPS = [
+    # (label, size, fps, seconds, keyframe interval)
+    ("2 s chunk 1080p60, 1 keyframe", "1920x1080", 60, 2, 250),
+    ("2 s chunk 720p30, 1 keyframe", "1280x720", 30, 2, 250),
+    ("10 s clip 1080p60, keyframe/2 s", "1920x1080", 60, 10, 120),
+]
+
+def make_clip(path, size, fps, seconds, keyint):
+    subprocess.run([
+        "ffmpeg", "-y", "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={fps}:duration={seconds}",
+        "-c:v", "libx264", "-preset", "veryfast", "-g", str(keyint), "-pix_fmt", "yuv420p", path,
+    ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+def stream_pass(path, seconds, meter=None):
+    windows = [(t, t + 2.0) for t in range(0, seconds, 2)]
+    for _ in iter_video_windows(path, windows, max_frames=12, meter=meter):
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max_frames", type=int, default=12)
+    args = parser.parse_args()
+
+    print("| clip | seek (s) | sequential (s) | sequential + 480x270 (s) | speedup |")
+    print("|---|---|---|---|---|")
+    stream = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, size, fps, seconds, keyint in CLIPS:
+            path = os.path.join(tmp, "clip.mp4")
+            make_clip(path, size, fps, seconds, keyint)
+            stream.append((label, best_of(lambda: stream_pass(path, seconds), args.repeat),
+                           best_of(lambda: stream_pass(path, seconds, MotionMeter(width=None)), args.repeat),
+                           best_of(lambda: stream_pass(path, seconds, MotionMeter()), args.repeat)))
+            a, _, _ = read_frames_seek(path, args.max_frames)
+            b, _, _ = read_frames_sequential(path, args.max_frames)
+            assert len(a) == len(b), (len(a), len(b))
+            seek = best_of(lambda: read_frames_seek(path, args.max_frames), args.repeat)
+            seq = best_of(lambda: read_frames_sequential(path, args.max_frames), args.repeat)
+            small = best_of(lambda: read_frames_sequential(path, args.max_frames, target_size=(480, 270)), args.repeat)
+            print(f"| {label} | {seek:.3f} | {seq:.3f} | {small:.3f} | {seek / seq:.1f}x |")
+
+    print(f"\n| clip | grab only (s) | meter, full size (s) | meter, {MOTION_WIDTH} wide (s) |")
+    print("|---|---|---|---|")
+    for label, grab, full, small in stream:
+        print(f"| {label} | {grab:.3f} | {full:.3f} | {small:.3f} |")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Optical flow engines: accuracy vs. speed on synthetic 1080p clips.
+
+Each clip is 12 frames (what the chunker samples per chunk) with known motion, so the
+true mean per-pixel displacement is known:
+  pan     whole frame translates (3, 4) px per frame          → 5.0 px
+  object  static background, a 480x270 textured block moves  → 8 px on 6.25% of pixels
+  static  nothing moves                                       → 0 px
+
+    python benchmarks/bench_optical_flow.py [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import cv2
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../aethermind_perception')))
+from dynamics_computation import FlowEngine, compute_optical_flow
+
+W, H, N = 1920, 1080, 12
+
+def texture(rng, h, w):
+    return cv2.GaussianBlur(rng.integers(0, 255, (h, w, 3), dtype=np.uint8), (9, 9), 0)
+
+def make_clips():
+    rng = np.random.default_rng(0)
+    big = texture(rng, H + 4 * N, W + 3 * N)
+    pan = [np.ascontiguousarray(big[4 * i: 4 * i + H, 3 * i: 3 * i + W]) for i in range(N)]
+    bg, block = texture(rng, H, W), texture(rng, 270, 480)
+    obj = []
+    for i in range(N):
+        f = bg.copy()
+        x = 200 + 8 * i
+        f[400:670, x: x + 480] = block
+        obj.append(f)
+    static = [bg.copy() for _ in range(N)]
+    return {
+        "pan": (pan, 5.0),
+        "object": (obj, 8.0 * (480 * 270) / (W * H)),
+        "static": (static, 0.0),
+    }
+
+ENGINES = [
+    ("farneback full res", dict(method="farneback", scale=1.0)),
+    ("farneback 0.5", dict(method="farneback", scale=0.5)),
+    ("farneback 0.25", dict(method="farneback", scale=0.25)),
+    ("farneback 0.5 + roi 1/4", dict(method="farneback", scale=0.5, roi=(480, 270, 960, 540))),
+    ("lk corners full res", dict(method="lk", scale=1.0)),
+    ("lk corners 0.5", dict(method="lk", scale=0.5)),
+    ("frame diff 0.5", dict(method="diff", scale=0.5)),
+]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    cv2.setNumThreads(1)
+
+    clips = make_clips()
+    print("| engine | ms / pair | pan (true 5.0) | object (true 0.50) | static (true 0) |")
+    print("|---|---|---|---|---|")
+    for label, cfg in ENGINES:
+        engine = FlowEngine(**cfg)
+        row, times = [], []
+        for name, (frames, _) in clips.items():
+            best = None
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                out = compute_optical_flow(frames, engine=engine)
+                dt = time.perf_counter() - t0
+                best = dt if best is None else min(best, dt)
+            times.append(best / (N - 1))
+            row.append(out["flow_mean"])
+        ms = 1000 * float(np.mean(times))
+        print(f"| {label} | {ms:.1f} | " + " | ".join(f"{v:.2f}" for v in row) + " |")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Memory of EventSeeds held in a process: the plain dicts emit_event_seed returns against
+EventSeed.compact() (slotted dataclass, actions and rms_frames as NumPy columns).
+
+Seeds are built the way the chunker builds them (2 s chunks: 40 semantic actions over
+their raw actions, 94 RMS frames). Reports the traced allocations per seed for each
+form, and the time to compact a seed and to turn it back into its dict.
+
+    python benchmarks/bench_seed_memory.py [--seeds 2000]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../aethermind_perception')))
+from event_seed_emitter import EventSeed, emit_event_seed
+from input_semantics_mapper import process_actions
+
+def make_seed(i):
+    raw = [{"ts": 1754108000.0 + i * 2 + k * 0.05, "keys": ["W", "SHIFT"] if k % 3 else [],
+            "mouse": {"position": [640 + k, 360 - k], "buttons": {"left": k % 9 == 0, "right": False}}}
+           for k in range(40)]
+    return emit_event_seed(
+        "session_20250802_001227", f"/out/chunk_{i:04d}.mp4", f"/out/chunk_{i:04d}.wav",
+        process_actions(process_actions(raw)),  # build_chunk, then process_event
+        sync={"av_ms": 0.0, "ai_ms": 0.0, "vi_ms": 0.0},
+        video_dyn={"flow_mean": 0.8, "flow_std": 0.2, "cut_prob": 0.0, "frame_idx_start": 0,
+                   "frame_idx_end": 11, "flow_method": "farneback"},
+        audio_dyn={"rms_frames": [0.01 * (k % 50) + i * 1e-6 for k in range(94)], "sr": 48000},
+        system={"fps": 30, "dropped_frames": 0, "window_focused": True, "resolution": [1920, 1080],
+                "codec": "h264", "crf": None})
+
+def traced(build):
+    # (result, bytes still allocated by build())
+    gc.collect()
+    tracemalloc.start()
+    out = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return out, size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seeds", type=int, default=2000)
+    args = parser.parse_args()
+    n = args.seeds
+
+    dicts, dict_bytes = traced(lambda: [make_seed(i) for i in range(n)])
+    t = time.perf_counter()
+    compact = [EventSeed.from_dict(s).compact() for s in dicts]
+    t_compact = time.perf_counter() - t
+    t = time.perf_counter()
+    back = [s.to_dict() for s in compact]
+    t_back = time.perf_counter() - t
+    assert all(json.dumps(a) == json.dumps(b) for a, b in zip(back, dicts))
+    del compact, back
+    # built from dicts that are dropped straight away, so only the compact forms stay traced
+    compact, compact_bytes = traced(lambda: [EventSeed.from_dict(make_seed(i)).compact() for i in range(n)])
+    assert not any(isinstance(s.actions, list) for s in compact)
+
+    print(f"{n} seeds of 40 actions and 94 RMS frames")
+    print("| form | KiB / seed | per action (bytes) |")
+    print("|---|---|---|")
+    for label, size in (("dict (emit_event_seed)", dict_bytes), ("EventSeed.compact()", compact_bytes)):
+        print(f"| {label} | {size / n / 1024:.1f} | {size / n / 40:.0f} |")
+    print()
+    print(f"compact(): {t_compact / n * 1e6:.0f} µs/seed, to_dict(): {t_back / n * 1e6:.0f} µs/seed, "
+          f"{dict_bytes / compact_bytes:.1f}x less memory")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Seed persistence: the per-seed append the chunker had commented out against SeedSink.
+
+Builds realistic EventSeeds (2 s chunks: 40 semantic actions, 94 RMS frames) and times,
+per seed: EventSeed.to_dict against dataclasses.asdict, the old way of persisting
+(asdict, json.dumps, open/append/close per seed) and SeedSink in both formats, batched
+and with an fsync per seed. Also reports the file size per seed and the read-back time.
+
+    python benchmarks/bench_seed_sink.py [--seeds 5000]
+"""
+import argparse
+import dataclasses
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../aethermind_perception')))
+from event_seed_emitter import EventSeed, emit_event_seed
+from seed_sink import SeedSink, read_seeds
+
+def make_seeds(n):
+    seeds = []
+    for i in range(n):
+        actions = [{"ts": 1754108000.0 + i * 2 + k * 0.05, "keys": ["W", "SHIFT"] if k % 3 else [],
+                    "mouse": {"position": [640 + k, 360 - k], "buttons": {"left": k % 9 == 0}},
+                    "mouse_norm": [0.5 + k / 1280, 0.5 - k / 720], "semantic": ["move_forward"]}
+                   for k in range(40)]
+        seeds.append(emit_event_seed(
+            "session_20250802_001227", f"/out/chunk_{i:04d}.mp4", f"/out/chunk_{i:04d}.wav", actions,
+            sync={"av_ms": 0.0, "ai_ms": 0.0, "vi_ms": 0.0},
+            video_dyn={"flow_mean": 0.8, "flow_std": 0.2, "cut_prob": 0.0, "frame_idx_start": 0,
+                       "frame_idx_end": 11, "flow_method": "farneback"},
+            audio_dyn={"rms_frames": [0.01 * (k % 50) for k in range(94)], "sr": 48000},
+            system={"fps": 30, "dropped_frames": 0, "window_focused": True, "resolution": [1920, 1080],
+                    "codec": "h264", "crf": None}))
+    return seeds
+
+def old_append(path, seeds):
+    # what build_chunk had commented out, with the asdict the seed went through
+    for seed in seeds:
+        d = dataclasses.asdict(EventSeed(**seed))
+        with open(path, "a") as sf:
+            sf.write(json.dumps(d) + "\n")
+
+def sink_writer(fmt, batch, fsync):
+    def write(path, seeds):
+        with SeedSink(path, fmt=fmt, batch=batch, fsync=fsync) as sink:
+            for seed in seeds:
+                sink.write(EventSeed(**seed).to_dict())
+    return write
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seeds", type=int, default=5000)
+    args = parser.parse_args()
+    seeds = make_seeds(args.seeds)
+    objs = [EventSeed(**s) for s in seeds]
+
+    t = time.perf_counter()
+    for o in objs:
+        dataclasses.asdict(o)
+    t_asdict = time.perf_counter() - t
+    t = time.perf_counter()
+    for o in objs:
+        o.to_dict()
+    t_to_dict = time.perf_counter() - t
+    print(f"{args.seeds} seeds: dataclasses.asdict {t_asdict / args.seeds * 1e6:.1f} µs/seed, "
+          f"EventSeed.to_dict {t_to_dict / args.seeds * 1e6:.2f} µs/seed")
+    print()
+
+    runs = [
+        ("per-seed open + json.dumps (old)", "seeds.jsonl", old_append),
+        ("SeedSink jsonl, batch 64, fsync at close", "seeds.jsonl", sink_writer("jsonl", 64, "close")),
+        ("SeedSink jsonl, batch 1, fsync per seed", "seeds.jsonl", sink_writer("jsonl", 1, "batch")),
+        ("SeedSink msgpack, batch 64, fsync at close", "seeds.msgpack", sink_writer("msgpack", 64, "close")),
+    ]
+    print("| writer | µs / seed | bytes / seed | read back (µs / seed) |")
+    print("|---|---|---|---|")
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(__file__))) as tmp:
+        for label, name, write in runs:
+            path = os.path.join(tmp, name)
+            if os.path.exists(path):
+                os.remove(path)
+            t = time.perf_counter()
+            write(path, seeds)
+            dt = time.perf_counter() - t
+            t = time.perf_counter()
+            back = list(read_seeds(path))
+            rt = time.perf_counter() - t
+            assert len(back) == len(seeds) and back[-1]["event_uid"] == seeds[-1]["event_uid"]
+            print(f"| {label} | {dt / len(seeds) * 1e6:.1f} | {os.path.getsize(path) / len(seeds):.0f} | "
+                  f"{rt / len(seeds) * 1e6:.1f} |")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Fixed 2 s chunks against activity-driven segmentation on a mostly idle recording.
+
+Encodes a synthetic H.264 session with ffmpeg: a still desktop with a blinking cursor,
+a quiet noise floor and an input logger that writes an unchanged record every second,
+broken by three bursts (animated video, loud audio, keys and mouse) that cover about
+12% of it. Runs chunk_video_audio_with_actions both ways (stream mode, chunk .mp4s
+stream-copied, seeds kept) and reports the chunk count, where the time went, and how
+much of every burst landed in active-length chunks.
+
+    python benchmarks/bench_segmentation.py [--seconds 300] [--size 640x360] [--fps 15]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../aethermind_perception')))
+from chunker import chunk_video_audio_with_actions
+from metrics import Metrics, use_metrics
+
+START = 1754093547.0
+BURSTS = ((0.2, 0.25), (0.5, 0.53), (0.8, 0.84))  # fractions of the session
+
+def make_session(folder, size, fps, seconds):
+    bursts = [(a * seconds, b * seconds) for a, b in BURSTS]
+    enable = "+".join(f"between(t,{a},{b})" for a, b in bursts)
+    subprocess.run([
+        "ffmpeg", "-y", "-f", "lavfi", "-i", f"color=c=0x203040:size={size}:rate={fps}:duration={seconds}",
+        "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={fps}:duration={seconds}",
+        "-filter_complex", f"[0][1]overlay=enable='{enable}',"
+                           "drawbox=x=40:y=40:w=3:h=14:color=white:t=fill:enable='lt(mod(t,1),0.5)'",
+        "-c:v", "libx264", "-preset", "veryfast", "-g", str(2 * fps), "-pix_fmt", "yuv420p",
+        os.path.join(folder, "screen.mp4"),
+    ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    sr = 48000
+    rng = np.random.default_rng(0)
+    pcm = rng.integers(-60, 60, seconds * sr).astype(np.int32)
+    for a, b in bursts:
+        pcm[int(a * sr):int(b * sr)] *= 80
+    with wave.open(os.path.join(folder, "audio.wav"), "wb") as w:
+        w.setnchannels(1); w.setsampwidth(2); w.setframerate(sr)
+        w.writeframes(pcm.astype("<i2").tobytes())
+    with open(os.path.join(folder, "actions.jsonl"), "w") as f:
+        t = 0.0
+        while t < seconds:
+            busy = any(a <= t < b for a, b in bursts)
+            record = ({"keys": ["W"], "mouse": {"position": [int(t * 40) % 640, 200], "buttons": {"left": True}}}
+                      if busy else {"keys": [], "mouse": {"position": [320, 180], "buttons": {"left": False}}})
+            f.write(json.dumps({"time": START + t, **record}) + "\n")
+            t = round(t + (0.05 if busy else 1.0), 3)
+    return bursts
+
+def run(session, out, segmentation):
+    seeds = []
+    with use_metrics(Metrics()) as metrics:
+        t = time.perf_counter()
+        chunks = chunk_video_audio_with_actions(
+            os.path.join(session, "screen.mp4"), os.path.join(session, "audio.wav"),
+            os.path.join(session, "actions.jsonl"), 2.0, out, START, seeds=seeds.append,
+            segmentation=segmentation)
+        wall = time.perf_counter() - t
+    return chunks, seeds, wall, metrics.to_dict()["timers"]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=int, default=300)
+    parser.add_argument("--size", default="640x360")
+    parser.add_argument("--fps", type=int, default=15)
+    args = parser.parse_args()
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        session = os.path.join(tmp, "session")
+        os.mkdir(session)
+        bursts = make_session(session, args.size, args.fps, args.seconds)
+        for label, segmentation in (("fixed 2 s", None), ("adaptive (defaults)", {})):
+            chunks, seeds, wall, timers = run(session, os.path.join(tmp, label.split()[0]), segmentation)
+            # seconds of burst inside chunks no longer than 2 s
+            fine = sum(max(0.0, min(b, c["end"] - START) - max(a, c["start"] - START))
+                       for a, b in bursts for c in chunks if c["end"] - c["start"] <= 2.0 + 1e-6)
+            covered = fine / sum(b - a for a, b in bursts)
+            seed_kb = sum(len(json.dumps(s)) for s in seeds) / 1024
+            rows.append((label, len(chunks), wall, timers, covered, seed_kb))
+            print(f"{label}: " + ", ".join(f"{name} {t['total_s']:.2f} s" for name, t in timers.items()))
+
+    print()
+    print(f"{args.seconds} s {args.size}@{args.fps}, bursts over {sum(b - a for a, b in BURSTS):.0%} of it")
+    print("| segmentation | chunks | chunk stage (s) | segmentation pass (s) | flow (s) | seeds (KB) "
+          "| burst time in ≤2 s chunks |")
+    print("|---|---|---|---|---|---|---|")
+    for label, n, wall, timers, covered, seed_kb in rows:
+        seg = timers.get("segment", {}).get("total_s", 0.0)
+        print(f"| {label} | {n} | {wall:.2f} | {seg:.2f} | {timers['flow']['total_s']:.2f} | {seed_kb:.0f} "
+              f"| {covered:.0%} |")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Semantic action mapping: the per-action mapper (key/button tables rebuilt on every call,
+one Python pass per action) against the compiled, batched input_semantics_mapper.
+
+Times one call per window, and the chunker's path: build_chunk maps the window, then
+process_event maps the result again. The old mapper wrapped every action a second time
+there; the new one passes the semantic actions through. Also checks that both give the
+same JSON and reports the size of a window's semantic actions along that path.
+
+    python benchmarks/bench_semantic_mapper.py [--repeat 7]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../aethermind_perception')))
+from input_semantics_mapper import process_actions
+
+def old_map_raw_to_semantic_action(raw):
+    key_map = {
+        "W":"move_forward","A":"move_left","S":"move_backward","D":"move_right",
+        "E":"interact","SPACE":"jump","I":"inventory",
+    }
+    mouse_map = {"left":"click_primary","right":"click_secondary","middle":"click_middle"}
+    action = None; valid = False
+    if isinstance(raw.get("keys"), list) and raw["keys"]:
+        for k in raw["keys"]:
+            if k in key_map: action = key_map[k]; valid = True; break
+    if not valid and isinstance(raw.get("mouse",{}).get("buttons"), dict):
+        for btn, down in raw["mouse"]["buttons"].items():
+            if down and btn in mouse_map: action = mouse_map[btn]; valid = True; break
+    return {"action": action, "valid_for_game": bool(valid)}
+
+def old_process_actions(raw_actions, resolution=(1920,1080)):
+    # the mapper as it was, with _normalize_mouse inlined
+    out = []
+    w, h = resolution
+    for a in raw_actions:
+        x, y = a.get("mouse",{}).get("position",[0,0])
+        out.append({"ts": a["ts"], "raw": a, "semantic": {**old_map_raw_to_semantic_action(a),
+                    "mouse_norm": [max(0,min(1,x/float(max(1,w)))), max(0,min(1,y/float(max(1,h))))]}})
+    return out
+
+def make_window(n, seed=0):
+    # chunk window actions as parse_action gives them: keys and mouse always present
+    rng = random.Random(seed)
+    keys = ["W", "A", "S", "D", "SHIFT", "SPACE", "Q", "E"]
+    return [{"ts": 1754108000.0 + k * 2.0 / n, "keys": rng.sample(keys, rng.randint(0, 2)),
+             "mouse": {"position": [rng.randint(0, 1919), rng.randint(0, 1079)],
+                       "buttons": {"left": rng.random() < 0.2, "right": rng.random() < 0.05, "middle": False}}}
+            for k in range(n)]
+
+def best(fn, n, repeat):
+    number = max(1, 20000 // n)
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    print("| actions / window | old, once (µs) | new, once (µs) | old, chunker path (µs) | new, chunker path (µs) |"
+          " JSON / window, old → new (KB) |")
+    print("|---|---|---|---|---|---|")
+    for n in (10, 40, 200, 2000):
+        window = make_window(n)
+        old_path, new_path = old_process_actions(old_process_actions(window)), process_actions(process_actions(window))
+        assert json.dumps(process_actions(window)) == json.dumps(old_process_actions(window))
+        assert new_path == process_actions(window)
+        times = []
+        for fn in (lambda: old_process_actions(window), lambda: process_actions(window),
+                   lambda: old_process_actions(old_process_actions(window)),
+                   lambda: process_actions(process_actions(window))):
+            times.append(best(fn, n, args.repeat) * 1e6)
+        print(f"| {n} | " + " | ".join(f"{t:.0f}" for t in times)
+              + f" | {len(json.dumps(old_path)) / 1024:.1f} → {len(json.dumps(new_path)) / 1024:.1f} |")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Stage cache: a cold session_pipeline run against reruns over the same recording.
+
+Encodes a synthetic H.264 session with ffmpeg (plus audio, actions and session.json) and
+times run_session into fresh output folders sharing one stage cache: cold, a plain
+rerun, and a rerun with another video embedder (the chunks are reused, the vectors
+recomputed). Also times the chunker's provenance copy of the inputs, shutil.copy
+against stage_cache.link_input.
+
+    python benchmarks/bench_stage_cache.py [--seconds 30] [--size 1280x720] [--fps 30]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../aethermind_perception')))
+from session_pipeline import run_session
+import stage_cache
+from stage_cache import link_input
+
+START = 1754093547  # start_time 2025-08-02_00-12-27 as UTC epoch
+
+def make_session(folder, size, fps, seconds):
+    subprocess.run([
+        "ffmpeg", "-y", "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={fps}:duration={seconds}",
+        "-c:v", "libx264", "-preset", "veryfast", "-g", str(2 * fps), "-pix_fmt", "yuv420p",
+        os.path.join(folder, "screen.mp4"),
+    ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    rng = np.random.default_rng(0)
+    with wave.open(os.path.join(folder, "audio.wav"), "wb") as w:
+        w.setnchannels(2); w.setsampwidth(2); w.setframerate(48000)
+        w.writeframes(rng.integers(-3000, 3000, seconds * 48000 * 2).astype("<i2").tobytes())
+    with open(os.path.join(folder, "actions.jsonl"), "w") as f:
+        for i in range(seconds * 20):
+            f.write(json.dumps({"time": START + 14400 + i * 0.05, "keys": ["W"] if i % 7 else [],
+                                "mouse": {"position": [i % 1280, i % 720], "buttons": {"left": i % 9 == 0}}}) + "\n")
+    with open(os.path.join(folder, "session.json"), "w") as f:
+        json.dump({"start_time": "2025-08-02_00-12-27", "duration": seconds}, f)
+
+def timed(fn):
+    t = time.perf_counter()
+    fn()
+    return time.perf_counter() - t
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=int, default=30)
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--fps", type=int, default=30)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        session = os.path.join(tmp, "session")
+        os.mkdir(session)
+        make_session(session, args.size, args.fps, args.seconds)
+        cache = os.path.join(tmp, "cache")
+        runs = [("cold", {}), ("rerun, nothing changed", {}),
+                ("rerun, video embedder changed", {"vector_options": {"video_embedder": "projection"}})]
+        rows = []
+        for n, (label, options) in enumerate(runs):
+            out = os.path.join(tmp, f"out{n}")
+            # as in a new process: digests only from the cache folder, code hashed again
+            stage_cache._DIGESTS.clear()
+            stage_cache.code_version.cache_clear()
+            rows.append((label, timed(lambda: run_session(session, out, cache_dir=cache, **options))))
+
+        inputs = [os.path.join(session, name) for name in ("screen.mp4", "audio.wav", "actions.jsonl", "session.json")]
+        megabytes = sum(os.path.getsize(p) for p in inputs) / 1e6
+        copies = []
+        for name, fn in [("shutil.copy", shutil.copy), ("link_input", link_input)]:
+            dst = os.path.join(tmp, name)
+            os.mkdir(dst)
+            copies.append((name, timed(lambda: [fn(p, os.path.join(dst, os.path.basename(p))) for p in inputs])))
+
+    print(f"{args.seconds} s {args.size}@{args.fps}, 2 s chunks, default outputs")
+    print("| run | total (s) | speedup |")
+    print("|---|---|---|")
+    for label, dt in rows:
+        print(f"| {label} | {dt:.2f} | {rows[0][1] / dt:.1f}x |")
+    print()
+    print(f"provenance copy of the inputs ({megabytes:.1f} MB)")
+    print("| method | time (ms) |")
+    print("|---|---|")
+    for label, dt in copies:
+        print(f"| {label} | {dt * 1000:.1f} |")
+
+if __name__ == "__main__":
+    main()
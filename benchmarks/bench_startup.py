@@ -0,0 +1,103 @@
+"""
+Startup cost of each command-line entry point, from `python -X importtime`.
+
+Runs `<command> --help` in a fresh interpreter per repeat (so the command loads its
+module and everything it imports, then exits before doing any work) and reports the
+median wall time, the import time, the number of modules loaded and the heaviest
+top-level imports. --json keeps a run; --compare prints the change against a kept one.
+--direct runs the modules' own scripts instead of cli.py, and --tree points at another
+checkout, so a tree without cli.py can be measured the same way.
+
+    python benchmarks/bench_startup.py [--repeat 5] [--json startup.json] [--compare old.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "aethermind_perception"))
+from cli import COMMANDS
+
+HEAVY = ("cv2", "numpy", "moviepy", "librosa", "scipy", "numba")
+
+def script_for(tree, command, direct):
+    # the command line that shows `command`'s help in `tree`
+    pkg = os.path.join(tree, "aethermind_perception")
+    if not direct:
+        return [os.path.join(pkg, "cli.py")] + ([command] if command else []) + ["--help"]
+    module = COMMANDS[command][0]
+    path = os.path.join(pkg, f"{module}.py")
+    if not os.path.exists(path):
+        path = os.path.join(tree, "scripts", f"{module}.py")
+    return [path, "--help"]
+
+def parse_importtime(stderr):
+    # (total import µs, every module imported, {top-level module: cumulative µs})
+    top, names = {}, set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        names.add(name.strip())
+        if not name[1:].startswith(" "):  # imported by the script itself
+            top[name.strip()] = int(cumulative)
+    return sum(top.values()), names, top
+
+def measure(cmd, repeat):
+    walls, runs = [], []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime"] + cmd,
+                              capture_output=True, text=True, cwd=ROOT)
+        walls.append(time.perf_counter() - t)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{' '.join(cmd)} failed:\n{proc.stderr[-2000:]}")
+        runs.append(parse_importtime(proc.stderr))
+    total, names, top = min(runs, key=lambda r: r[0])
+    return {
+        "wall_ms": 1000 * statistics.median(walls),
+        "import_ms": total / 1000,
+        "modules": len(names),
+        "heavy": [m for m in HEAVY if m in names],
+        "top": sorted(top.items(), key=lambda kv: -kv[1])[:3],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tree", default=ROOT, help="Checkout to measure (default: this one)")
+    parser.add_argument("--direct", action="store_true", help="Run each module's script, not cli.py")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--compare", help="Results of an earlier run (--json) to compare against")
+    args = parser.parse_args()
+
+    old = json.load(open(args.compare)) if args.compare else {}
+    names = ([] if args.direct else [""]) + list(COMMANDS)
+    results = {}
+    for name in names:
+        results[name or "(no command)"] = measure(script_for(args.tree, name, args.direct), args.repeat)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    print(f"`--help` per command, median of {args.repeat} runs")
+    print("| command | wall (ms) | imports (ms) | modules | heavy modules loaded |"
+          + (" before (ms) |" if old else ""))
+    print("|---|---|---|---|---|" + ("---|" if old else ""))
+    for name, r in results.items():
+        row = (f"| {name} | {r['wall_ms']:.0f} | {r['import_ms']:.0f} | {r['modules']} | "
+               f"{', '.join(r['heavy']) or '-'} |")
+        if old:
+            before = old.get(name)
+            row += f" {before['wall_ms']:.0f} |" if before else " - |"
+        print(row)
+    print()
+    for name, r in results.items():
+        print(f"{name}: " + ", ".join(f"{m} {us / 1000:.0f} ms" for m, us in r["top"]))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Vectorizer decode: a seek per 0.5 s window vs. one sequential pass.
+
+Encodes a synthetic H.264 screen recording with ffmpeg and reads every 0.5 s window's
+frames the way stream_to_vectors used to (CAP_PROP_POS_MSEC seek at each window start,
+read until the timestamp passes the window end) and the way it does now
+(video_stream.iter_video_windows, optionally sub-sampled / downscaled).
+
+    python benchmarks/bench_vector_decode.py [--seconds 60] [--size 1280x720] [--fps 30]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+import cv2
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../aethermind_perception')))
+from video_stream import iter_video_windows
+
+def make_clip(path, size, fps, seconds, keyint):
+    subprocess.run([
+        "ffmpeg", "-y", "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={fps}:duration={seconds}",
+        "-c:v", "libx264", "-preset", "veryfast", "-g", str(keyint), "-pix_fmt", "yuv420p", path,
+    ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def fingerprint(frames):
+    # frame count plus a checksum of the first and last frame; the frames themselves
+    # are dropped, a whole session's worth would not fit in memory
+    return len(frames), [zlib.crc32(f.tobytes()) for f in frames[:1] + frames[-1:]]
+
+def seek_per_window(path, windows):
+    # the old stream_to_vectors reader
+    cap = cv2.VideoCapture(path)
+    out = []
+    for t0, t1 in windows:
+        frames = []
+        cap.set(cv2.CAP_PROP_POS_MSEC, t0 * 1000)
+        while True:
+            ret, frame = cap.read()
+            if not ret or cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0 >= t1:
+                break
+            frames.append(frame)
+        out.append(fingerprint(frames))
+    cap.release()
+    return out
+
+def timed(fn):
+    t = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - t, out
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=int, default=60)
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--keyint", type=int, default=60, help="frames between keyframes")
+    args = parser.parse_args()
+    windows = [(i * 0.5, (i + 1) * 0.5) for i in range(args.seconds * 2)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "screen.mp4")
+        make_clip(path, args.size, args.fps, args.seconds, args.keyint)
+        rows = []
+        seek, ref = timed(lambda: seek_per_window(path, windows))
+        rows.append(("seek per window, every frame", seek))
+        for label, kw in [("sequential, every frame", {}),
+                          ("sequential, 4 frames / window", {"max_frames": 4}),
+                          ("sequential, 4 frames / window at 480x270", {"max_frames": 4, "target_size": (480, 270)})]:
+            dt, got = timed(lambda: [fingerprint(f) for f, _, _ in iter_video_windows(path, windows, max_frames=kw.get("max_frames"),
+                                                                          target_size=kw.get("target_size"))])
+            if not kw:
+                assert got == ref
+            rows.append((label, dt))
+    print(f"{args.seconds} s {args.size}@{args.fps}, keyframe every {args.keyint} frames, {len(windows)} windows")
+    print("| reader | total (s) | ms / window | speedup |")
+    print("|---|---|---|---|")
+    for label, dt in rows:
+        print(f"| {label} | {dt:.2f} | {dt / len(windows) * 1000:.1f} | {seek / dt:.1f}x |")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+VectorWindow storage: vector_windows.jsonl against the vector_store directory for
+CLIP-sized vectors, on synthetic 0.5 s windows.
+
+Timed per format: writing every window, loading it back (read_jsonl vs opening the
+memory-mapped store) and the merge step (add_vectors_to_chunks, inline vectors for the
+JSONL as before, row ranges for the store).
+
+    python benchmarks/bench_vector_store.py [--windows 20000] [--dim 512]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../aethermind_perception')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+from action_ingest import read_jsonl
+from vector_store import VectorStore, VectorStoreWriter, vector_columns
+from add_vectors_to_events import VECTOR_OFFSET, add_vectors_to_chunks
+
+T0 = 1754093547.0
+
+def size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+    return os.path.getsize(path)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--windows", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=512)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal((args.windows, args.dim)).astype(np.float32)
+    ts = T0 + 0.25 + 0.5 * np.arange(args.windows)
+    chunks = [{"start": T0 + VECTOR_OFFSET + s, "end": T0 + VECTOR_OFFSET + s + 2.0}
+              for s in np.arange(0, args.windows * 0.5, 2.0)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        jsonl, store = os.path.join(tmp, "vector_windows.jsonl"), os.path.join(tmp, "vector_windows.vec")
+        events = os.path.join(tmp, "session_events.json")
+        with open(events, "w") as f:
+            json.dump(chunks, f)
+        rows = []
+
+        t = time.perf_counter()
+        with open(jsonl, "w") as f:
+            for i in range(args.windows):
+                f.write(json.dumps({"t": float(ts[i]), "x": x[i].tolist()}) + "\n")
+        write = time.perf_counter() - t
+        t = time.perf_counter()
+        vectors = read_jsonl(jsonl)
+        load = time.perf_counter() - t
+        t = time.perf_counter()
+        add_vectors_to_chunks(events, jsonl, os.path.join(tmp, "merged_jsonl.json"))
+        merge = time.perf_counter() - t
+        rows.append(("jsonl, vectors inline", size(jsonl), write, load, merge, size(os.path.join(tmp, "merged_jsonl.json"))))
+        del vectors
+
+        t = time.perf_counter()
+        with VectorStoreWriter(store, vector_columns(args.dim)) as w:
+            for i in range(args.windows):
+                w.append(t=ts[i], x=x[i])
+        write = time.perf_counter() - t
+        t = time.perf_counter()
+        loaded = VectorStore(store)
+        load = time.perf_counter() - t
+        assert np.array_equal(loaded.x, x)
+        t = time.perf_counter()
+        add_vectors_to_chunks(events, store, os.path.join(tmp, "merged_store.json"))
+        merge = time.perf_counter() - t
+        rows.append(("store, row ranges", size(store), write, load, merge, size(os.path.join(tmp, "merged_store.json"))))
+
+    print(f"{args.windows} windows x {args.dim} float32, {len(chunks)} chunks")
+    print("| format | vectors (MB) | write (s) | load (s) | merge (s) | merged json (MB) |")
+    print("|---|---|---|---|---|---|")
+    for name, sz, w, l, m, msz in rows:
+        print(f"| {name} | {sz / 1e6:.1f} | {w:.2f} | {l:.3f} | {m:.2f} | {msz / 1e6:.1f} |")
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,32 @@
-
 import argparse
 import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../aethermind_perception')))
+from vector_store import VectorStore, attach_vectors, open_vectors
 
-def add_vectors_to_chunks(session_events_path, vector_windows_path, output_path):
+VECTOR_OFFSET = 14400 # another 14400 offset from UTC >> local time
+
+def add_vectors_to_chunks(session_events_path, vector_windows_path, output_path, inline=False):
+    """
+    Attach each chunk's vectors (t in [start, end)). From a vector store, chunks get
+    "vector_store" (path relative to the output file) and "vector_rows" [i0, i1) unless
+    inline=True; a vector_windows.jsonl is always copied inline as "vectors".
+    """
     # Load session_events.json
     with open(session_events_path, "r") as f:
         session = json.load(f)
 
-    # Load all vectors from vector_windows.jsonl
-    vectors = []
-    with open(vector_windows_path, "r") as f:
-        for line in f:
-            vectors.append(json.loads(line))
-
+    vectors = open_vectors(vector_windows_path)
+    store_ref = None
+    if isinstance(vectors, VectorStore) and not inline:
+        store_ref = os.path.relpath(vector_windows_path, os.path.dirname(os.path.abspath(output_path)))
 
     # Support both list and dict session structures
     chunks = session if isinstance(session, list) else session.get("chunks", [])
-    for chunk in chunks:
-        start = chunk["start"]
-        end = chunk["end"]
-        chunk_vectors = [v for v in vectors if start <= v["t"] + 14400 < end] # another 14400 offset from UTC >> local time
-        chunk["vectors"] = chunk_vectors
+    # vectors sorted by time once, each chunk's window is then a binary search
+    attach_vectors(chunks, vectors, offset=VECTOR_OFFSET, store_ref=store_ref)
 
     # If session is a dict, update its chunks
     if isinstance(session, dict):
@@ -34,10 +40,14 @@ def add_vectors_to_chunks(session_events_path, vector_windows_path, output_path)
         json.dump(session, f, indent=2)
 
 
-if __name__ == "__main__":
+def cli(argv=None):
     parser = argparse.ArgumentParser(description="Merge vectors into chunk objects based on time windows.")
     parser.add_argument("--chunks", required=True, help="Path to session_events.json or chunks.json")
-    parser.add_argument("--vectors", required=True, help="Path to vector_windows.jsonl")
+    parser.add_argument("--vectors", required=True, help="Path to the vector_windows.vec store (or a vector_windows.jsonl)")
     parser.add_argument("--output", required=True, help="Path to output merged JSON file")
-    args = parser.parse_args()
-    add_vectors_to_chunks(args.chunks, args.vectors, args.output)
\ No newline at end of file
+    parser.add_argument("--inline", action="store_true", help="Copy the vectors into each chunk instead of row ranges")
+    args = parser.parse_args(argv)
+    add_vectors_to_chunks(args.chunks, args.vectors, args.output, inline=args.inline)
+
+if __name__ == "__main__":
+    cli()
@@ -1,19 +1,24 @@
-import subprocess
+import os
+import sys
 
-def run_full_pipeline(session_folder):
-    # 1. Chunking
-    subprocess.run(["python3", "chunker.py", "--folder", session_folder], check=True)
-    # 2. Event Detection
-    subprocess.run(["python3", "event_detector.py", session_folder], check=True)
-    # 3. Vectorization
-    subprocess.run(["python3", "stream_to_vectors.py", "--folder", session_folder], check=True)
-    # 4. Merge vectors into events
-    subprocess.run([
-        "python3", "add_vectors_to_events.py",
-        "--chunks", f"{session_folder}/session_events.json",
-        "--vectors", f"{session_folder}/vector_windows.jsonl",
-        "--output", f"{session_folder}/session_events_with_vectors.json"
-    ], check=True)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'aethermind_perception')))
+from session_pipeline import run_session
+from stage_cache import CACHE_DIRNAME
+
+def run_full_pipeline(session_folder, out_dir=None):
+    # Chunking, event detection, vectorization and the vector merge in one process
+    # (see aethermind_perception/session_pipeline.py): vectorization runs alongside
+    # chunking + event detection, and only the final outputs are written, to
+    # session_folder (or out_dir): session_events.json, vector_windows.vec,
+    # session_events_with_vectors.json, seeds.jsonl and metrics.json. Chunks and
+    # vectors are cached under <out>/.stage_cache, so a rerun only recomputes what
+    # changed.
+    cache_dir = os.path.join(out_dir or session_folder, CACHE_DIRNAME)
+    _, timings = run_session(session_folder, out_dir, cache_dir=cache_dir)
+    for name, seconds in timings.items():
+        print(f"[pipeline] {name}: {seconds:.2f} s")
 
 # Usage:
-# run_full_pipeline("path/to/session_folder")
\ No newline at end of file
+# run_full_pipeline("path/to/session_folder")
+if __name__ == "__main__":
+    run_full_pipeline(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
@@ -0,0 +1,59 @@
+import sys, os
+# Modules inside aethermind_perception import their siblings by bare name (they are run as
+# scripts from that folder), so put the folder itself on sys.path for the tests as well.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../aethermind_perception')))
+
+import json
+import wave
+
+import cv2
+import numpy as np
+import pytest
+
+from aethermind_perception.chunker import SESSION_CLOCK_OFFSET
+
+SESSION_START = 1754093547.0  # session.json start_time 2025-08-02_00-12-27 as UTC epoch
+
+
+def write_session(folder, seconds=4, fps=10, size=(64, 48), burst=None, clock_offset=SESSION_CLOCK_OFFSET, seed=0):
+    """
+    A synthetic session folder: screen.mp4, audio.wav, actions.jsonl and session.json.
+
+    Active throughout (noise frames and audio, "W" held and the mouse moving every 0.2 s),
+    or only within burst=(t0, t1) seconds, around which the screen is still, the audio a
+    quiet hum and the input logger writes an idle record once a second. Actions are on the
+    recorder's clock, SESSION_START + clock_offset (chunker.SESSION_CLOCK_OFFSET by default).
+    """
+    folder.mkdir()
+    rng = np.random.default_rng(seed)
+    busy = (lambda t: True) if burst is None else (lambda t: burst[0] <= t < burst[1])
+    w, h = size
+    vw = cv2.VideoWriter(str(folder / "screen.mp4"), cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
+    for i in range(seconds * fps):
+        vw.write(rng.integers(0, 255, (h, w, 3), np.uint8) if busy(i / fps) else np.full((h, w, 3), 90, np.uint8))
+    vw.release()
+
+    sr = 8000
+    pcm = rng.integers(-3000, 3000, seconds * sr)
+    quiet = ~np.array([busy(k / sr) for k in range(0, len(pcm), sr // 10)]).repeat(sr // 10)[:len(pcm)]
+    pcm[quiet] //= 60
+    with wave.open(str(folder / "audio.wav"), "wb") as f:
+        f.setnchannels(1); f.setsampwidth(2); f.setframerate(sr)
+        f.writeframes(pcm.astype("<i2").tobytes())
+
+    t0 = SESSION_START + clock_offset
+    times = sorted({round(k * 0.2, 6) for k in range(seconds * 5) if busy(k * 0.2)}
+                   | {float(t) for t in range(seconds) if not busy(t)})
+    with open(folder / "actions.jsonl", "w") as f:
+        for i, t in enumerate(times):
+            record = ({"keys": ["W"], "mouse": {"position": [i, i], "buttons": {"left": i % 2 == 0}}} if busy(t)
+                      else {"keys": [], "mouse": {"position": [5, 5], "buttons": {"left": False}}})
+            f.write(json.dumps({"time": t0 + t, **record}) + "\n")
+    (folder / "session.json").write_text(json.dumps({"start_time": "2025-08-02_00-12-27", "duration": seconds}))
+    return folder
+
+
+@pytest.fixture
+def make_session():
+    """The write_session factory: make_session(tmp_path / "s", seconds=2, burst=(8, 10), ...)."""
+    return write_session
@@ -0,0 +1,75 @@
+import numpy as np
+
+from aethermind_perception.action_index import ActionIndex, TimeIndex, action_features
+from aethermind_perception.stream_to_vectors import summarize_actions
+
+
+def _actions(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.sort(rng.uniform(100.0, 110.0, n))
+    t[10:14] = t[10]  # ties keep file order
+    return [{"time": float(ts), "keys": ["W"] * int(rng.integers(0, 3)),
+             "mouse": {"position": [int(rng.integers(0, 1920)), int(rng.integers(0, 1080))],
+                       "buttons": {"left": bool(rng.random() < 0.3), "right": bool(rng.random() < 0.1), "middle": False}}}
+            for ts in t]
+
+
+def _summarize_by_scan(actions, start_ts, end_ts):
+    # the original list-scan implementation
+    window_actions = [a for a in actions if start_ts <= a['time'] < end_ts]
+    left_clicks = sum(1 for a in window_actions if a['mouse']['buttons']['left'])
+    right_clicks = sum(1 for a in window_actions if a['mouse']['buttons']['right'])
+    key_presses = sum(len(a['keys']) for a in window_actions)
+    mouse_dist = 0.0
+    for prev, a in zip(window_actions, window_actions[1:]):
+        mouse_dist += np.linalg.norm(np.array(a['mouse']['position']) - np.array(prev['mouse']['position']))
+    return np.array([left_clicks, right_clicks, key_presses, mouse_dist])
+
+
+def test_window_matches_scan_and_sorts_stably():
+    actions = _actions()
+    shuffled = actions[::-1][:250] + actions[:250][::-1]
+    for records in (actions, shuffled):
+        index = ActionIndex.from_records(records)
+        assert np.all(np.diff(index.ts) >= 0)
+        for t0, t1 in [(100.0, 101.0), (104.25, 104.75), (actions[10]["time"], actions[20]["time"]), (120.0, 130.0)]:
+            got = index.window(t0, t1)
+            assert sorted(map(id, got)) == sorted(id(a) for a in records if t0 <= a["time"] < t1)
+    ties = ActionIndex.from_records(actions[::-1]).window(actions[10]["time"], actions[14]["time"])
+    assert ties == actions[10:14][::-1]
+
+
+def test_time_index_offset():
+    vectors = [{"t": float(i)} for i in range(10)]
+    index = TimeIndex.from_records(vectors, key="t", offset=100.0)
+    assert index.window(103.0, 105.0) == vectors[3:5]
+    assert index.span(0.0, 50.0) == (0, 0)
+
+
+def test_summarize_actions_matches_scan():
+    actions = _actions()
+    index = ActionIndex.from_records(actions)
+    for i in range(20):
+        t0 = 100.0 + i * 0.5
+        np.testing.assert_allclose(summarize_actions(index, t0, t0 + 0.5), _summarize_by_scan(actions, t0, t0 + 0.5),
+                                   rtol=1e-12)
+    np.testing.assert_allclose(summarize_actions(actions, 100.0, 110.0), _summarize_by_scan(actions, 100.0, 110.0),
+                               rtol=1e-12)
+
+
+def test_action_features_all_windows_at_once():
+    actions = _actions()
+    index = ActionIndex.from_records(actions)
+    # back-to-back, overlapping, empty and out-of-range windows
+    t0 = np.concatenate([100.0 + np.arange(20) * 0.5, [101.0, 105.5, 99.0, 111.0]])
+    t1 = np.concatenate([t0[:20] + 0.5, [104.0, 105.5, 100.0, 112.0]])
+    feats = action_features(index, t0, t1)
+    for k in range(len(t0)):
+        ref = _summarize_by_scan(actions, t0[k], t1[k])
+        got = [feats[f][k] for f in ("left_clicks", "right_clicks", "key_presses", "mouse_dist")]
+        np.testing.assert_allclose(got, ref, rtol=1e-12)
+        win = [a for a in actions if t0[k] <= a["time"] < t1[k]]
+        dx = win[-1]["mouse"]["position"][0] - win[0]["mouse"]["position"][0] if win else 0
+        dy = win[-1]["mouse"]["position"][1] - win[0]["mouse"]["position"][1] if win else 0
+        assert (feats["mouse_dx"][k], feats["mouse_dy"][k]) == (dx, dy)
+    assert feats["left_clicks"].dtype.kind == "i"
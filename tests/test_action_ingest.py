@@ -0,0 +1,102 @@
+import json
+
+import numpy as np
+import pytest
+
+from aethermind_perception import action_ingest
+from aethermind_perception.action_ingest import (
+    ActionRecords, load_action_columns, load_action_index, parse_actions, read_jsonl,
+)
+
+RECORDS = [
+    {"time": 10.5, "keys": ["W", "SPACE"], "mouse": {"position": [3, 4], "buttons": {"left": True, "right": False, "middle": False}, "scroll": [0, -1]}},
+    {"time": 10.0, "keys": [], "mouse": {"position": [1, 2], "buttons": {"left": False, "right": True, "middle": False}, "scroll": [0, 0]}},
+    {"time": 10.5, "keys": ["E"]},  # tie with the first record, no mouse
+    {"time": 11.0, "keys": ["W"], "mouse": {"position": [5.5, 6], "buttons": {"left": False, "x1": True}}, "window": "game"},
+    {"time": 12.0, "mouse": {"buttons": {}, "wheel_mode": 2}},
+]
+
+
+def _write(path, records):
+    path.write_text("".join(json.dumps(r) + "\n" for r in records) + "\n")
+    return path
+
+
+def test_columns_round_trip_to_the_same_dicts():
+    cols = parse_actions(RECORDS)
+    rows = list(ActionRecords(cols))
+    assert rows == [RECORDS[1], RECORDS[0], RECORDS[2], RECORDS[3], RECORDS[4]]
+    assert cols["pos"].dtype == np.float64  # 5.5 somewhere in the log
+    assert isinstance(rows[0]["mouse"]["scroll"][1], int)
+    assert ActionRecords(cols)[-1] == RECORDS[4]
+    assert ActionRecords(cols)[1:3] == [RECORDS[0], RECORDS[2]]
+
+
+def test_parse_actions_skips_and_coerces_bad_lines():
+    cols = parse_actions([RECORDS[0], {"keys": []}, "oops",
+                          {"time": 1.0, "keys": "W", "mouse": {"position": [1, 2, 3], "buttons": {"left": 1}}},
+                          {"time": 2.0, "mouse": {"position": None}}, {"time": 3.0, "mouse": "?"}])
+    assert cols["skipped_lines"].tolist() == [2, 3]
+    assert cols["coerced_lines"].tolist() == [4, 5, 6]
+    assert list(ActionRecords(cols)) == [
+        {"time": 1.0, "keys": ["W"], "mouse": {"buttons": {"left": True}}},
+        {"time": 2.0, "mouse": {}},
+        {"time": 3.0},
+        RECORDS[0],
+    ]
+    assert parse_actions(RECORDS)["coerced_lines"].tolist() == []
+
+
+def test_read_jsonl_matches_stdlib(tmp_path, monkeypatch):
+    path = _write(tmp_path / "actions.jsonl", RECORDS)
+    fast = read_jsonl(path)
+    monkeypatch.setattr(action_ingest, "loads", json.loads)
+    assert read_jsonl(path) == fast == RECORDS
+    assert action_ingest.DECODER in ("orjson", "msgspec", "json")
+
+
+def test_column_cache_is_reused_and_invalidated(tmp_path, monkeypatch):
+    path = _write(tmp_path / "actions.jsonl", RECORDS)
+    cols = load_action_columns(path)
+    assert (tmp_path / "actions.jsonl.cols.npz").exists()
+
+    action_ingest._LOADED.clear()
+    monkeypatch.setattr(action_ingest, "read_jsonl_lines", lambda p: pytest.fail("cache miss"))
+    cached = load_action_columns(path)
+    assert all(np.array_equal(cols[k], cached[k]) for k in cols)
+    monkeypatch.undo()
+
+    _write(path, RECORDS[:2])  # the log changed: size/mtime no longer match
+    assert len(load_action_columns(path)["time"]) == 2
+
+
+def test_load_action_index_windows(tmp_path):
+    path = _write(tmp_path / "actions.jsonl", RECORDS)
+    index = load_action_index(path, video_start_ts=9.0, cache=False)
+    assert index.window(10.5, 11.5) == [RECORDS[0], RECORDS[2], RECORDS[3]]
+    assert index.n_keys.tolist() == [0, 2, 1, 1, 0]
+    assert index.left.tolist() == [False, True, False, False, False]
+    assert np.isnan(index.mouse_x[2]) and index.mouse_x[3] == 5.5
+
+
+def test_load_action_index_survives_bad_lines(tmp_path, capsys):
+    path = tmp_path / "actions.jsonl"
+    path.write_text(json.dumps(RECORDS[1]) + "\n{not json\n" + json.dumps({"time": 11.0, "mouse": {"position": None}}) + "\n")
+    index = load_action_index(path, cache=False)
+    assert len(index) == 2 and np.isnan(index.mouse_x[1])
+    err = capsys.readouterr().out
+    assert "skipped 1 unusable action line(s): 2" in err and "coerced fields on 1 action line(s): 3" in err
+
+
+def test_records_round_trip_key_order_and_number_types(tmp_path):
+    records = [
+        {"time": 100, "mouse": {"buttons": {"right": True, "left": True}, "position": [5, 6.5]}, "keys": ["W"]},
+        {"window": "game", "time": 99.5, "keys": [], "mouse": {"scroll": [0.0, -1], "position": [1, 2]}},
+        {"time": 100, "mouse": {"x2": False, "buttons": {"x1": True, "middle": False, "left": False}}},
+        {"time": 98, "keys": ["E", "W"]},
+    ]
+    path = _write(tmp_path / "actions.jsonl", records)
+    cols = load_action_columns(path, cache=False)
+    expected = sorted(read_jsonl(path), key=lambda r: r["time"])
+    # json.dumps compares key order and 100 vs 100.0, which == on the dicts would not
+    assert [json.dumps(r) for r in ActionRecords(cols)] == [json.dumps(r) for r in expected]
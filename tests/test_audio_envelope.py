@@ -0,0 +1,64 @@
+import os
+import wave
+
+import numpy as np
+
+from aethermind_perception.session_audio import SessionAudio, pcm16_rms
+from aethermind_perception.audio_envelope import AudioEnvelope, load_envelope
+
+
+def _write_wav(path, samples, sr):
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(samples.shape[1]); wf.setsampwidth(2); wf.setframerate(sr)
+        wf.writeframes(samples.tobytes())
+
+
+def _session(tmp_path, channels=2, seconds=3, sr=8000):
+    rng = np.random.default_rng(7)
+    x = rng.integers(-32768, 32767, (sr * seconds + 333, channels), dtype=np.int16)
+    _write_wav(tmp_path / "audio.wav", x, sr)
+    return SessionAudio(tmp_path / "audio.wav", start_ts=1000.0), x
+
+
+def test_window_stats_match_direct_computation(tmp_path):
+    audio, x = _session(tmp_path)
+    env = AudioEnvelope.compute(audio, hop=256, blocks_per_pass=5)
+    rng = np.random.default_rng(0)
+    for _ in range(40):
+        a0 = int(rng.integers(0, len(x)))
+        a1 = int(min(len(x), a0 + rng.integers(0, 9000)))
+        # int16 squared in a wide dtype: no overflow, and exact
+        assert env.energy(a0, a1) == pcm16_rms(x[a0:a1])
+        ref = x[a0:a1].astype(np.float64) / 32768.0
+        mean, std = env.mean_std(a0, a1)
+        if ref.size:
+            assert abs(mean - ref.mean()) < 1e-12
+            assert abs(std - ref.std()) < 1e-12
+        else:
+            assert (mean, std) == (0.0, 0.0)
+
+
+def test_rms_frames_are_centred_session_frames(tmp_path):
+    audio, x = _session(tmp_path, channels=1)
+    hop = 512
+    env = AudioEnvelope.compute(audio, hop=hop)
+    y = np.pad(x[:, 0].astype(np.float64) / 32768.0, hop)
+    ref = [np.sqrt(np.mean(y[j * hop: j * hop + 2 * hop] ** 2)) for j in range(len(x) // hop + 1)]
+    assert np.allclose(env.rms, ref, atol=1e-6)
+    # frames whose centres lie in the window, straight out of the cached array
+    assert np.array_equal(env.rms_frames(1000, 3000), env.rms[2:6])
+
+
+def test_envelope_is_cached_next_to_the_wav_and_invalidated(tmp_path):
+    audio, x = _session(tmp_path)
+    env = load_envelope(audio, hop=1024)
+    cache = tmp_path / "audio.wav.rms1024.npz"
+    assert cache.exists()
+    again = load_envelope(SessionAudio(tmp_path / "audio.wav", start_ts=1000.0), hop=1024)
+    assert again is not env and np.array_equal(again.rms, env.rms)
+
+    _write_wav(tmp_path / "audio.wav", x[: len(x) // 2], 8000)
+    st = os.stat(cache)
+    os.utime(tmp_path / "audio.wav", ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    fresh = load_envelope(SessionAudio(tmp_path / "audio.wav", start_ts=1000.0), hop=1024)
+    assert len(fresh.rms) < len(env.rms)
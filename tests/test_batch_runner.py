@@ -0,0 +1,45 @@
+import json
+
+from aethermind_perception.batch_runner import SUMMARY, find_sessions, run_batch
+from aethermind_perception.session_pipeline import run_session
+
+
+def test_run_batch_outputs_failures_and_resume(tmp_path, make_session, capsys):
+    root = tmp_path / "sessions"
+    root.mkdir()
+    make_session(root / "a")
+    make_session(root / "b", seconds=2)
+    make_session(root / "broken", seconds=2)
+    (root / "broken" / "session.json").write_text("{}")  # no start_time
+    (root / "notes").mkdir()
+    assert [f.name for f in find_sessions(root)] == ["a", "b", "broken"]
+
+    summary = run_batch(root, tmp_path / "out", workers=2)
+    assert (summary["sessions"], summary["ok"], summary["failed"], summary["chunks"]) == (3, 2, 1, 3)
+    by_name = {r["session"]: r for r in summary["results"]}
+    assert by_name["a"]["chunks"] == 2 and set(by_name["a"]["timings"]) >= {"chunks", "vectors", "merged"}
+    assert by_name["broken"]["status"] == "failed" and "start_time" in by_name["broken"]["error"]
+    assert json.loads((tmp_path / "out" / SUMMARY).read_text()) == summary
+
+    # same files as a single-session run
+    run_session(root / "a", tmp_path / "single")
+    for name in ("session_events.json", "session_events_with_vectors.json"):
+        batch = (tmp_path / "out" / "a" / name).read_text().replace(str(tmp_path / "out" / "a"), "OUT")
+        single = (tmp_path / "single" / name).read_text().replace(str(tmp_path / "single"), "OUT")
+        assert json.loads(batch) == json.loads(single)
+
+    # a rerun skips what is done; retry_failed reruns the failure only
+    capsys.readouterr()
+    again = run_batch(root, tmp_path / "out", workers=2)
+    assert "3 already done, 0 to run" in capsys.readouterr().out
+    assert all(r["resumed"] for r in again["results"]) and again["ok"] == 2
+    run_batch(root, tmp_path / "out", workers=2, retry_failed=True)
+    assert "2 already done, 1 to run" in capsys.readouterr().out
+
+
+def test_run_batch_timeout(tmp_path, make_session):
+    root = tmp_path / "sessions"
+    root.mkdir()
+    make_session(root / "a")
+    summary = run_batch(root, tmp_path / "out", workers=1, timeout_s=0.01)
+    assert summary["results"][0]["status"] == "timeout" and summary["ok"] == 0
@@ -0,0 +1,150 @@
+import json
+import shutil
+import wave
+from pathlib import Path
+
+import numpy as np
+import cv2
+import pytest
+
+from aethermind_perception.chunker import chunk_job, chunk_video_audio_with_actions, chunk_with_cache, process_chunk
+from aethermind_perception.stage_cache import StageCache
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not on PATH")
+
+
+@pytest.fixture
+def session(tmp_path):
+    """Tiny 5 s session: moving texture video, sine-wave audio, 10 Hz action log."""
+    fps, w, h, dur = 15, 64, 48, 5.0
+    rng = np.random.default_rng(0)
+    tex = rng.integers(0, 255, (h, w * 2, 3), dtype=np.uint8)
+    video = tmp_path / "screen.avi"
+    vw = cv2.VideoWriter(str(video), cv2.VideoWriter_fourcc(*"MJPG"), fps, (w, h))
+    for i in range(int(dur * fps)):
+        vw.write(np.ascontiguousarray(tex[:, i % w: i % w + w]))
+    vw.release()
+
+    sr = 8000
+    t = np.arange(int(dur * sr)) / sr
+    audio = tmp_path / "audio.wav"
+    with wave.open(str(audio), "wb") as wf:
+        wf.setnchannels(1); wf.setsampwidth(2); wf.setframerate(sr)
+        wf.writeframes((np.sin(2 * np.pi * 220 * t) * 8000).astype(np.int16).tobytes())
+
+    start_ts = 1754107947.0
+    actions = tmp_path / "actions.jsonl"
+    with open(actions, "w") as f:
+        for i in range(int(dur * 10)):
+            f.write(json.dumps({
+                "time": start_ts + i * 0.1,
+                "keys": ["W"] if i % 3 == 0 else [],
+                "mouse": {"position": [i, 2 * i], "buttons": {"left": i % 4 == 0, "right": False, "middle": False}},
+            }) + "\n")
+    return {"video": str(video), "audio": str(audio), "actions": str(actions), "start_ts": start_ts}
+
+
+def _strip_paths(chunks):
+    return [{**c, "video_path": c["video_path"].split("/")[-1], "audio_path": c["audio_path"].split("/")[-1]}
+            for c in chunks]
+
+
+@needs_ffmpeg
+def test_process_chunk_reports_failure_instead_of_raising(tmp_path):
+    job = chunk_job(3, (10.0, 12.0), (6.0, 8.0), tmp_path / "missing.mp4", tmp_path / "missing.wav", tmp_path, 4.0, [],
+                    window=([], (64, 48), 15), motion=0.0, dropped_frames=0, write_chunks="none",
+                    audio_backend="ffmpeg")
+    res = process_chunk(job)
+    assert res["ok"] is False
+    failure = res["failure"]
+    assert failure["chunk_index"] == 3
+    assert (failure["start"], failure["end"]) == (10.0, 12.0)
+    assert "worker_pid" in failure and failure["traceback"]
+    # the missing audio failed the chunk, not a malformed job
+    assert failure["error"].startswith("CalledProcessError(") and "missing.wav" in failure["error"]
+
+
+@needs_ffmpeg
+def test_stream_mode_pool_matches_serial(session, tmp_path):
+    kwargs = dict(chunk_duration=2.0, video_start_ts=session["start_ts"], mode="stream", write_chunks="none")
+    serial = chunk_video_audio_with_actions(session["video"], session["audio"], session["actions"],
+                                            output_dir=str(tmp_path / "serial"), workers=1, **kwargs)
+    pooled = chunk_video_audio_with_actions(session["video"], session["audio"], session["actions"],
+                                            output_dir=str(tmp_path / "pooled"), workers=2, **kwargs)
+    assert [(c["start"], c["end"]) for c in serial] == [
+        (session["start_ts"], session["start_ts"] + 2.0),
+        (session["start_ts"] + 2.0, session["start_ts"] + 4.0),
+        (session["start_ts"] + 4.0, session["start_ts"] + 5.0),
+    ]
+    assert sum(len(c["actions"]) for c in serial) > 0
+    assert _strip_paths(serial) == _strip_paths(pooled)
+    assert not (tmp_path / "pooled" / "chunk_failures.json").exists()
+
+
+@needs_ffmpeg
+def test_slice_audio_backend_matches_ffmpeg(session, tmp_path):
+    kwargs = dict(chunk_duration=2.0, video_start_ts=session["start_ts"], mode="stream", write_chunks="none")
+    via_ffmpeg = chunk_video_audio_with_actions(session["video"], session["audio"], session["actions"],
+                                                output_dir=str(tmp_path / "ffmpeg"), audio_backend="ffmpeg", **kwargs)
+    via_slice = chunk_video_audio_with_actions(session["video"], session["audio"], session["actions"],
+                                               output_dir=str(tmp_path / "slice"), audio_backend="slice", **kwargs)
+    assert len(via_ffmpeg) == len(via_slice)
+    for a, b in zip(via_ffmpeg, via_slice):
+        with wave.open(a["audio_path"]) as wa, wave.open(b["audio_path"]) as wb:
+            assert wa.getparams()[:3] == wb.getparams()[:3]
+            assert wa.readframes(wa.getnframes()) == wb.readframes(wb.getnframes())
+        assert b["raw_energy"] > 0
+
+    no_files = chunk_video_audio_with_actions(session["video"], session["audio"], session["actions"],
+                                              output_dir=str(tmp_path / "nofiles"), audio_backend="slice",
+                                              write_audio=False, **kwargs)
+    assert [c["raw_energy"] for c in no_files] == [c["raw_energy"] for c in via_slice]
+    assert not any(Path(c["audio_path"]).exists() for c in no_files)
+
+
+@needs_ffmpeg
+def test_chunk_records_carry_event_metrics(session, tmp_path):
+    from aethermind_perception.event_detector import compute_video_motion
+    chunks = chunk_video_audio_with_actions(session["video"], session["audio"], session["actions"],
+                                            output_dir=str(tmp_path / "out"), chunk_duration=2.0,
+                                            video_start_ts=session["start_ts"], mode="stream", write_chunks="none")
+    assert all(c["raw_motion"] > 0 and c["raw_energy"] > 0 for c in chunks)
+
+    # the whole clip as one window measures what the detector's own decode measures
+    whole = chunk_video_audio_with_actions(session["video"], session["audio"], session["actions"],
+                                           output_dir=str(tmp_path / "whole"), chunk_duration=10.0,
+                                           video_start_ts=session["start_ts"], mode="stream", write_chunks="none")
+    assert whole[0]["raw_motion"] == pytest.approx(compute_video_motion(session["video"]), rel=1e-9)
+
+
+def test_a_bad_action_line_does_not_abort_chunking(session, tmp_path):
+    lines = Path(session["actions"]).read_text().splitlines()
+    lines[7] = '{"time": "soon", "keys": ["W"]}'
+    lines[12] = lines[12].replace('"keys": ["W"]', '"keys": "W"').replace('"left": true', '"left": 1')
+    Path(session["actions"]).write_text("\n".join(lines[:20] + ["{truncated"] + lines[20:]) + "\n")
+    chunks = chunk_video_audio_with_actions(session["video"], session["audio"], session["actions"],
+                                            output_dir=str(tmp_path / "out"), chunk_duration=2.0,
+                                            video_start_ts=session["start_ts"], mode="stream", write_chunks="none")
+    assert len(chunks) == 3
+    assert sum(len(c["actions"]) for c in chunks) == 49
+
+
+@needs_ffmpeg
+def test_cache_keeps_chunk_media_only_on_request(session, tmp_path):
+    def run(cache, out, **kwargs):
+        return chunk_with_cache(cache, session["video"], session["audio"], session["actions"], 2.0, str(tmp_path / out),
+                                session["start_ts"], **kwargs)
+    cache = StageCache(tmp_path / "cache")
+    first = run(cache, "a")
+    assert not list((tmp_path / "cache").rglob("chunk_*"))  # records and seeds only
+    again = run(cache, "b")  # a hit cuts the media from the inputs again
+    assert _strip_paths(again) == _strip_paths(first)
+    for c in again:
+        a_wav = tmp_path / "a" / Path(c["audio_path"]).name
+        assert Path(c["audio_path"]).read_bytes() == a_wav.read_bytes()
+        assert Path(c["video_path"]).stat().st_size > 0
+
+    media = StageCache(tmp_path / "media_cache")
+    run(media, "c", cache_media=True)
+    assert len(list((tmp_path / "media_cache").rglob("chunk_*"))) == 2 * len(first)
+    assert _strip_paths(run(media, "d")) == _strip_paths(first)
@@ -0,0 +1,48 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+PKG = os.path.abspath(os.path.join(os.path.dirname(__file__), "../aethermind_perception"))
+CLI = os.path.join(PKG, "cli.py")
+
+
+def _loaded(code):
+    # modules imported by `code` in a fresh interpreter, run from the package folder
+    out = subprocess.run([sys.executable, "-c", f"import sys\n{code}\nprint(sorted(sys.modules))"],
+                         cwd=PKG, capture_output=True, text=True, check=True).stdout
+    return set(eval(out.strip().splitlines()[-1]))
+
+
+HEAVY = {"cv2", "numpy", "moviepy", "librosa", "scipy", "numba"}
+
+
+def test_each_command_loads_only_numpy_of_the_heavy_dependencies():
+    # cv2 is imported where frames are decoded, moviepy for --mode encode, librosa to decode a file
+    from aethermind_perception.cli import COMMANDS
+    for name in COMMANDS:
+        assert HEAVY & _loaded(f"import cli\ncli.load({name!r})") == {"numpy"}, name
+
+
+def test_cli_help_lists_commands_without_loading_them():
+    from aethermind_perception.cli import COMMANDS
+    out = subprocess.run([sys.executable, CLI, "--help"], capture_output=True, text=True, check=True).stdout
+    assert all(name in out for name in COMMANDS)
+    assert not {"numpy", "cv2"} & _loaded("import cli")
+    bad = subprocess.run([sys.executable, CLI, "nope"], capture_output=True, text=True)
+    assert bad.returncode == 2 and "unknown command" in bad.stderr
+
+
+def test_cli_dispatches_to_the_module(tmp_path, capsys):
+    from aethermind_perception.cli import main
+    from aethermind_perception.vector_store import VectorStoreWriter, vector_columns
+    with VectorStoreWriter(tmp_path / "v.vec", vector_columns(3)) as w:
+        for t in range(4):
+            w.append(t=float(t), x=np.ones(3, np.float32))
+    argv0 = sys.argv[0]
+    assert main(["store", str(tmp_path / "v.vec"), "--jsonl", str(tmp_path / "v.jsonl")]) == 0
+    assert sys.argv[0] == argv0
+    assert json.loads(capsys.readouterr().out.split("\n4 rows")[0])["rows"] == 4
+    assert len((tmp_path / "v.jsonl").read_text().splitlines()) == 4
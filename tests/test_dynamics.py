@@ -0,0 +1,53 @@
+import numpy as np
+import cv2
+import pytest
+
+from aethermind_perception.dynamics_computation import FlowEngine, compute_optical_flow
+
+
+def _pan_frames(n=5, step=(2, 1), size=(240, 180)):
+    rng = np.random.default_rng(3)
+    w, h = size
+    big = cv2.GaussianBlur(rng.integers(0, 255, (h + n * step[1], w + n * step[0], 3), dtype=np.uint8), (7, 7), 0)
+    return [np.ascontiguousarray(big[i * step[1]: i * step[1] + h, i * step[0]: i * step[0] + w]) for i in range(n)]
+
+
+@pytest.mark.parametrize("cfg", [
+    dict(method="farneback"),
+    dict(method="farneback", scale=0.5),
+    dict(method="lk"),
+    dict(method="lk", scale=0.5, roi=(20, 20, 160, 120)),
+])
+def test_flow_engines_report_source_pixels(cfg):
+    out = compute_optical_flow(_pan_frames(), frame_idx_start=10, engine=FlowEngine(**cfg))
+    assert abs(out["flow_mean"] - np.hypot(2, 1)) < 0.25
+    assert out["flow_method"] == cfg["method"]
+    assert (out["frame_idx_start"], out["frame_idx_end"]) == (10, 14)
+
+
+def test_frame_diff_and_static_clip():
+    frames = _pan_frames()
+    still = [frames[0].copy() for _ in range(4)]
+    diff = FlowEngine(method="diff")
+    assert compute_optical_flow(still, engine=diff)["flow_mean"] == 0.0
+    assert compute_optical_flow(frames, engine=diff)["flow_mean"] > 0.0
+    assert compute_optical_flow(still, engine=FlowEngine())["flow_mean"] < 1e-3
+
+
+def test_flow_buffers_are_reused():
+    engine = FlowEngine(method="farneback", scale=0.5)
+    compute_optical_flow(_pan_frames(), engine=engine)
+    flow_buf = engine._flow
+    compute_optical_flow(_pan_frames(), engine=engine)
+    assert engine._flow is flow_buf
+    with pytest.raises(ValueError):
+        FlowEngine(method="nope")
+
+
+@pytest.mark.parametrize("n", [0, 100, 2048, 5000, 96001])
+def test_rms_frames_match_librosa(n):
+    librosa = pytest.importorskip("librosa")
+    from aethermind_perception.dynamics_computation import rms_frames
+    y = (np.random.default_rng(n).standard_normal(n) * 0.3).astype(np.float32)
+    ref = librosa.feature.rms(y=y, frame_length=2048, hop_length=1024)[0]
+    assert np.allclose(rms_frames(y), ref, atol=1e-6)
@@ -0,0 +1,84 @@
+import threading
+import wave
+
+import numpy as np
+import pytest
+
+from aethermind_perception.embedders import (
+    ProjectionEmbedder, SpectrumEmbedder, batched, get_audio_embedder, prefetch,
+)
+from aethermind_perception.session_audio import open_session_audio
+from aethermind_perception.stream_to_vectors import embed_video, main
+from aethermind_perception.vector_store import VectorStore
+
+
+def _frames(n, seed):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 255, (36, 64, 3), dtype=np.uint8) for _ in range(n)]
+
+
+def test_prefetch_keeps_order_and_raises():
+    assert list(prefetch(iter(range(100)), depth=3)) == list(range(100))
+
+    def broken():
+        yield 1
+        raise RuntimeError("decode failed")
+    with pytest.raises(RuntimeError, match="decode failed"):
+        list(prefetch(broken()))
+
+    # leaving early stops the producer thread
+    before = threading.active_count()
+    for x in prefetch(iter(range(10 ** 6)), depth=2):
+        if x == 5:
+            break
+    assert threading.active_count() == before
+    assert list(batched(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_embed_video_keeps_the_mean_rgb_stub():
+    frames = _frames(4, 0)
+    expected = np.stack([f.mean(axis=(0, 1)) for f in frames]).mean(axis=0)
+    assert np.array_equal(embed_video(frames), expected)
+    assert np.array_equal(embed_video([]), np.zeros(3))
+
+
+def test_batches_match_single_windows(tmp_path):
+    emb = ProjectionEmbedder(dim=16, size=8)
+    windows = [_frames(3, 1), [], _frames(5, 2)]
+    batch = emb.embed([emb.prepare(w) for w in windows])
+    assert batch.shape == (3, 16)
+    for k, w in enumerate(windows):
+        assert np.allclose(batch[k], emb.embed([emb.prepare(w)])[0], atol=1e-6)
+    assert np.allclose(np.linalg.norm(batch[[0, 2]], axis=1), 1.0) and not batch[1].any()
+
+    sr = 8000
+    t = np.arange(sr) / sr
+    pcm = (np.sin(2 * np.pi * 440 * t) * 8000).astype("<i2")
+    with wave.open(str(tmp_path / "a.wav"), "wb") as w:
+        w.setnchannels(1); w.setsampwidth(2); w.setframerate(sr)
+        w.writeframes(pcm.tobytes())
+    audio = open_session_audio(tmp_path / "a.wav")
+    ranges = [(0, 4000), (4000, 8000)]
+    spec = SpectrumEmbedder(dim=24)
+    both = spec.embed(audio, ranges)
+    assert both.shape == (2, 24)
+    assert np.allclose(both[1], spec.embed(audio, ranges[1:])[0])
+    stats = get_audio_embedder("mean_std").embed(audio, ranges)
+    assert np.allclose(stats[0], [pcm[:4000].mean() / 32768, (pcm[:4000] / 32768).std()])
+
+
+def test_vectorizer_output_does_not_depend_on_batch_size(tmp_path, make_session):
+    make_session(tmp_path / "s", seconds=3, size=(64, 36), clock_offset=0)
+    main(str(tmp_path / "s"), batch_size=1)
+    one = VectorStore(tmp_path / "s" / "vector_windows.vec")
+    ref = np.array(one.x), list(one)
+    main(str(tmp_path / "s"), batch_size=4)
+    four = VectorStore(tmp_path / "s" / "vector_windows.vec")
+    assert np.array_equal(four.x, ref[0]) and list(four) == ref[1]
+    assert len(four) == 6 and four.meta["x"][:3] == ["video_r", "video_g", "video_b"]
+
+    main(str(tmp_path / "s"), video_embedder="projection", audio_embedder="spectrum",
+         video_dim=32, audio_dim=8, batch_size=4)
+    store = VectorStore(tmp_path / "s" / "vector_windows.vec")
+    assert store.x.shape == (6, 32 + 8 + 4) and len(store.meta["x"]) == 44
+    assert np.array_equal(store.x[:, -4:], ref[0][:, -4:])
@@ -1,7 +1,8 @@
 
-import sys, os
+import sys, os, json
+import pytest
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from aethermind_perception.event_detector import detect_events
+from aethermind_perception.event_detector import detect_events, score_events, OnlineEventDetector, _RunningRange
 
 def test_detect_events_on_all_sessions():
     sessions_root = os.path.join(os.path.dirname(__file__), '../chunks')
@@ -23,6 +24,67 @@ def test_detect_events_on_all_sessions():
             assert isinstance(event['is_event'], bool), f"'is_event' not bool in {session_dir}"
 
 
+def test_detect_events_scores_precomputed_metrics_without_media(tmp_path):
+    # chunk files don't exist: with raw_motion/raw_energy in the records nothing is decoded
+    chunks = [{"start": float(i), "end": float(i + 1), "video_path": f"chunk_{i:04d}.mp4",
+               "audio_path": f"chunk_{i:04d}.wav", "raw_motion": m, "raw_energy": e}
+              for i, (m, e) in enumerate([(1.0, 100.0), (5.0, 300.0), (3.0, 100.0)])]
+    (tmp_path / "session.json").write_text(json.dumps({"chunks": chunks}))
+    events = detect_events(str(tmp_path))
+    assert [ev["event_score"] for ev in events] == pytest.approx([0.0, 1.0, 0.3])
+    assert [ev["is_event"] for ev in events] == [False, True, False]
+    assert (tmp_path / "session_events.json").exists()
+
+
+def _metric_chunks(n=40, seed=1):
+    import random
+    rng = random.Random(seed)
+    return [{"start": float(i), "end": float(i + 1), "raw_motion": rng.uniform(0, 10), "raw_energy": rng.uniform(0, 500)}
+            for i in range(n)]
+
+
+def test_running_range_matches_brute_force():
+    values = [c["raw_motion"] for c in _metric_chunks()]
+    rr = _RunningRange(window=7)
+    for i, x in enumerate(values):
+        rr.add(x)
+        recent = values[max(0, i - 6): i + 1]
+        assert (rr.lo, rr.hi) == (min(recent), max(recent))
+
+
+def test_online_detector_matches_batch_when_it_sees_everything():
+    chunks = _metric_chunks()
+    det = OnlineEventDetector(window=None, delay=len(chunks), keep_history=True)
+    assert all(det.update(c) == [] for c in chunks)
+    batch = score_events([dict(c) for c in chunks])
+    assert det.flush() == batch == det.finalize()
+
+    # by default nothing is kept past the window; finalize takes the chunks instead
+    det = OnlineEventDetector(window=4, delay=1)
+    for c in chunks:
+        det.update(c)
+    assert det.history is None and det.finalize(chunks) == batch
+    with pytest.raises(ValueError, match="keep_history"):
+        det.finalize()
+
+
+def test_online_detector_decides_with_bounded_latency():
+    chunks = [{"start": float(i), "end": float(i + 1), "raw_motion": 1.0, "raw_energy": 100.0}
+              for i in range(20)]
+    chunks[12] = {**chunks[12], "raw_motion": 30.0, "raw_energy": 900.0}
+    det = OnlineEventDetector(window=8, delay=2)
+    decided = []
+    for i, c in enumerate(chunks):
+        out = det.update(c)
+        assert [d["start"] for d in out] == ([float(i - 2)] if i >= 2 else [])
+        decided += out
+        if i == 14:
+            assert decided[-1]["start"] == 12.0 and decided[-1]["is_event"]
+    decided += det.flush()
+    assert [d["start"] for d in decided] == [c["start"] for c in chunks]
+    assert [d["start"] for d in decided if d["is_event"]] == [12.0]
+
+
 if __name__ == "__main__":
     try:
         test_detect_events_on_all_sessions()
@@ -1,5 +1,7 @@
+import json
 import re
 import numpy as np
+import pytest
 
 # Import the pipeline and modules under test
 from aethermind_perception.aethermind_pipeline import process_event
@@ -86,14 +88,47 @@ def test_process_actions_mouse_norm_and_semantics():
     assert 0.0 <= my1 <= 1.0
 
 
+def test_process_actions_is_idempotent_and_takes_game_profiles(tmp_path):
+    from aethermind_perception.input_semantics_mapper import process_actions
+
+    raw_actions = [
+        {"ts": 1.0, "keys": ["Q", "E"], "mouse": {"position": [1920, 0]}},
+        {"ts": 1.1, "keys": ["Q"], "mouse": {"buttons": {"middle": True, "left": True}}},
+        {"ts": 1.2, "keys": "W", "mouse": {"position": [480, 810.0], "buttons": {"right": False}}},
+    ]
+    processed = process_actions(raw_actions, resolution=(1920, 1080))
+    assert [a["semantic"]["action"] for a in processed] == ["interact", "click_middle", None]
+    assert [a["semantic"]["valid_for_game"] for a in processed] == [True, True, False]
+    # clipped bounds stay the ints 0 and 1, as the per-action mapper gave them
+    assert [a["semantic"]["mouse_norm"] for a in processed] == [[1, 0], [0, 0], [0.25, 0.75]]
+    assert json.dumps(processed[0]["semantic"]["mouse_norm"]) == "[1, 0]"
+
+    # already-semantic actions pass through, alone or mixed with raw ones
+    assert process_actions(processed) == processed
+    mixed = process_actions([processed[0], raw_actions[1]])
+    assert mixed[0] is processed[0] and mixed[1] == processed[1]
+
+    profile = tmp_path / "profile.json"
+    profile.write_text(json.dumps({"keys": {"Q": "ability"}, "mouse": {"left": "attack"}}))
+    custom = process_actions(raw_actions, profile=str(profile))
+    assert [a["semantic"]["action"] for a in custom] == ["ability", "ability", None]
+    inline = process_actions(raw_actions[1:2], profile={"keys": {}, "mouse": {"left": "attack"}})
+    assert inline[0]["semantic"]["action"] == "attack"
+    with pytest.raises(ValueError, match="game profile"):
+        process_actions(raw_actions, profile="no_such_game")
+
+
 def test_pipeline_process_event_end_to_end(monkeypatch):
+    # aethermind_pipeline imports its siblings by bare name (see conftest.py), so patch the
+    # objects it actually calls: the bare event_seed_emitter and its own compute_audio_rms
+    import event_seed_emitter as ese
+    import aethermind_perception.aethermind_pipeline as pipeline
+
     # Monkeypatch monotonic so the UID is deterministic
-    import aethermind_perception.event_seed_emitter as ese
     monkeypatch.setattr(ese, "monotonic_s", _monotonic_fixed(200.0))
 
     # Monkeypatch audio RMS to avoid filesystem I/O
-    import aethermind_perception.dynamics_computation as dyn
-    monkeypatch.setattr(dyn, "compute_audio_rms", lambda path: {"rms_frames":[0.1,0.2,0.3], "sr":16000})
+    monkeypatch.setattr(pipeline, "compute_audio_rms", lambda path: {"rms_frames":[0.1,0.2,0.3], "sr":16000})
 
     session_id = "session_20250805_162657"
     audio_path = "fake.wav"
@@ -0,0 +1,141 @@
+import json
+import multiprocessing
+import time
+
+import numpy as np
+import cv2
+import pytest
+
+from aethermind_perception.live_capture import LiveSession, DONE_MARKER
+from aethermind_perception.chunker import chunk_video_audio_with_actions
+
+FPS, W, H, SR = 15, 64, 48, 8000
+FOURCC = "FFV1"  # lossless, so segments and the single-file copy decode to the same frames
+START_TS = 1754107947.0
+
+
+def _frame(i, tex):
+    return np.ascontiguousarray(tex[:, i % W: i % W + W])
+
+
+def record(folder, seconds=5, stop_after=None, pause=0.02, gate=None):
+    """
+    Stand-in for the recorder: 1 s video segments, a wav appended every second (header
+    sizes left at 0 until close) and a 10 Hz action log, written as time goes by.
+    gate=(s, event): after s seconds, hold the rest back until the event is set.
+    """
+    rng = np.random.default_rng(0)
+    tex = rng.integers(0, 255, (H, W * 2, 3), dtype=np.uint8)
+    t = np.arange(seconds * SR) / SR
+    pcm = (np.sin(2 * np.pi * 220 * t) * 8000 * (1 + (t > 3))).astype("<i2")
+    header = (b"RIFF" + (0).to_bytes(4, "little") + b"WAVE" + b"fmt " + (16).to_bytes(4, "little")
+              + (1).to_bytes(2, "little") + (1).to_bytes(2, "little") + SR.to_bytes(4, "little")
+              + (SR * 2).to_bytes(4, "little") + (2).to_bytes(2, "little") + (16).to_bytes(2, "little")
+              + b"data" + (0).to_bytes(4, "little"))
+    with open(folder / "audio.wav", "wb") as af, open(folder / "actions.jsonl", "w") as lf:
+        af.write(header)
+        for s in range(seconds if stop_after is None else stop_after):
+            if gate is not None and s == gate[0]:
+                gate[1].wait(60)
+            vw = cv2.VideoWriter(str(folder / f"segment_{s:04d}.avi"), cv2.VideoWriter_fourcc(*FOURCC), FPS, (W, H))
+            for i in range(s * FPS, (s + 1) * FPS):
+                vw.write(_frame(i, tex))
+            vw.release()
+            af.write(pcm[s * SR:(s + 1) * SR].tobytes()); af.flush()
+            for i in range(s * 10, (s + 1) * 10):
+                lf.write(json.dumps({"time": START_TS + i * 0.1, "keys": ["W"] if i % 3 == 0 else [],
+                                     "mouse": {"position": [i, 2 * i], "buttons": {"left": i % 4 == 0}}}) + "\n")
+            lf.flush()
+            time.sleep(pause)
+    if stop_after is None:
+        (folder / DONE_MARKER).touch()
+
+
+def _single_file_copy(folder):
+    # the same recording as one .avi, for the offline chunker
+    rng = np.random.default_rng(0)
+    tex = rng.integers(0, 255, (H, W * 2, 3), dtype=np.uint8)
+    vw = cv2.VideoWriter(str(folder / "screen.avi"), cv2.VideoWriter_fourcc(*FOURCC), FPS, (W, H))
+    for i in range(5 * FPS):
+        vw.write(_frame(i, tex))
+    vw.release()
+
+
+def _comparable(c):
+    return {k: v for k, v in c.items() if k not in ("video_path", "audio_path")}
+
+
+def test_live_session_follows_writer_process(tmp_path):
+    capture, out = tmp_path / "capture", tmp_path / "out"
+    capture.mkdir()
+    ctx = multiprocessing.get_context("spawn")
+    first_seed = ctx.Event()
+    # the recorder holds back its last two seconds until the first chunk is out
+    writer = ctx.Process(target=record, args=(capture,), kwargs={"pause": 0.05, "gate": (3, first_seed)})
+    writer.start()
+    emitted_while_recording = []
+
+    def on_chunk(chunk):
+        emitted_while_recording.append(not (capture / DONE_MARKER).exists())
+        first_seed.set()
+
+    session = LiveSession(capture, out, chunk_duration=2.0, video_start_ts=START_TS, segments="segment_*.avi",
+                          grace=0.2, on_chunk=on_chunk)
+    chunks = session.run(poll_interval=0.05, timeout=60)
+    writer.join(10)
+    assert writer.exitcode == 0
+    assert session.done
+    assert [(c["start"] - START_TS, c["end"] - START_TS) for c in chunks] == [(0.0, 2.0), (2.0, 4.0), (4.0, 5.0)]
+    assert emitted_while_recording[0]  # the first seed didn't wait for the end of the recording
+    assert len((out / "seeds.jsonl").read_text().splitlines()) == 3
+    assert len((out / "events.jsonl").read_text().splitlines()) == 3
+    assert json.loads((out / "session_events.json").read_text())[2]["is_event"]  # louder tail
+
+    # same records as chunking the finished recording offline
+    _single_file_copy(capture)
+    offline = chunk_video_audio_with_actions(str(capture / "screen.avi"), str(capture / "audio.wav"),
+                                             str(capture / "actions.jsonl"), chunk_duration=2.0,
+                                             output_dir=str(tmp_path / "offline"), video_start_ts=START_TS,
+                                             write_chunks="none")
+    for live, off in zip(chunks, offline):
+        assert live["actions"] == off["actions"]
+        assert live["raw_motion"] == pytest.approx(off["raw_motion"], rel=1e-9)
+        assert live["raw_energy"] == pytest.approx(off["raw_energy"], rel=1e-9)
+
+
+def test_live_session_resumes_from_checkpoint(tmp_path):
+    # uninterrupted reference
+    ref_capture = tmp_path / "ref"
+    ref_capture.mkdir()
+    record(ref_capture, pause=0)
+    ref = LiveSession(ref_capture, tmp_path / "ref_out", video_start_ts=START_TS, segments="segment_*.avi").run(poll_interval=0)
+
+    capture, out = tmp_path / "capture", tmp_path / "out"
+    capture.mkdir()
+    record(capture, stop_after=4, pause=0)  # recorder still going: segment 3 may be open
+    first = LiveSession(capture, out, video_start_ts=START_TS, segments="segment_*.avi")
+    assert len(first.poll()) == 1
+    # crash after appending, before the next checkpoint
+    with open(out / "chunks.jsonl", "a") as f:
+        f.write('{"partial": tr')
+    del first
+
+    for p in capture.iterdir():
+        p.unlink()
+    record(capture, pause=0)  # the rest of the recording arrives
+    resumed = LiveSession(capture, out, video_start_ts=START_TS, segments="segment_*.avi")
+    chunks = resumed.run(poll_interval=0)
+    assert [_comparable(c) for c in chunks] == [_comparable(c) for c in ref]
+    assert (out / "events.jsonl").read_text().count("\n") == len(ref)
+
+
+def test_live_session_finishes_a_capture_without_audio(tmp_path):
+    capture = tmp_path / "capture"
+    capture.mkdir()
+    record(capture, pause=0)
+    (capture / "audio.wav").unlink()
+    chunks = LiveSession(capture, tmp_path / "out", video_start_ts=START_TS, segments="segment_*.avi").run(poll_interval=0)
+    assert len(chunks) == 3 and all(c["raw_energy"] == 0.0 for c in chunks)
+    seeds = [json.loads(line) for line in (tmp_path / "out" / "seeds.jsonl").read_text().splitlines()]
+    assert [s["audio_dyn"]["rms_frames"] for s in seeds] == [[], [], []]
+    assert (tmp_path / "out" / "session_events.json").exists()
@@ -0,0 +1,66 @@
+import json
+import pstats
+import threading
+
+import numpy as np
+
+from aethermind_perception.chunker import build_chunk
+from aethermind_perception.metrics import NULL, Metrics, count, current, profiled, timer, use_metrics
+from aethermind_perception.session_pipeline import run_session
+from aethermind_perception.video_stream import FrameClock
+
+
+def test_metrics_scopes_and_merge(tmp_path):
+    with timer("decode"):  # nothing installed: a no-op
+        assert current() is NULL
+    process, local = Metrics(), Metrics()
+    with use_metrics(process):
+        with timer("decode"):
+            pass
+        count("chunks", 2)
+
+        def other_thread():
+            count("chunks")
+        with use_metrics(local, thread_only=True):
+            count("frames_decoded", 5)
+            t = threading.Thread(target=other_thread)  # still reports to the process metrics
+            t.start(); t.join()
+        assert current() is process
+        process.merge(local.to_dict())
+        with profiled(tmp_path / "p.prof"):
+            sum(range(1000))
+    data = process.write(tmp_path / "m.json", session="s")
+    assert data["counters"] == {"chunks": 3, "frames_decoded": 5}
+    assert data["timers"]["decode"]["count"] == 1 and data["session"] == "s"
+    assert json.loads((tmp_path / "m.json").read_text()) == data
+    assert pstats.Stats(str(tmp_path / "p.prof")).total_calls > 0
+
+
+def test_frame_clock_counts_gaps_and_missing_frames():
+    clock = FrameClock(30)
+    for t in [0.0, 33.3, 66.7, 200.0]:  # 100, 133.3 and 166.7 ms missing
+        clock.add(t)
+    assert (clock.frames, clock.dropped) == (4, 3)
+    clock.reset()
+    clock.add(233.3)  # the gap into a window counts toward it
+    clock.missing(2)
+    assert (clock.frames, clock.dropped) == (1, 2)
+
+
+def test_seed_health_is_measured():
+    seeds = []
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (48, 64, 3), np.uint8) for _ in range(3)]
+    build_chunk(10.0, 12.0, [], None, "s", frames, (64, 48), 25.0, "c.mp4", "c.wav",
+                audio_dyn={"rms_frames": [0.1], "sr": 8000}, dropped_frames=4, codec="hevc", on_seed=seeds.append)
+    system = seeds[0]["system"]
+    assert (system["fps"], system["dropped_frames"], system["codec"], system["resolution"]) == (25, 4, "hevc", [64, 48])
+
+
+def test_run_session_writes_metrics(tmp_path, make_session):
+    make_session(tmp_path / "s")
+    run_session(tmp_path / "s", tmp_path / "out", outputs=["session_events.json", "metrics.json"])
+    metrics = json.loads((tmp_path / "out" / "metrics.json").read_text())
+    assert set(metrics["stages"]) == {"inputs", "chunks", "events"}
+    assert {"decode", "flow", "rms", "seed_emit", "event_scoring"} <= set(metrics["timers"])
+    assert metrics["counters"] == {"chunks": 2, "dropped_frames": 0, "frames_decoded": 40}
@@ -0,0 +1,74 @@
+import json
+
+import numpy as np
+
+from aethermind_perception import event_seed_emitter
+from aethermind_perception.event_seed_emitter import EventSeed, emit_event_seed
+from aethermind_perception.input_semantics_mapper import process_actions
+from aethermind_perception.seed_columns import SemanticActions, rms_column
+
+
+def _raw_actions(n=30):
+    # the shapes chunk windows really have: partial buttons, scroll, extra fields, no mouse at all
+    out = []
+    for k in range(n):
+        mouse = {"position": [640 + k, 360 - k], "buttons": {"left": k % 3 == 0}} if k % 4 else {}
+        out.append({"ts": 1754108000.0 + k * 0.05, "keys": ["W", "SHIFT"] if k % 2 else [], "mouse": mouse})
+    out[5]["mouse"]["scroll"] = [0, -1]
+    out[7]["focus"] = "game"
+    return out
+
+
+def _seed(actions):
+    return emit_event_seed(
+        "sess", "/out/chunk_0000.mp4", "/out/chunk_0000.wav", actions,
+        sync={"av_ms": 0, "ai_ms": 0, "vi_ms": 0}, video_dyn={"flow_mean": 0.5},
+        audio_dyn={"rms_frames": [0.0, 0.25, 0.1, 1e-7], "sr": 48000}, system={"fps": 30},
+    )
+
+
+def _wrapped_twice(actions):
+    # what process_event made of build_chunk's semantic actions before process_actions passed them through
+    return [{"ts": a["ts"], "raw": a, "semantic": {"action": None, "valid_for_game": False, "mouse_norm": [0, 0]}}
+            for a in actions]
+
+
+def test_compact_seed_round_trips_to_the_same_json():
+    seed = _seed(_wrapped_twice(process_actions(_raw_actions())))
+    compact = EventSeed.from_dict(seed).compact()
+    # the emitter's own (bare-name) import of seed_columns
+    assert isinstance(compact.actions, event_seed_emitter.SemanticActions)
+    assert type(compact.actions.raw.raw).__name__ == "RawActions" and len(compact.actions.raw.raw) == 30
+    assert isinstance(compact.audio_dyn["rms_frames"], np.ndarray)
+    back = compact.to_dict()
+    assert back == seed and json.dumps(back) == json.dumps(seed)
+    assert compact.compact().to_dict() == seed
+    assert not hasattr(compact, "__dict__")
+
+
+def test_lists_the_columns_cannot_hold_are_kept_as_they_are():
+    actions = process_actions(_raw_actions())
+    assert SemanticActions.from_list(actions).to_list() == actions
+    compact = EventSeed.from_dict(_seed(actions)).compact()
+    assert type(compact.actions.raw).__name__ == "RawActions" and compact.to_dict()["actions"] == actions
+
+    out_of_order = process_actions(_raw_actions()[::-1])
+    assert SemanticActions.from_list(out_of_order) is None
+    odd = process_actions(_raw_actions())
+    odd[3]["semantic"]["mouse_norm"] = [0.5, 0.5, 0.5]
+    assert SemanticActions.from_list(odd) is None
+    mixed = _raw_actions()
+    mixed[1]["mouse"]["position"] = [640, 360.5]  # 640 stays an int next to 360.5
+    assert SemanticActions.from_list(process_actions(mixed)).to_list() == process_actions(mixed)
+    swapped = _raw_actions()
+    swapped[2]["mouse"]["buttons"] = {"right": True, "left": True}  # button order decides the action
+    assert json.dumps(SemanticActions.from_list(process_actions(swapped)).to_list()) == json.dumps(process_actions(swapped))
+
+    plain = [{"ts": 1.5, "keys": ["W"], "mouse_norm": [0.25, 0.5]}]
+    seed = _seed(plain)
+    compact = EventSeed.from_dict(seed).compact()
+    assert compact.actions is plain and compact.to_dict() == seed
+
+    assert rms_column([0.5, 0.25]).dtype == np.float32
+    assert rms_column([0.1]).dtype == np.float64
+    assert rms_column([1, 2]) is None
@@ -0,0 +1,67 @@
+import dataclasses
+import json
+
+import pytest
+
+from aethermind_perception import event_seed_emitter
+from aethermind_perception.seed_sink import SeedSink, dump_seeds, read_seeds
+from aethermind_perception.session_pipeline import run_session
+
+
+def _seed(i):
+    return event_seed_emitter.emit_event_seed(
+        "sess", f"/out/chunk_{i:04d}.mp4", f"/out/chunk_{i:04d}.wav",
+        actions=[{"ts": 1.5 * i, "keys": ["W"], "mouse_norm": [0.25, 0.5]}],
+        sync={"av_ms": 0, "ai_ms": 0, "vi_ms": 0}, video_dyn={"flow_mean": 0.5 * i},
+        audio_dyn={"rms_frames": [0.1, 0.2], "sr": 48000}, system={"fps": 30, "dropped_frames": i},
+    )
+
+
+@pytest.mark.parametrize("name", ["seeds.jsonl", "seeds.msgpack"])
+def test_sink_batches_and_round_trips(tmp_path, name):
+    seeds = [_seed(i) for i in range(10)]
+    path = tmp_path / name
+    with SeedSink(path, batch=4, fsync="batch") as sink:
+        for seed in seeds[:5]:
+            sink(seed)
+        assert list(read_seeds(path)) == seeds[:4]  # one full batch on disk, one seed buffered
+        for seed in seeds[5:]:
+            sink.write(seed)
+    assert sink.count == 10 and list(read_seeds(path)) == seeds
+
+    # a record cut short by a crash is skipped; appending carries on after it
+    path.write_bytes(path.read_bytes()[:-3])
+    assert list(read_seeds(path)) == seeds[:9]
+    dump_seeds(tmp_path / f"copy.{name.split('.')[1]}", seeds)
+    assert list(read_seeds(tmp_path / f"copy.{name.split('.')[1]}")) == seeds
+
+    with pytest.raises(ValueError, match="fsync"):
+        SeedSink(tmp_path / name, fsync="sometimes")
+    with pytest.raises(ValueError, match="seed format"):
+        SeedSink(tmp_path / "seeds.txt")
+
+
+def test_seed_to_dict_is_shallow_but_not_shared():
+    seed = _seed(3)
+    as_dataclass = event_seed_emitter.EventSeed(**seed)
+    assert as_dataclass.to_dict() == dataclasses.asdict(as_dataclass) == seed
+    seed["schema_version"]["minor"] = 99
+    assert event_seed_emitter.SCHEMA_VERSION == {"major": 1, "minor": 0}
+
+
+def test_run_session_persists_seeds_and_replays_them_from_cache(tmp_path, make_session):
+    make_session(tmp_path / "s")
+    outputs = ["chunks.json", "seeds.jsonl", "seeds.msgpack", "metrics.json"]
+    run_session(tmp_path / "s", tmp_path / "a", outputs=outputs, cache_dir=tmp_path / "cache", workers=2)
+    run_session(tmp_path / "s", tmp_path / "b", outputs=outputs, cache_dir=tmp_path / "cache")
+    for run in ("a", "b"):
+        chunks = json.loads((tmp_path / run / "chunks.json").read_text())
+        seeds = list(read_seeds(tmp_path / run / "seeds.jsonl"))
+        assert list(read_seeds(tmp_path / run / "seeds.msgpack")) == seeds
+        assert [s["video_path"] for s in seeds] == [c["video_path"] for c in chunks]
+        assert {s["session_id"] for s in seeds} == {run}
+        assert all(s["event_uid"].startswith(f"{run}|chunk_") for s in seeds)
+    metrics = json.loads((tmp_path / "a" / "metrics.json").read_text())
+    assert metrics["counters"]["seeds"] == 4 and metrics["timers"]["seed_write"]["count"] == 2
+    a, b = (list(read_seeds(tmp_path / run / "seeds.jsonl")) for run in ("a", "b"))
+    assert [s["created_at"] for s in a] == [s["created_at"] for s in b]  # replayed, not re-emitted
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from aethermind_perception.chunker import chunk_bounds, chunk_video_audio_with_actions
+from aethermind_perception.segmentation import active_steps, segment_bounds
+
+START = 1754093547.0
+
+
+def test_segment_bounds_merges_idle_and_cuts_bursts():
+    # 0.5 s steps: 20 s idle, 3 s active, 0.5 s idle, 1.5 s active, 15 s idle
+    active = np.array([0] * 40 + [1] * 6 + [0] + [1] * 3 + [0] * 30, bool)
+    bounds = segment_bounds(100.0, 140.0, active, step=0.5, chunk_duration=2.0, min_duration=1.0, max_duration=12.0)
+    assert bounds[0][0] == 100.0 and bounds[-1][1] == 140.0
+    assert all(a[1] == b[0] for a, b in zip(bounds, bounds[1:]))
+    lengths = [e - s for s, e in bounds]
+    assert lengths == [10.0, 10.0, 2.0, 1.5, 1.5, 7.5, 7.5]  # the 0.5 s gap joins the shorter burst piece
+    assert len(bounds) < len(chunk_bounds(100.0, 140.0, 2.0))
+
+    # all active: the fixed 2 s windows
+    assert segment_bounds(0.0, 7.0, np.ones(14, bool), step=0.5) == chunk_bounds(0.0, 7.0, 2.0)
+    with pytest.raises(ValueError, match="min_duration"):
+        segment_bounds(0.0, 7.0, np.ones(14, bool), chunk_duration=2.0, max_duration=1.0)
+
+
+def test_active_steps_thresholds_and_padding():
+    signals = {"motion": np.array([0, 0.2, 0, 0, 5.0, 0, 0, 0, 0, 0]),
+               "audio": np.array([0.01] * 8 + [0.2, 0.01]),
+               "actions": np.zeros(10)}
+    assert active_steps(signals, pad=0).tolist() == [False] * 4 + [True] + [False] * 3 + [True, False]
+    assert active_steps(signals, pad=1).nonzero()[0].tolist() == [3, 4, 5, 7, 8, 9]
+
+
+def test_adaptive_chunking_merges_idle_spans(tmp_path, make_session):
+    # a still screen and a quiet hum, with one 2 s burst of activity
+    s = make_session(tmp_path / "s", seconds=20, burst=(8, 10), clock_offset=0)
+    seeds = []
+    chunks = chunk_video_audio_with_actions(str(s / "screen.mp4"), str(s / "audio.wav"), str(s / "actions.jsonl"),
+                                            2.0, str(tmp_path / "out"), START, write_chunks="none",
+                                            seeds=seeds.append, segmentation={"max_duration": 6.0})
+    spans = [(c["start"] - START, c["end"] - START) for c in chunks]
+    assert spans[0][0] == 0.0 and spans[-1][1] == pytest.approx(20.0)
+    assert all(a[1] == b[0] for a, b in zip(spans, spans[1:]))
+    assert len(chunks) < 10 and max(e - s for s, e in spans) <= 6.0
+    # the burst (and the padding around it) is chunked as finely as fixed chunking would
+    burst = [(a, b) for a, b in spans if b > 8.0 and a < 10.0]
+    assert burst and all(b - a <= 2.0 for a, b in burst)
+    assert [round(x["end"] - x["start"], 6) for x in seeds] == [round(b - a, 6) for a, b in spans]
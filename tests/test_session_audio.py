@@ -0,0 +1,72 @@
+import shutil
+import subprocess
+import wave
+
+import numpy as np
+import pytest
+
+from aethermind_perception.session_audio import SessionAudio, open_session_audio, pcm16_rms
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not on PATH")
+
+
+def _write_wav(path, samples, sr, width=2):
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(samples.shape[1]); wf.setsampwidth(width); wf.setframerate(sr)
+        wf.writeframes(samples.tobytes())
+
+
+def _read_wav(path):
+    with wave.open(str(path)) as wf:
+        return wf.getnchannels(), wf.getframerate(), wf.readframes(wf.getnframes())
+
+
+def test_memmap_view_and_frame_range(tmp_path):
+    sr = 16000
+    x = np.stack([np.arange(sr * 2), -np.arange(sr * 2)], axis=1).astype(np.int16)
+    _write_wav(tmp_path / "a.wav", x, sr)
+    audio = SessionAudio(tmp_path / "a.wav")
+    assert (audio.sr, audio.channels, audio.n_frames) == (sr, 2, sr * 2)
+    assert isinstance(audio.data, np.memmap)
+    assert np.array_equal(audio.pcm16(0, sr * 2), x)
+    assert audio.frame_range(0.5, 1.0) == (8000, 16000)
+    assert audio.frame_range(1.5, 9.0) == (24000, 32000)  # clipped to the file
+    assert audio.frame_range(2.5, 3.0) == (32000, 32000)
+
+
+def test_absolute_windows_and_shared_mapping(tmp_path):
+    sr = 1000
+    x = np.arange(3000, dtype=np.int16)[:, None]
+    _write_wav(tmp_path / "a.wav", x, sr)
+    audio = open_session_audio(tmp_path / "a.wav", start_ts=500.0)
+    assert open_session_audio(str(tmp_path / "a.wav"), start_ts=500.0) is audio
+    assert audio.sample_range(500.25, 500.75) == (250, 750)
+    assert np.shares_memory(audio.samples(500.25, 500.75), audio.data)
+    win = audio.float_window(500.25, 500.75)
+    assert win.shape == (500,)
+    assert np.allclose(win, np.arange(250, 750) / 32768.0)
+    assert audio.chunk_range(501.0, 503.0) == audio.frame_range(1.0, 3.0) == (1000, 3000)
+
+
+def test_pcm16_rms_does_not_overflow():
+    pcm = np.full((100, 1), -32768, dtype=np.int16)
+    assert pcm16_rms(pcm) == 32768.0
+    assert pcm16_rms(np.zeros((0, 1), dtype=np.int16)) == 0.0
+
+
+@needs_ffmpeg
+@pytest.mark.parametrize("channels", [1, 2])
+def test_write_wav_matches_ffmpeg_pcm(tmp_path, channels):
+    sr = 16000
+    rng = np.random.default_rng(1)
+    x = rng.integers(-32768, 32767, (sr * 5, channels), dtype=np.int16)
+    src = tmp_path / "session.wav"
+    _write_wav(src, x, sr)
+    audio = SessionAudio(src)
+    for start, end in [(0.0, 2.0), (2.0, 4.0), (0.1234567, 0.9876549), (1.4999999, 2.5000001), (4.0, 5.0), (4.5, 6.0)]:
+        ff_out, our_out = tmp_path / "ff.wav", tmp_path / "ours.wav"
+        subprocess.run(["ffmpeg", "-y", "-i", str(src), "-ss", str(start), "-to", str(end),
+                        "-c:a", "pcm_s16le", str(ff_out)],
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        audio.write_wav(our_out, start, end)
+        assert _read_wav(our_out) == _read_wav(ff_out), (start, end)
@@ -0,0 +1,95 @@
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from aethermind_perception.session_pipeline import Stage, run_session, run_stages
+from aethermind_perception.vector_store import VectorStore
+
+START = 1754093547  # session.json start_time 2025-08-02_00-12-27 as UTC epoch
+
+
+def test_run_stages_order_concurrency_and_pruning():
+    both_running = threading.Barrier(2, timeout=5)
+    calls = []
+
+    def side(name):
+        def fn(**deps):
+            calls.append(name)
+            both_running.wait()  # a and b have to overlap
+            return name
+        return fn
+
+    stages = [
+        Stage("a", side("a")),
+        Stage("b", side("b")),
+        Stage("ab", lambda a, b: a + b, ["a", "b"]),
+        Stage("unused", lambda: calls.append("unused")),
+    ]
+    results, timings = run_stages(stages, ["ab"])
+    assert results == {"a": "a", "b": "b", "ab": "ab"}
+    assert sorted(calls) == ["a", "b"] and set(timings) == {"a", "b", "ab"}
+
+
+def test_run_stages_errors():
+    def boom():
+        raise RuntimeError("stage failed")
+    later = []
+    stages = [Stage("x", boom), Stage("y", lambda x: later.append(x), ["x"])]
+    with pytest.raises(RuntimeError, match="stage failed"):
+        run_stages(stages, ["y"])
+    assert later == []
+    with pytest.raises(ValueError, match="cycle"):
+        run_stages([Stage("p", lambda q: q, ["q"]), Stage("q", lambda p: p, ["p"])], ["p"])
+    with pytest.raises(KeyError):
+        run_stages(stages, ["missing"])
+
+
+def test_run_session_writes_only_requested_outputs(tmp_path, make_session):
+    make_session(tmp_path / "s")
+    results, _ = run_session(tmp_path / "s", tmp_path / "out",
+                             outputs=["session_events.json", "session_events_with_vectors.json"])
+    written = sorted(p.name for p in (tmp_path / "out").iterdir())
+    assert written == ["session_events.json", "session_events_with_vectors.json", "vector_windows.vec"]
+
+    events = json.loads((tmp_path / "out" / "session_events.json").read_text())
+    merged = json.loads((tmp_path / "out" / "session_events_with_vectors.json").read_text())
+    assert events == results["events"] and len(events) == 2
+    assert [e["start"] - START - 14400 for e in events] == [0.0, 2.0]
+    assert "vector_rows" not in events[0]  # the merge works on copies
+    store = VectorStore(tmp_path / "out" / merged[0]["vector_store"])
+    assert [m["vector_rows"] for m in merged] == [[0, 4], [4, 8]]
+
+    # inline, nothing on disk but the merged file; same vectors
+    run_session(tmp_path / "s", tmp_path / "inline", outputs=["session_events_with_vectors.json"], inline=True)
+    assert [p.name for p in (tmp_path / "inline").iterdir()] == ["session_events_with_vectors.json"]
+    inline = json.loads((tmp_path / "inline" / "session_events_with_vectors.json").read_text())
+    for ref, full in zip(merged, inline):
+        assert store[slice(*ref["vector_rows"])] == full["vectors"]
+
+    with pytest.raises(ValueError, match="overwrite"):
+        run_session(tmp_path / "s", outputs=["session.json"])
+
+
+def test_run_session_reuses_cached_stages(tmp_path, make_session, capsys):
+    make_session(tmp_path / "s")
+    outputs = ["chunks.json", "session_events.json", "session_events_with_vectors.json"]
+    run_session(tmp_path / "s", tmp_path / "a", outputs=outputs, cache_dir=tmp_path / "cache")
+    assert "Reused" not in capsys.readouterr().out
+    run_session(tmp_path / "s", tmp_path / "b", outputs=outputs, cache_dir=tmp_path / "cache")
+    out = capsys.readouterr().out
+    assert "Reused 2 cached chunks" in out and "Reused cached vector windows" in out
+
+    def load(run, name):
+        return json.loads((tmp_path / run / name).read_text().replace(str(tmp_path / run), "OUT"))
+    for name in outputs:
+        assert load("a", name) == load("b", name)
+    assert np.array_equal(VectorStore(tmp_path / "a" / "vector_windows.vec").x,
+                          VectorStore(tmp_path / "b" / "vector_windows.vec").x)
+
+    # another chunk length misses the chunk entry but still reuses the vectors
+    run_session(tmp_path / "s", tmp_path / "c", outputs=outputs, cache_dir=tmp_path / "cache", chunk_duration=1.0)
+    out = capsys.readouterr().out
+    assert "cached chunks" not in out and "Reused cached vector windows" in out
+    assert len(load("c", "chunks.json")) == 4
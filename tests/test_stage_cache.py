@@ -0,0 +1,39 @@
+import os
+
+from aethermind_perception.stage_cache import StageCache, clone_file, code_version, file_digest, link_input
+
+
+def test_stage_cache_keys_entries_and_links(tmp_path):
+    a, b = tmp_path / "a.bin", tmp_path / "b.bin"
+    a.write_bytes(b"recording" * 1000)
+    b.write_bytes(b"recording" * 1000)
+    cache = StageCache(tmp_path / "cache")
+    code = code_version(file_digest)
+
+    # keys follow content, params and code, not paths
+    key = cache.key("chunks", [a], {"duration": 2.0}, code)
+    assert cache.key("chunks", [b], {"duration": 2.0}, code) == key
+    assert cache.key("chunks", [a], {"duration": 1.0}, code) != key
+    assert cache.key("chunks", [a], {"duration": 2.0}, code_version(clone_file)) != key
+    assert cache.key("chunks", [tmp_path / "missing"], {"duration": 2.0}, code) != key
+
+    assert cache.get("chunks", key) is None
+    media = tmp_path / "media"
+    media.mkdir()
+    (media / "chunk_0000.mp4").write_bytes(b"video")
+    entry = cache.put("chunks", key, {"n": 1}, {"media": media, "made.txt": lambda p: p.write_text("x")})
+    assert cache.get("chunks", key) == (entry, {"n": 1})
+    cache.restore(entry, "media", tmp_path / "restored")
+    assert (tmp_path / "restored" / "chunk_0000.mp4").read_bytes() == b"video"
+    assert (entry / "made.txt").read_text() == "x"
+    assert not any(p.name.endswith(".tmp") for p in entry.parent.iterdir())
+
+    # provenance inputs are hardlinked; restored outputs are independent copies
+    assert link_input(a, tmp_path / "linked.bin") == "hardlink"
+    assert os.path.samefile(a, tmp_path / "linked.bin")
+    assert link_input(a, tmp_path / "linked.bin") == "existing"
+    (tmp_path / "restored" / "chunk_0000.mp4").write_bytes(b"rewritten")
+    assert (entry / "media" / "chunk_0000.mp4").read_bytes() == b"video"
+
+    b.write_bytes(b"edited")
+    assert cache.key("chunks", [b], {"duration": 2.0}, code) != key
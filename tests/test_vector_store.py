@@ -0,0 +1,84 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+from aethermind_perception.vector_store import VectorStore, VectorStoreWriter, vector_columns
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../scripts')))
+from add_vectors_to_events import VECTOR_OFFSET, add_vectors_to_chunks
+
+FEAT = [("left_clicks", "<i8"), ("mouse_dx", "<f8")]
+
+
+def _rows(n, t0=1000.0):
+    rng = np.random.default_rng(0)
+    return [{"t": t0 + 0.25 + 0.5 * i, "x": rng.random(4).astype(np.float32).tolist(),
+             "action_feat": {"left_clicks": int(i % 3), "mouse_dx": float(i) - 2.5}} for i in range(n)]
+
+
+def _write(path, rows, **kw):
+    with VectorStoreWriter(path, vector_columns(4, action_feat=FEAT), meta={"window": 0.5}, **kw) as w:
+        for r in rows:
+            w.append(**r)
+
+
+def test_round_trip_and_append(tmp_path):
+    rows = _rows(10)
+    path = tmp_path / "v.vec"
+    _write(path, rows[:6], flush_rows=4)
+    _write(path, rows[6:])  # reopened: appends after the committed rows
+    store = VectorStore(path)
+    assert len(store) == 10 and store.meta == {"window": 0.5}
+    assert isinstance(store.x, np.memmap) and store.x.dtype == np.float32 and store.x.shape == (10, 4)
+    assert list(store) == rows
+    assert store[-1] == rows[-1] and store[2:4] == rows[2:4]
+
+    store.export_jsonl(tmp_path / "v.jsonl")
+    assert [json.loads(l) for l in (tmp_path / "v.jsonl").read_text().splitlines()] == rows
+
+
+def test_uncommitted_rows_are_dropped(tmp_path):
+    rows = _rows(5)
+    path = tmp_path / "v.vec"
+    _write(path, rows[:3])
+    w = VectorStoreWriter(path, flush_rows=1)
+    w.append(**rows[3])
+    with open(path / "x.bin", "ab") as f:
+        f.write(b"\0" * 7)  # a crash halfway through the next row
+    assert len(VectorStore(path)) == 4
+    _write(path, rows[4:])
+    assert list(VectorStore(path)) == rows
+
+
+def test_writer_rejects_bad_rows(tmp_path):
+    path = tmp_path / "v.vec"
+    _write(path, _rows(2))
+    with pytest.raises(ValueError, match="time order"):
+        _write(path, _rows(1))
+    with pytest.raises(ValueError, match="columns"):
+        VectorStoreWriter(path, vector_columns(8))
+    _write(path, _rows(1), truncate=True)
+    assert len(VectorStore(path)) == 1
+
+
+def test_merge_references_row_ranges(tmp_path):
+    rows = _rows(20)
+    _write(tmp_path / "v.vec", rows)
+    VectorStore(tmp_path / "v.vec").export_jsonl(tmp_path / "v.jsonl")
+    t0 = 1000.0 + VECTOR_OFFSET
+    chunks = [{"start": t0 + 2.0 * k, "end": t0 + 2.0 * (k + 1)} for k in range(6)]
+    (tmp_path / "events.json").write_text(json.dumps(chunks))
+
+    add_vectors_to_chunks(tmp_path / "events.json", tmp_path / "v.vec", tmp_path / "refs.json")
+    add_vectors_to_chunks(tmp_path / "events.json", tmp_path / "v.vec", tmp_path / "inline.json", inline=True)
+    add_vectors_to_chunks(tmp_path / "events.json", tmp_path / "v.jsonl", tmp_path / "old.json")
+    refs = json.loads((tmp_path / "refs.json").read_text())
+    inline = json.loads((tmp_path / "inline.json").read_text())
+    assert inline == json.loads((tmp_path / "old.json").read_text())
+    assert [c["vector_rows"] for c in refs] == [[0, 4], [4, 8], [8, 12], [12, 16], [16, 20], [20, 20]]
+    for ref, full in zip(refs, inline):
+        store = VectorStore(tmp_path / ref["vector_store"])
+        assert store[slice(*ref["vector_rows"])] == full["vectors"]
@@ -0,0 +1,124 @@
+import numpy as np
+import cv2
+import pytest
+
+from aethermind_perception.video_stream import (
+    MotionMeter, iter_video_windows, window_frame_range, sparse_indices, read_frames_seek, read_frames_sequential,
+)
+
+
+def _write_clip(path, n_frames=45, fps=15, size=(64, 48)):
+    # every frame carries its own index as its brightness so we can tell which ones came back
+    w, h = size
+    vw = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, (w, h))
+    for i in range(n_frames):
+        vw.write(np.full((h, w, 3), i * 5, dtype=np.uint8))
+    vw.release()
+
+
+def test_window_frame_range_and_sparse_indices():
+    assert window_frame_range(0.0, 2.0, 15, 45) == (0, 30)
+    assert window_frame_range(2.0, 3.0, 15, 45) == (30, 45)
+    assert window_frame_range(2.0, 4.0, 15, 45) == (30, 45)
+    assert sparse_indices(0, 30, 12)[0] == 0
+    assert sparse_indices(0, 30, 12)[-1] == 29
+    assert len(sparse_indices(0, 30, 12)) == 12
+    assert sparse_indices(30, 33, 12) == [30, 31, 32]
+    assert sparse_indices(5, 5, 12) == []
+
+
+def test_iter_video_windows_single_pass_matches_indices(tmp_path):
+    clip = tmp_path / "clip.avi"
+    _write_clip(clip)
+    windows = [(0.0, 2.0), (2.0, 3.0)]
+    out = list(iter_video_windows(str(clip), windows, max_frames=4))
+    assert len(out) == 2
+
+    frames0, (w, h), fps = out[0]
+    assert (w, h) == (64, 48)
+    assert fps == 15
+    got = [int(round(f.mean() / 5)) for f in frames0]
+    assert got == sparse_indices(0, 30, 4)
+
+    frames1, _, _ = out[1]
+    got = [int(round(f.mean() / 5)) for f in frames1]
+    assert got == sparse_indices(30, 45, 4)
+
+
+def test_motion_meter_measures_every_frame_of_each_window(tmp_path):
+    clip = tmp_path / "clip.avi"
+    _write_clip(clip)
+    meter = MotionMeter()
+    motion = [meter.value for _ in iter_video_windows(str(clip), [(0.0, 2.0), (2.0, 3.0)], max_frames=4, meter=meter)]
+
+    cap = cv2.VideoCapture(str(clip))
+    gray = []
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        gray.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+    cap.release()
+    # pairs never span the window boundary (frame 30)
+    expect = [np.mean([np.mean(cv2.absdiff(a, b)) for a, b in zip(g[:-1], g[1:])]) for g in (gray[:30], gray[30:])]
+    assert motion == pytest.approx(expect, rel=1e-9)
+    assert motion[0] > 0
+
+
+
+def test_motion_meter_subsamples_wide_frames_before_measuring():
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (360, 640, 3), np.uint8) for _ in range(3)]
+    small = [cv2.cvtColor(cv2.resize(f, (320, 180), interpolation=cv2.INTER_NEAREST), cv2.COLOR_BGR2GRAY) for f in frames]
+    full = [cv2.cvtColor(f, cv2.COLOR_BGR2GRAY) for f in frames]
+    for meter, gray in ((MotionMeter(), small), (MotionMeter(width=None), full), (MotionMeter(width=640), full)):
+        for f in frames:
+            meter.add(f)
+        assert meter.value == pytest.approx(np.mean([np.mean(cv2.absdiff(a, b)) for a, b in zip(gray, gray[1:])]))
+
+def test_sequential_sampler_matches_seek_reader(tmp_path):
+    clip = tmp_path / "clip.avi"
+    _write_clip(clip)
+    seek, res, fps = read_frames_seek(str(clip), max_frames=5)
+    seq, res2, fps2 = read_frames_sequential(str(clip), max_frames=5)
+    assert (res, fps) == (res2, fps2) == ((64, 48), 15)
+    assert len(seq) == 5
+    assert all(np.array_equal(a, b) for a, b in zip(seek, seq))
+
+    small, res3, _ = read_frames_sequential(str(clip), max_frames=5, target_size=(32, 24))
+    assert res3 == (64, 48)  # source resolution is still reported
+    assert all(f.shape == (24, 32, 3) for f in small)
+
+
+def test_sequential_sampler_missing_file_defaults(tmp_path):
+    frames, res, fps = read_frames_sequential(str(tmp_path / "nope.mp4"))
+    assert frames == [] and res == (1920, 1080) and fps == 30
+
+
+def _seek_per_window(path, windows):
+    # the vectorizer's old reader: seek to every window start, read until the timestamp passes its end
+    cap = cv2.VideoCapture(str(path))
+    out = []
+    for t0, t1 in windows:
+        frames = []
+        cap.set(cv2.CAP_PROP_POS_MSEC, t0 * 1000)
+        while True:
+            ok, frame = cap.read()
+            if not ok or cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0 >= t1:
+                break
+            frames.append(frame)
+        out.append(frames)
+    cap.release()
+    return out
+
+
+@pytest.mark.parametrize("fps", [15, 29.97])
+def test_every_frame_windows_match_seek_per_window(tmp_path, fps):
+    clip = tmp_path / "clip.avi"
+    _write_clip(clip, n_frames=int(fps * 1.7), fps=fps)
+    windows = [(i * 0.5, min((i + 1) * 0.5, 1.8)) for i in range(4)]
+    seq = [frames for frames, _, _ in iter_video_windows(str(clip), windows, max_frames=None)]
+    ref = _seek_per_window(clip, windows)
+    assert [len(f) for f in seq] == [len(f) for f in ref]
+    assert all(np.array_equal(a, b) for fs, rs in zip(seq, ref) for a, b in zip(fs, rs))
+    assert sum(map(len, seq)) == int(fps * 1.7)